@@ -317,6 +317,7 @@ def handle_discard(request, group_list, projects, user):
                 GroupHash.objects.filter(group=group).update(
                     group=None, group_tombstone_id=tombstone.id
                 )
+                GroupHash.objects.invalidate_hash_cache(group.project_id)
 
     for project in projects:
         _delete_groups(request, project, groups_to_delete.get(project.id), delete_type="discard")
@@ -341,6 +342,7 @@ def _delete_groups(request, project, group_list, delete_type):
     transaction_id = uuid4().hex
 
     GroupHash.objects.filter(project_id=project.id, group__id__in=group_ids).delete()
+    GroupHash.objects.invalidate_hash_cache(project.id)
     # We remove `GroupInbox` rows here so that they don't end up influencing queries for
     # `Group` instances that are pending deletion
     GroupInbox.objects.filter(project_id=project.id, group__id__in=group_ids).delete()
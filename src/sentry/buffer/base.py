@@ -1,9 +1,12 @@
 import logging
+from collections import defaultdict
 
-from django.db.models import F
+from django.db import connections, router
+from django.db.models import F, Model
 
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
+from sentry.utils import metrics
 from sentry.utils.services import Service
 
 
@@ -82,3 +85,169 @@ class Buffer(Service, metaclass=BufferMount):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, pending):
+        """
+        Processes many buffered increments at once.
+
+        ``pending`` is a list of ``(model, columns, filters, extra, signal_only)``
+        tuples. Increments against existing rows of the same model and with
+        the same set of columns are coalesced into a single
+        ``UPDATE ... FROM (VALUES ...)`` statement. Anything that cannot be
+        expressed that way, or that did not match an existing row, goes
+        through ``process`` instead.
+        """
+        batches = defaultdict(list)
+        for item in pending:
+            shape = _get_bulk_update_shape(*item)
+            if shape is None:
+                self.process(*item)
+            else:
+                batches[shape].append(item)
+
+        for shape, items in batches.items():
+            if len(items) == 1:
+                self.process(*items[0])
+                continue
+
+            updated = _bulk_update(shape, items)
+            metrics.incr(
+                "buffer.bulk-update",
+                amount=len(updated),
+                skip_internal=True,
+                tags={"model": shape[0].__name__},
+            )
+
+            for index, (model, columns, filters, extra, signal_only) in enumerate(items):
+                if index not in updated:
+                    self.process(model, columns, filters, extra, signal_only)
+                    continue
+
+                buffer_incr_complete.send_robust(
+                    model=model,
+                    columns=columns,
+                    filters=filters,
+                    extra=extra,
+                    created=False,
+                    sender=model,
+                )
+
+
+def _is_score_update(model, columns, extra):
+    from sentry.models import Group
+
+    return model is Group and "times_seen" in columns and "last_seen" in extra
+
+
+def _get_field(model, name):
+    if name == "pk":
+        return model._meta.pk
+    return model._meta.get_field(name)
+
+
+def _get_bulk_update_shape(model, columns, filters, extra=None, signal_only=None):
+    """
+    Returns a hashable description of the UPDATE statement an increment
+    would be part of, or ``None`` if it has to be processed on its own.
+    """
+    if signal_only or not filters:
+        return None
+
+    extra = extra or {}
+    score_update = _is_score_update(model, columns, extra)
+
+    extra_keys = []
+    for key, value in extra.items():
+        if score_update and key == "score":
+            # recomputed from times_seen and last_seen, see ``process``
+            continue
+        if hasattr(value, "resolve_expression"):
+            return None
+        extra_keys.append(key)
+
+    keys = list(filters) + list(columns) + extra_keys
+    if len(set(keys)) != len(keys):
+        return None
+
+    try:
+        for key in keys:
+            _get_field(model, key)
+    except Exception:
+        return None
+
+    return (model, tuple(sorted(filters)), tuple(sorted(columns)), tuple(sorted(extra_keys)))
+
+
+def _bulk_update(shape, items):
+    """
+    Applies a batch of increments of the same shape with a single statement
+    and returns the indexes of the items that matched an existing row.
+    """
+    model, filter_keys, column_keys, extra_keys = shape
+
+    using = router.db_for_write(model)
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return set()
+
+    qn = connection.ops.quote_name
+    keys = filter_keys + column_keys + extra_keys
+    fields = [_get_field(model, key) for key in keys]
+    aliases = {key: "c%d" % i for i, key in enumerate(keys)}
+
+    assignments = [
+        "{col} = t.{col} + v.{alias}".format(col=qn(f.column), alias=aliases[key])
+        for key, f in zip(keys, fields)
+        if key in column_keys
+    ]
+    assignments.extend(
+        "{col} = v.{alias}".format(col=qn(f.column), alias=aliases[key])
+        for key, f in zip(keys, fields)
+        if key in extra_keys
+    )
+    if _is_score_update(model, column_keys, extra_keys):
+        # Mirrors ``ScoreClause.as_sql`` with per-row values.
+        assignments.append(
+            "{score} = log(t.{times_seen} + v.{inc}) * 600 + floor(extract(epoch from v.{last_seen}))".format(
+                score=qn(_get_field(model, "score").column),
+                times_seen=qn(_get_field(model, "times_seen").column),
+                inc=aliases["times_seen"],
+                last_seen=aliases["last_seen"],
+            )
+        )
+
+    conditions = [
+        "t.{col} = v.{alias}".format(col=qn(f.column), alias=aliases[key])
+        for key, f in zip(keys, fields)
+        if key in filter_keys
+    ]
+
+    placeholders = ", ".join(
+        ["%s::integer"] + ["%s::{}".format(f.rel_db_type(connection)) for f in fields]
+    )
+    params = []
+    for index, (_, columns, filters, extra, _) in enumerate(items):
+        values = {**filters, **columns, **(extra or {})}
+        params.append(index)
+        for key, f in zip(keys, fields):
+            value = values[key]
+            if isinstance(value, Model):
+                value = value.pk
+            params.append(f.get_db_prep_save(value, connection))
+
+    sql = (
+        "UPDATE {table} AS t SET {assignments} "
+        "FROM (VALUES {rows}) AS v (idx, {aliases}) "
+        "WHERE {conditions} RETURNING v.idx"
+    ).format(
+        table=qn(model._meta.db_table),
+        assignments=", ".join(assignments),
+        rows=", ".join(["(%s)" % placeholders] * len(items)),
+        aliases=", ".join(aliases[key] for key in keys),
+        conditions=" AND ".join(conditions),
+    )
+
+    with metrics.timer("buffer.bulk-update.duration", tags={"model": model.__name__}):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {row[0] for row in cursor.fetchall()}
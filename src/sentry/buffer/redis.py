@@ -1,12 +1,15 @@
 import pickle
+import struct
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 from time import time
 
+import msgpack
 from django.db import models
 from django.utils import timezone
 from django.utils.encoding import force_bytes, force_text
 
+from sentry import options
 from sentry.buffer import Buffer
 from sentry.exceptions import InvalidConfiguration
 from sentry.tasks.process_buffer import process_incr, process_pending
@@ -19,6 +22,44 @@ from sentry.utils.redis import get_cluster_from_options
 _local_buffers = None
 _local_buffers_lock = threading.Lock()
 
+# Hash fields written by ``RedisBuffer._dump_packed`` start with this marker
+# followed by a version byte. 0xc1 is never emitted by msgpack and cannot start
+# a pickle or JSON payload, so readers can tell all encodings apart.
+PACKED_MARKER = b"\xc1"
+PACKED_VERSION = 1
+
+EXT_DATETIME = 1
+EXT_SCORE = 2
+
+_datetime_struct = struct.Struct(">qI")
+
+
+def _pack_default(value):
+    from sentry.event_manager import ScoreClause
+
+    if isinstance(value, datetime) and value.utcoffset() == timedelta(0):
+        delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+        seconds = delta.days * 86400 + delta.seconds
+        return msgpack.ExtType(EXT_DATETIME, _datetime_struct.pack(seconds, delta.microseconds))
+    elif isinstance(value, ScoreClause):
+        # The score is recomputed from the other columns when the buffer is
+        # processed, so there is nothing to carry over.
+        return msgpack.ExtType(EXT_SCORE, b"")
+    raise TypeError(type(value))
+
+
+def _unpack_ext_hook(code, data):
+    from sentry.event_manager import ScoreClause
+
+    if code == EXT_DATETIME:
+        seconds, microseconds = _datetime_struct.unpack(data)
+        return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(
+            seconds=seconds, microseconds=microseconds
+        )
+    elif code == EXT_SCORE:
+        return ScoreClause()
+    return msgpack.ExtType(code, data)
+
 
 class PendingBuffer:
     def __init__(self, size):
@@ -51,10 +92,13 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(self, pending_partitions=1, incr_batch_size=2, batch_process=False, **options):
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        # When enabled, ``process`` fetches all keys of a batch with one
+        # pipeline per host and coalesces the database updates.
+        self.batch_process = batch_process
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
 
@@ -142,6 +186,34 @@ class RedisBuffer(Buffer):
         else:
             raise TypeError(f"invalid type: {type_}")
 
+    def _dump_packed(self, value):
+        return (
+            PACKED_MARKER
+            + bytes([PACKED_VERSION])
+            + msgpack.packb(value, use_bin_type=True, default=_pack_default)
+        )
+
+    def _load_packed(self, payload):
+        version = payload[len(PACKED_MARKER)]
+        if version != PACKED_VERSION:
+            raise ValueError(f"unsupported buffer encoding version: {version}")
+        return msgpack.unpackb(
+            payload[len(PACKED_MARKER) + 1 :], raw=False, ext_hook=_unpack_ext_hook
+        )
+
+    def _dump_field(self, value):
+        """
+        Serializes a filter or extra value for storage in the buffer hash.
+        """
+        if options.get("buffer.msgpack-codec"):
+            try:
+                return self._dump_packed(value)
+            except (TypeError, ValueError, OverflowError):
+                # Values msgpack can't represent (model instances, naive
+                # datetimes, ...) keep using pickle.
+                pass
+        return pickle.dumps(value)
+
     def incr(self, model, columns, filters, extra=None, signal_only=None):
         """
         Increment the key by doing the following:
@@ -153,8 +225,6 @@ class RedisBuffer(Buffer):
         - Add hashmap key to pending flushes
         """
 
-        # TODO(dcramer): longer term we'd rather not have to serialize values
-        # here (unless it's to JSON)
         key = self._make_key(model, filters)
         pending_key = self._make_pending_key_from_key(key)
         # We can't use conn.map() due to wanting to support multiple pending
@@ -163,10 +233,7 @@ class RedisBuffer(Buffer):
 
         pipe = conn.pipeline()
         pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
-        # TODO(dcramer): once this goes live in production, we can kill the pickle path
-        # (this is to ensure a zero downtime deploy where we can transition event processing)
-        pipe.hsetnx(key, "f", pickle.dumps(filters))
-        # pipe.hsetnx(key, 'f', json.dumps(self._dump_values(filters)))
+        pipe.hsetnx(key, "f", self._dump_field(filters))
         for column, amount in columns.items():
             pipe.hincrby(key, "i+" + column, amount)
 
@@ -175,10 +242,7 @@ class RedisBuffer(Buffer):
             # hook here
             # e.g. "update score if last_seen or times_seen is changed"
             for column, value in extra.items():
-                # TODO(dcramer): once this goes live in production, we can kill the pickle path
-                # (this is to ensure a zero downtime deploy where we can transition event processing)
-                pipe.hset(key, "e+" + column, pickle.dumps(value))
-                # pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
+                pipe.hset(key, "e+" + column, self._dump_field(value))
 
         if signal_only is True:
             pipe.hset(key, "s", "1")
@@ -243,9 +307,113 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.batch_process and len(batch_keys) > 1:
+            self._process_batch_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
+    def _load_payload(self, values):
+        """
+        Decodes the hash stored by ``incr`` into the arguments of
+        ``Buffer.process``.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_text(k): v for k, v in values.items()}
+
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
+
+        if values["f"].startswith(PACKED_MARKER):
+            filters = self._load_packed(values.pop("f"))
+        elif values["f"].startswith(b"{"):
+            filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(values.pop("f"))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(PACKED_MARKER):
+                    extra_values[k[2:]] = self._load_packed(v)
+                elif v.startswith(b"["):
+                    extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
+
+    def _process_batch_incr(self, keys):
+        """
+        Like ``_process_single_incr``, but for many keys at once: locks are
+        taken and payloads are fetched with a single transaction per Redis host,
+        and the resulting updates are handed to ``Buffer.process_batch``.
+        """
+        lock_keys = {key: self._make_lock_key(key) for key in keys}
+        with self.cluster.map() as conn:
+            locks = {
+                key: conn.set(lock_key, "1", nx=True, ex=10) for key, lock_key in lock_keys.items()
+            }
+
+        locked = []
+        for key in keys:
+            if locks[key].value:
+                locked.append(key)
+            else:
+                metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+        if not locked:
+            return
+
+        try:
+            # Keys are grouped by the host owning them, so the pending set that
+            # is cleaned up is the one ``incr`` wrote to on that same host. Each
+            # host gets a transactional pipeline: an ``incr`` landing between
+            # the HGETALL and the DEL would otherwise be lost.
+            keys_by_host = {}
+            router = self.cluster.get_router()
+            for key in locked:
+                keys_by_host.setdefault(router.get_host_for_key(key), []).append(key)
+
+            results = {}
+            for host_id, host_keys in keys_by_host.items():
+                pipe = self.cluster.get_local_client(host_id).pipeline(transaction=True)
+                for key in host_keys:
+                    pipe.hgetall(key)
+                    pipe.zrem(self._make_pending_key_from_key(key), key)
+                    pipe.delete(key)
+                results.update(zip(host_keys, pipe.execute()[::3]))
+
+            pending = []
+            for key in locked:
+                values = results[key]
+                if not values:
+                    metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+                    self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+                    continue
+                pending.append(self._load_payload(values))
+
+            metrics.timing("buffer.batch-size", len(pending))
+            super().process_batch(pending)
+        finally:
+            with self.cluster.map() as conn:
+                for key in locked:
+                    conn.delete(lock_keys[key])
+
     def _process_single_incr(self, key):
         client = self.cluster.get_routing_client()
         lock_key = self._make_lock_key(key)
@@ -266,42 +434,11 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in values.items()}
-
             if not values:
                 metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
                 self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
                 return
 
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
-
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            super().process(model, incr_values, filters, extra_values, signal_only)
+            super().process(*self._load_payload(values))
         finally:
             client.delete(lock_key)
@@ -1330,6 +1330,14 @@ SENTRY_SOURCE_FETCH_TIMEOUT = 5
 # Timeout (in seconds) for socket operations when fetching remote source files
 SENTRY_SOURCE_FETCH_SOCKET_TIMEOUT = 2
 
+# Number of source files (e.g. JS) and source maps of an event that are fetched
+# concurrently. 1 fetches them one after the other.
+SENTRY_SOURCE_FETCH_CONCURRENCY = 1
+
+# Timeout (in seconds) for fetching all source files of an event when they are
+# fetched concurrently
+SENTRY_SOURCE_FETCH_EVENT_TIMEOUT = 30
+
 # Maximum content length for source files before we abort fetching
 SENTRY_SOURCE_FETCH_MAX_SIZE = 40 * 1024 * 1024
 
@@ -13,6 +13,14 @@ def load(options):
 DEFAULT_CODEC = {"path": "sentry.digests.codecs.CompressedPickleCodec"}
 
 
+def coalesce_records(items):
+    """
+    Remove all but the last record for each timeline and record key from a
+    sequence of ``(key, record)`` pairs.
+    """
+    return list({(key, record.key): (key, record) for key, record in items}.values())
+
+
 class InvalidState(Exception):
     """
     An error that is raised when an action cannot be performed on a
@@ -53,7 +61,17 @@ class Backend(Service):
     be transitioned to "waiting" instead.)
     """
 
-    __all__ = ("add", "delete", "digest", "enabled", "maintenance", "schedule", "validate")
+    __all__ = (
+        "add",
+        "add_many",
+        "delete",
+        "digest",
+        "enabled",
+        "maintenance",
+        "partitions",
+        "schedule",
+        "validate",
+    )
 
     def __init__(self, **options):
         # The ``minimum_delay`` option defines the default minimum amount of
@@ -121,6 +139,23 @@ class Backend(Service):
         """
         raise NotImplementedError
 
+    def add_many(self, items, increment_delay=None, maximum_delay=None):
+        """
+        Add records to multiple timelines at once.
+
+        ``items`` is a sequence of ``(key, record)`` pairs. If the same record
+        key is added to a timeline more than once, only the last record is
+        added, as if ``add`` had been called for each item in order.
+
+        The return value of this function is the set of timeline keys that are
+        ready for immediate digestion.
+        """
+        ready = set()
+        for key, record in coalesce_records(items):
+            if self.add(key, record, increment_delay=increment_delay, maximum_delay=maximum_delay):
+                ready.add(key)
+        return ready
+
     def digest(self, key, minimum_delay=None):
         """
         Extract records from a timeline for processing.
@@ -156,18 +191,30 @@ class Backend(Service):
         """
         raise NotImplementedError
 
-    def schedule(self, deadline):
+    def partitions(self):
+        """
+        Return the identifiers of the partitions of the schedule.
+
+        Each partition can be passed to ``schedule`` and ``maintenance`` to
+        process just that part of the schedule, which allows partitions to be
+        processed in parallel. Backends that do not partition their schedule
+        return a single ``None`` partition, which refers to the whole schedule.
+        """
+        return [None]
+
+    def schedule(self, deadline, partition=None):
         """
         Identify timelines that are ready for processing.
 
         This method moves all timelines that are ready to be digested from the
         waiting state to the ready state if their schedule time is prior to the
         deadline. This method returns an iterator of schedule entries that were
-        moved.
+        moved. If a partition is provided, only timelines in that partition are
+        considered.
         """
         raise NotImplementedError
 
-    def maintenance(self, deadline):
+    def maintenance(self, deadline, partition=None):
         """
         Identify timelines that appear to be stuck in the ready state.
 
@@ -204,6 +251,9 @@ class Backend(Service):
         frequency of maintenance tasks should be decreased, or the deadline
         should be pushed further towards the past (execution grace period
         increased) or both.
+
+        If a partition is provided, only timelines in that partition are
+        considered.
         """
         raise NotImplementedError
 
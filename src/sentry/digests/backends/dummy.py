@@ -7,6 +7,9 @@ class DummyBackend(Backend):
     def add(self, key, record, increment_delay=None, maximum_delay=None):
         pass
 
+    def add_many(self, items, increment_delay=None, maximum_delay=None):
+        return set()
+
     def enabled(self, project):
         return False
 
@@ -14,9 +17,9 @@ class DummyBackend(Backend):
     def digest(self, key, minimum_delay=None):
         yield []
 
-    def schedule(self, deadline):
+    def schedule(self, deadline, partition=None):
         return
         yield  # make this a generator
 
-    def maintenance(self, deadline):
+    def maintenance(self, deadline, partition=None):
         pass
@@ -1,11 +1,12 @@
 import logging
 import time
+from collections import defaultdict
 from contextlib import contextmanager
 
 from redis.client import ResponseError
 
 from sentry.digests import Record, ScheduleEntry
-from sentry.digests.backends.base import Backend, InvalidState
+from sentry.digests.backends.base import Backend, InvalidState, coalesce_records
 from sentry.utils.compat import map
 from sentry.utils.locking.backends.redis import RedisLockBackend
 from sentry.utils.locking.manager import LockManager
@@ -128,6 +129,47 @@ class RedisBackend(Backend):
             )
         )
 
+    def add_many(self, items, increment_delay=None, maximum_delay=None, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+
+        if increment_delay is None:
+            increment_delay = self.increment_delay
+
+        if maximum_delay is None:
+            maximum_delay = self.maximum_delay
+
+        # Records are added with one script call per host, rather than one
+        # call per timeline.
+        router = self.cluster.get_router()
+        partitions = defaultdict(list)
+        for key, record in coalesce_records(items):
+            partitions[router.get_host_for_key(f"{self.namespace}:t:{key}")].append((key, record))
+
+        ready = set()
+        for host, records in partitions.items():
+            arguments = [
+                "ADD_MANY",
+                self.namespace,
+                self.ttl,
+                timestamp,
+                increment_delay,
+                maximum_delay,
+                self.capacity if self.capacity else -1,
+                self.truncation_chance,
+            ]
+            for key, record in records:
+                arguments.extend(
+                    [key, record.key, self.codec.encode(record.value), record.timestamp]
+                )
+
+            response = script(
+                self.cluster.get_local_client(host), [key for key, _ in records], arguments
+            )
+            ready.update(key for (key, _), result in zip(records, response) if result)
+
+        return ready
+
     def __schedule_partition(self, host, deadline, timestamp):
         return script(
             self.cluster.get_local_client(host),
@@ -135,11 +177,17 @@ class RedisBackend(Backend):
             ["SCHEDULE", self.namespace, self.ttl, timestamp, deadline],
         )
 
-    def schedule(self, deadline, timestamp=None):
+    def partitions(self):
+        return list(self.cluster.hosts)
+
+    def __get_partition_hosts(self, partition):
+        return self.cluster.hosts if partition is None else [partition]
+
+    def schedule(self, deadline, timestamp=None, partition=None):
         if timestamp is None:
             timestamp = time.time()
 
-        for host in self.cluster.hosts:
+        for host in self.__get_partition_hosts(partition):
             try:
                 for key, timestamp in self.__schedule_partition(host, deadline, timestamp):
                     yield ScheduleEntry(key.decode("utf-8"), float(timestamp))
@@ -158,11 +206,11 @@ class RedisBackend(Backend):
             ["MAINTENANCE", self.namespace, self.ttl, timestamp, deadline],
         )
 
-    def maintenance(self, deadline, timestamp=None):
+    def maintenance(self, deadline, timestamp=None, partition=None):
         if timestamp is None:
             timestamp = time.time()
 
-        for host in self.cluster.hosts:
+        for host in self.__get_partition_hosts(partition):
             try:
                 self.__maintenance_partition(host, deadline, timestamp)
             except Exception as error:
@@ -1,3 +1,4 @@
+import copy
 import functools
 import itertools
 import logging
@@ -49,25 +50,71 @@ def event_to_record(event, rules):
 
 
 def fetch_state(project, records):
-    # This reads a little strange, but remember that records are returned in
-    # reverse chronological order, and we query the database in chronological
-    # order.
-    # NOTE: This doesn't account for any issues that are filtered out later.
-    start = records[-1].datetime
-    end = records[0].datetime
-
-    groups = Group.objects.in_bulk(record.value.event.group_id for record in records)
-    return {
-        "project": project,
-        "groups": groups,
-        "rules": Rule.objects.in_bulk(
-            itertools.chain.from_iterable(record.value.rules for record in records)
-        ),
-        "event_counts": tsdb.get_sums(tsdb.models.group, list(groups.keys()), start, end),
-        "user_counts": tsdb.get_distinct_counts_totals(
-            tsdb.models.users_affected_by_group, list(groups.keys()), start, end
-        ),
-    }
+    return fetch_states([(project, records)])[0]
+
+
+def fetch_states(digests):
+    """
+    Fetch the state required to build each of a sequence of ``(project,
+    records)`` pairs, returning the states in the same order.
+
+    Groups and rules are fetched with a single query each for all of the
+    digests, and TSDB is queried once for every distinct time window rather than
+    once per digest (digests for different targets of the same events share
+    their time windows.)
+    """
+    windows = []
+    for project, records in digests:
+        # This reads a little strange, but remember that records are returned in
+        # reverse chronological order, and we query the database in chronological
+        # order.
+        # NOTE: This doesn't account for any issues that are filtered out later.
+        windows.append((records[-1].datetime, records[0].datetime))
+
+    groups = Group.objects.in_bulk(
+        {record.value.event.group_id for project, records in digests for record in records}
+    )
+    rules = Rule.objects.in_bulk(
+        {rule for project, records in digests for record in records for rule in record.value.rules}
+    )
+
+    group_ids_by_window = defaultdict(set)
+    for (project, records), window in zip(digests, windows):
+        group_ids_by_window[window].update(
+            record.value.event.group_id
+            for record in records
+            if record.value.event.group_id in groups
+        )
+
+    event_counts = {}
+    user_counts = {}
+    for (start, end), group_ids in group_ids_by_window.items():
+        event_counts[(start, end)] = tsdb.get_sums(tsdb.models.group, list(group_ids), start, end)
+        user_counts[(start, end)] = tsdb.get_distinct_counts_totals(
+            tsdb.models.users_affected_by_group, list(group_ids), start, end
+        )
+
+    states = []
+    for (project, records), window in zip(digests, windows):
+        group_ids = {record.value.event.group_id for record in records} & groups.keys()
+        rule_ids = set(itertools.chain.from_iterable(record.value.rules for record in records))
+        states.append(
+            {
+                "project": project,
+                # Groups are copied since ``attach_state`` annotates them with
+                # counts that are specific to each digest.
+                "groups": {id: copy.copy(groups[id]) for id in group_ids},
+                "rules": {id: rules[id] for id in rule_ids if id in rules},
+                "event_counts": {
+                    id: count for id, count in event_counts[window].items() if id in group_ids
+                },
+                "user_counts": {
+                    id: count for id, count in user_counts[window].items() if id in group_ids
+                },
+            }
+        )
+
+    return states
 
 
 def attach_state(project, groups, rules, event_counts, user_counts):
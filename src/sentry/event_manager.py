@@ -3,18 +3,29 @@ import ipaddress
 import logging
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from io import BytesIO
 
 import sentry_sdk
 from django.conf import settings
 from django.core.cache import cache
-from django.db import IntegrityError, OperationalError, connection, router, transaction
+from django.db import IntegrityError, OperationalError, connection, connections, router, transaction
 from django.db.models import Func
 from django.utils.encoding import force_text
 from pytz import UTC
 
-from sentry import buffer, eventstore, eventstream, eventtypes, features, options, quotas, tsdb
+from sentry import (
+    buffer,
+    eventstore,
+    eventstream,
+    eventtypes,
+    features,
+    nodestore,
+    options,
+    quotas,
+    tsdb,
+)
 from sentry.attachments import MissingAttachmentChunks, attachment_cache
 from sentry.constants import (
     DEFAULT_STORE_NORMALIZER_ARGS,
@@ -81,6 +92,11 @@ from sentry.utils.safe import get_path, safe_execute, setdefault_path, trim
 
 logger = logging.getLogger("sentry.events")
 
+# Thread pool for writing events to nodestore in the background, see
+# `_nodestore_save_many_async`. Created lazily so that it is not inherited by
+# forked worker processes.
+_nodestore_executor = None
+
 SECURITY_REPORT_INTERFACES = ("csp", "hpkp", "expectct", "expectstaple")
 
 # Timeout for cached group crash report counts
@@ -473,7 +489,12 @@ class EventManager:
             old_bytes = job["event_metrics"].get(key) or 0
             job["event_metrics"][key] = old_bytes + attachment.size
 
-        _nodestore_save_many(jobs)
+        if options.get("store.nodestore-async-flush"):
+            nodestore_flush = _nodestore_save_many_async(jobs)
+        else:
+            _nodestore_save_many(jobs)
+            nodestore_flush = None
+
         save_unprocessed_event(project, job["event"].event_id)
 
         if job["release"]:
@@ -503,6 +524,11 @@ class EventManager:
         if is_reprocessed:
             safe_execute(delete_old_primary_hash, job["event"])
 
+        if nodestore_flush is not None:
+            # Post processing reads the event from nodestore, so the write has
+            # to be complete before the event is published.
+            nodestore_flush.result()
+
         _eventstream_insert_many(jobs)
 
         # Do this last to ensure signals get emitted even if connection to the
@@ -754,27 +780,33 @@ def _get_or_create_release_associated_models(jobs, projects):
 @metrics.wraps("save_event.tsdb_record_all_metrics")
 def _tsdb_record_all_metrics(jobs):
     """
-    Do all tsdb-related things for save_event in here s.t. we can potentially
-    put everything in a single redis pipeline someday.
+    Do all tsdb-related things for save_event in here s.t. they are sent to
+    redis in a single batch.
     """
 
     # XXX: validate whether anybody actually uses those metrics
 
-    for job in jobs:
-        incrs = []
-        frequencies = []
-        records = []
+    incrs = []
+    frequencies = []
+    records = []
 
-        incrs.append((tsdb.models.project, job["project_id"]))
+    for job in jobs:
         event = job["event"]
         group = job["group"]
         release = job["release"]
         environment = job["environment"]
+        options = {"timestamp": event.datetime, "environment_id": environment.id}
+
+        incrs.append((tsdb.models.project, job["project_id"], options))
 
         if group:
-            incrs.append((tsdb.models.group, group.id))
+            incrs.append((tsdb.models.group, group.id, options))
             frequencies.append(
-                (tsdb.models.frequent_environments_by_group, {group.id: {environment.id: 1}})
+                (
+                    tsdb.models.frequent_environments_by_group,
+                    {group.id: {environment.id: 1}},
+                    {"timestamp": event.datetime},
+                )
             )
 
             if release:
@@ -782,33 +814,31 @@ def _tsdb_record_all_metrics(jobs):
                     (
                         tsdb.models.frequent_releases_by_group,
                         {group.id: {job["grouprelease"].id: 1}},
+                        {"timestamp": event.datetime},
                     )
                 )
 
         if release:
-            incrs.append((tsdb.models.release, release.id))
+            incrs.append((tsdb.models.release, release.id, options))
 
         user = job["user"]
 
         if user:
             project_id = job["project_id"]
-            records.append((tsdb.models.users_affected_by_project, project_id, (user.tag_value,)))
+            records.append(
+                (tsdb.models.users_affected_by_project, project_id, (user.tag_value,), options)
+            )
 
             if group:
-                records.append((tsdb.models.users_affected_by_group, group.id, (user.tag_value,)))
-
-        if incrs:
-            tsdb.incr_multi(incrs, timestamp=event.datetime, environment_id=environment.id)
-
-        if records:
-            tsdb.record_multi(records, timestamp=event.datetime, environment_id=environment.id)
+                records.append(
+                    (tsdb.models.users_affected_by_group, group.id, (user.tag_value,), options)
+                )
 
-        if frequencies:
-            tsdb.record_frequency_multi(frequencies, timestamp=event.datetime)
+    tsdb.write_batch(incrs=incrs, records=records, frequencies=frequencies)
 
 
-@metrics.wraps("save_event.nodestore_save_many")
-def _nodestore_save_many(jobs):
+def _get_nodestore_items(jobs):
+    items = {}
     for job in jobs:
         # Write the event to Nodestore
         subkeys = {}
@@ -822,7 +852,45 @@ def _nodestore_save_many(jobs):
             if data is not None:
                 subkeys["unprocessed"] = data
 
-        job["event"].data.save(subkeys=subkeys)
+        node_data = job["event"].data
+        subkeys = node_data.get_subkeys_to_save(subkeys=subkeys)
+        if subkeys is not None:
+            items[node_data.id] = subkeys
+
+    return items
+
+
+@metrics.wraps("save_event.nodestore_save_many")
+def _nodestore_save_many(jobs):
+    items = _get_nodestore_items(jobs)
+    if items:
+        nodestore.set_subkeys_many(items)
+
+
+@metrics.wraps("save_event.nodestore_save_many_async")
+def _nodestore_save_many_async(jobs):
+    """
+    Like `_nodestore_save_many`, but writes to nodestore in a background thread
+    so that the write overlaps with the rest of `save`. Returns a future that
+    must be resolved before the events are published to the eventstream.
+    """
+    global _nodestore_executor
+    if _nodestore_executor is None:
+        _nodestore_executor = ThreadPoolExecutor(max_workers=1)
+
+    items = _get_nodestore_items(jobs)
+    return _nodestore_executor.submit(_nodestore_flush, items)
+
+
+@metrics.wraps("save_event.nodestore_flush")
+def _nodestore_flush(items):
+    try:
+        if items:
+            nodestore.set_subkeys_many(items)
+    finally:
+        # Connections are per thread and nothing else closes the ones of the
+        # executor's thread.
+        connections.close_all()
 
 
 @metrics.wraps("save_event.eventstream_insert_many")
@@ -970,12 +1038,41 @@ def get_culprit(data):
     )
 
 
-def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwargs):
-    project = event.project
+def _get_flat_grouphashes(project, hashes):
+    """
+    Returns the grouphashes for all flat hashes, creating missing ones.
+
+    For events without hierarchical hashes, the shared grouphash cache is
+    consulted first. If every hash is already known to belong to a group, the
+    database is skipped entirely. Returns a tuple of the grouphashes, the cache
+    generation to write back with (``None`` if the cache is not used) and
+    whether the grouphashes came from the cache.
+    """
+    generation = None
+
+    if not hashes.hierarchical_hashes and options.get("store.grouphash-cache"):
+        generation, cached_grouphashes = GroupHash.objects.get_many_from_hash_cache(
+            project.id, hashes.hashes
+        )
+
+        if all(hash in cached_grouphashes for hash in hashes.hashes):
+            metrics.incr("event_manager.grouphash_cache", tags={"outcome": "hit"})
+            return [cached_grouphashes[hash] for hash in hashes.hashes], generation, True
+
+        metrics.incr("event_manager.grouphash_cache", tags={"outcome": "miss"})
 
     flat_grouphashes = [
         GroupHash.objects.get_or_create(project=project, hash=hash)[0] for hash in hashes.hashes
     ]
+    return flat_grouphashes, generation, False
+
+
+def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwargs):
+    project = event.project
+
+    flat_grouphashes, hash_cache_generation, from_hash_cache = _get_flat_grouphashes(
+        project, hashes
+    )
 
     # The root_hierarchical_hash is the least specific hash within the tree, so
     # typically hierarchical_hashes[0], unless a hash `n` has been split in
@@ -1104,7 +1201,15 @@ def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwar
 
                 return group, is_new, is_regression
 
-    group = Group.objects.get(id=existing_grouphash.group_id)
+    try:
+        group = Group.objects.get(id=existing_grouphash.group_id)
+    except Group.DoesNotExist:
+        if not from_hash_cache:
+            raise
+
+        # The cache outlived the group, retry against the database.
+        GroupHash.objects.invalidate_hash_cache(project.id)
+        return _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwargs)
 
     is_new = False
 
@@ -1142,6 +1247,14 @@ def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwar
             state=GroupHash.State.LOCKED_IN_MIGRATION
         ).update(group=group)
 
+        for h in new_hashes:
+            h.group_id = group.id
+
+    if not from_hash_cache:
+        GroupHash.objects.set_many_in_hash_cache(
+            project.id, hash_cache_generation, flat_grouphashes
+        )
+
     is_regression = _process_existing_aggregate(
         group=group, event=event, data=kwargs, release=release
     )
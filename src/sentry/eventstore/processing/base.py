@@ -1,5 +1,5 @@
 from datetime import timedelta
-from typing import Any, Optional
+from typing import Any, List, Optional, Sequence
 
 import sentry_sdk
 
@@ -40,6 +40,22 @@ class EventProcessingStore:
             self.inner.set(key, event, self.timeout)
             return key
 
+    def store_many(self, events: Sequence[Event], unprocessed: bool = False) -> List[str]:
+        """
+        Store multiple events at once, returning their keys in the same
+        order. Backends that support batched writes do so in one round trip.
+        """
+        with sentry_sdk.start_span(op="eventstore.processing.store_many"):
+            items = []
+            for event in events:
+                key = cache_key_for_event(event)
+                if unprocessed:
+                    key = self.__get_unprocessed_key(key)
+                items.append((key, event))
+
+            self.inner.set_many(items, self.timeout)
+            return [key for key, _ in items]
+
     def get(self, key: str, unprocessed: bool = False) -> Optional[Event]:
         with sentry_sdk.start_span(op="eventstore.processing.get"):
             if unprocessed:
@@ -48,8 +64,7 @@ class EventProcessingStore:
 
     def delete_by_key(self, key: str) -> None:
         with sentry_sdk.start_span(op="eventstore.processing.delete_by_key"):
-            self.inner.delete(key)
-            self.inner.delete(self.__get_unprocessed_key(key))
+            self.inner.delete_many([key, self.__get_unprocessed_key(key)])
 
     def delete(self, event: Event) -> None:
         key = cache_key_for_event(event)
@@ -1,6 +1,7 @@
 import logging
 
-from sentry.tasks.post_process import post_process_group
+from sentry import options
+from sentry.tasks.post_process import get_post_process_envelope, post_process_group
 from sentry.utils.cache import cache_key_for_event
 from sentry.utils.services import Service
 
@@ -40,6 +41,7 @@ class EventStream(Service):
         is_new_group_environment,
         primary_hash,
         skip_consume=False,
+        producer=None,
     ):
         if skip_consume:
             logger.info("post_process.skip.raw_event", extra={"event_id": event.event_id})
@@ -47,14 +49,28 @@ class EventStream(Service):
             cache_key = cache_key_for_event(
                 {"project": event.project_id, "event_id": event.event_id}
             )
-            post_process_group.delay(
-                is_new=is_new,
-                is_regression=is_regression,
-                is_new_group_environment=is_new_group_environment,
-                primary_hash=primary_hash,
-                cache_key=cache_key,
-                group_id=event.group_id,
-            )
+            task_kwargs = {
+                "is_new": is_new,
+                "is_regression": is_regression,
+                "is_new_group_environment": is_new_group_environment,
+                "primary_hash": primary_hash,
+                "cache_key": cache_key,
+                "group_id": event.group_id,
+            }
+            if options.get("store.post-process-envelope"):
+                task_kwargs["envelope"] = get_post_process_envelope(event)
+
+            post_process_group.apply_async(kwargs=task_kwargs, producer=producer)
+
+    def _dispatch_post_process_group_tasks(self, tasks):
+        """
+        Dispatch a batch of post-processing tasks. All messages are published
+        through a single producer acquired from the broker connection pool,
+        so they do not each pay for acquiring a connection and channel.
+        """
+        with post_process_group.app.producer_or_acquire() as producer:
+            for task_kwargs in tasks:
+                self._dispatch_post_process_group_task(producer=producer, **task_kwargs)
 
     def insert(
         self,
@@ -116,6 +132,7 @@ class EventStream(Service):
         synchronize_commit_group,
         commit_batch_size=100,
         initial_offset_reset="latest",
+        batch_size=1,
     ):
         assert not self.requires_post_process_forwarder()
         raise ForwarderNotRequired
@@ -78,6 +78,7 @@ class KafkaEventStream(SnubaProtocolEventStream):
         synchronize_commit_group,
         commit_batch_size=100,
         initial_offset_reset="latest",
+        batch_size=1,
     ):
         logger.debug("Starting post-process forwarder...")
 
@@ -192,12 +193,7 @@ class KafkaEventStream(SnubaProtocolEventStream):
         signal.signal(signal.SIGINT, handle_shutdown_request)
         signal.signal(signal.SIGTERM, handle_shutdown_request)
 
-        i = 0
-        while not shutdown_requested:
-            message = consumer.poll(0.1)
-            if message is None:
-                continue
-
+        def get_task_kwargs(message):
             error = message.error()
             if error is not None:
                 raise Exception(error)
@@ -205,22 +201,66 @@ class KafkaEventStream(SnubaProtocolEventStream):
             key = (message.topic(), message.partition())
             if key not in owned_partition_offsets:
                 logger.warning("Skipping message for unowned partition: %r", key)
-                continue
+                return None, False
 
-            i = i + 1
             owned_partition_offsets[key] = message.offset() + 1
 
             with metrics.timer("eventstream.duration", instance="get_task_kwargs_for_message"):
-                task_kwargs = get_task_kwargs_for_message(message.value())
+                return get_task_kwargs_for_message(message.value()), True
+
+        def run_batched():
+            uncommitted = 0
+            while not shutdown_requested:
+                tasks = []
+                for message in consumer.consume(batch_size, 0.1):
+                    task_kwargs, owned = get_task_kwargs(message)
+                    if not owned:
+                        continue
+
+                    uncommitted += 1
+
+                    if task_kwargs is not None:
+                        tasks.append(task_kwargs)
+
+                if tasks:
+                    metrics.timing("eventstream.post_process_batch_size", len(tasks))
+                    with metrics.timer(
+                        "eventstream.duration", instance="dispatch_post_process_group_tasks"
+                    ):
+                        self._dispatch_post_process_group_tasks(tasks)
+
+                # Offsets are only committed once every task of the batch has
+                # been dispatched.
+                if uncommitted >= commit_batch_size:
+                    commit_offsets()
+                    uncommitted = 0
+
+        def run():
+            i = 0
+            while not shutdown_requested:
+                message = consumer.poll(0.1)
+                if message is None:
+                    continue
+
+                task_kwargs, owned = get_task_kwargs(message)
+                if not owned:
+                    continue
+
+                i = i + 1
+
+                if task_kwargs is not None:
+                    with metrics.timer(
+                        "eventstream.duration", instance="dispatch_post_process_group_task"
+                    ):
+                        self._dispatch_post_process_group_task(**task_kwargs)
 
-            if task_kwargs is not None:
-                with metrics.timer(
-                    "eventstream.duration", instance="dispatch_post_process_group_task"
-                ):
-                    self._dispatch_post_process_group_task(**task_kwargs)
+                if i % commit_batch_size == 0:
+                    commit_offsets()
 
-            if i % commit_batch_size == 0:
-                commit_offsets()
+        if batch_size > 1:
+            run_batched()
+        else:
+            run()
 
         logger.debug("Committing offsets and closing consumer...")
         commit_offsets()
@@ -14,6 +14,8 @@ from confluent_kafka import (
 )
 
 from sentry.eventstream.kafka.state import (
+    InvalidState,
+    MessageNotReady,
     SynchronizedPartitionState,
     SynchronizedPartitionStateManager,
 )
@@ -344,6 +346,54 @@ class SynchronizedConsumer:
 
         return message
 
+    def consume(self, num_messages, timeout):
+        """
+        Consume a batch of up to ``num_messages`` messages.
+
+        The local consumer may have prefetched messages past the remote
+        offset of a partition before the partition is paused. Once a partition
+        catches up with the remote consumer within a batch, its remaining
+        messages are dropped from the batch and the partition is rewound, so
+        that they are consumed again after the partition has been resumed.
+        """
+        self.__check_commit_log_consumer_running()
+
+        messages = []
+        consumed_partitions = set()
+        rewound_partitions = set()
+
+        for message in self.__consumer.consume(num_messages, timeout):
+            if message.error() is not None:
+                messages.append(message)
+                continue
+
+            key = (message.topic(), message.partition())
+            if key in rewound_partitions:
+                continue
+
+            try:
+                self.__partition_state_manager.validate_local_message(
+                    message.topic(), message.partition(), message.offset()
+                )
+            except (InvalidState, MessageNotReady):
+                if key not in consumed_partitions:
+                    raise
+
+                self.__consumer.seek(
+                    TopicPartition(message.topic(), message.partition(), message.offset())
+                )
+                rewound_partitions.add(key)
+                continue
+
+            self.__partition_state_manager.set_local_offset(
+                message.topic(), message.partition(), message.offset() + 1
+            )
+            self.__positions[key] = message.offset() + 1
+            consumed_partitions.add(key)
+            messages.append(message)
+
+        return messages
+
     def commit(self, *args, **kwargs):
         self.__check_commit_log_consumer_running()
 
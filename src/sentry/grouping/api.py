@@ -19,9 +19,14 @@ from sentry.grouping.variants import (
     FallbackVariant,
     SaltedComponentVariant,
 )
+from sentry.utils.cache import LRUCache
 
 HASH_RE = re.compile(r"^[0-9a-f]{32}$")
 
+# Parsed fingerprinting rules shared by all events processed in this process,
+# keyed by the hash of the rules. Changing the project option changes the key.
+_fingerprinting_rules_cache = LRUCache(maxsize=1000)
+
 
 class GroupingConfigNotFound(LookupError):
     pass
@@ -162,15 +167,22 @@ def get_fingerprinting_config_for_project(project):
     from sentry.utils.hashlib import md5_text
 
     cache_key = "fingerprinting-rules:" + md5_text(rules).hexdigest()
+    rv = _fingerprinting_rules_cache.get(cache_key)
+    if rv is not None:
+        return rv
+
     rv = cache.get(cache_key)
     if rv is not None:
-        return FingerprintingRules.from_json(rv)
+        rv = FingerprintingRules.from_json(rv)
+        _fingerprinting_rules_cache.set(cache_key, rv)
+        return rv
 
     try:
         rv = FingerprintingRules.from_config_string(rules)
     except InvalidFingerprintingConfig:
         rv = FingerprintingRules([])
     cache.set(cache_key, rv.to_json())
+    _fingerprinting_rules_cache.set(cache_key, rv)
     return rv
 
 
@@ -1,6 +1,7 @@
 import base64
 import os
 import zlib
+from collections import defaultdict
 
 import msgpack
 from parsimonious.exceptions import ParseError
@@ -8,6 +9,7 @@ from parsimonious.grammar import Grammar, NodeVisitor
 
 from sentry import projectoptions
 from sentry.grouping.component import GroupingComponent
+from sentry.utils.cache import LRUCache
 from sentry.utils.strings import unescape_string
 
 from .actions import Action, FlagAction, VarAction
@@ -16,7 +18,9 @@ from .matchers import (
     CalleeMatch,
     CallerMatch,
     ExceptionFieldMatch,
+    FamilyMatch,
     FrameMatch,
+    LiteralPrefixMixin,
     Match,
     create_match_frame,
 )
@@ -70,6 +74,10 @@ _        = space*
 VERSIONS = [1, 2]
 LATEST_VERSION = VERSIONS[-1]
 
+# Decoded enhancements shared by all events processed in this process, keyed
+# by their serialized form (see ``Enhancements.loads_cached``).
+_enhancements_cache = LRUCache(maxsize=1000)
+
 
 class StacktraceState:
     def __init__(self):
@@ -96,6 +104,47 @@ class StacktraceState:
         return f"{hint} by stack trace rule ({description})"
 
 
+# Match frame fields that are never changed by modifier actions. Frames can be
+# indexed by their values up front.
+IMMUTABLE_MATCH_FIELDS = ("family", "function", "module")
+
+
+class MatchFrameIndex:
+    """
+    Index of the match frames of a single stacktrace, used to only test a rule
+    against frames it could possibly match (see ``Rule.get_candidate_frames``).
+    """
+
+    def __init__(self, match_frames):
+        self.frames = match_frames
+        self._all = range(len(match_frames))
+        self._by_value = {}
+
+    def _get_bucket(self, field, value):
+        by_value = self._by_value.get(field)
+        if by_value is None:
+            by_value = self._by_value[field] = defaultdict(list)
+            for idx, frame in enumerate(self.frames):
+                by_value[frame[field]].append(idx)
+        return by_value.get(value, ())
+
+    def get_candidates(self, rule):
+        candidates = None
+
+        if rule._families is not None:
+            candidates = set()
+            for family in rule._families:
+                candidates.update(self._get_bucket("family", family))
+
+        for field, literal in rule._literals:
+            bucket = self._get_bucket(field, literal)
+            candidates = set(bucket) if candidates is None else candidates.intersection(bucket)
+
+        if candidates is None:
+            return self._all
+        return sorted(candidates)
+
+
 class Enhancements:
 
     # NOTE: You must add a version to ``VERSIONS`` any time attributes are added
@@ -124,10 +173,11 @@ class Enhancements:
         cache = {}
 
         match_frames = [create_match_frame(frame, platform) for frame in frames]
+        index = MatchFrameIndex(match_frames)
 
         for rule in self._modifier_rules:
             for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
+                match_frames, platform, exception_data, cache, index=index
             ):
                 action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
 
@@ -136,13 +186,14 @@ class Enhancements:
         cache = {}
 
         match_frames = [create_match_frame(frame, platform) for frame in frames]
+        index = MatchFrameIndex(match_frames)
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
         for rule in self._updater_rules:
 
             for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
+                match_frames, platform, exception_data, cache, index=index
             ):
                 action.update_frame_components_contributions(components, frames, idx, rule=rule)
                 action.modify_stacktrace_state(stacktrace_state, rule)
@@ -259,6 +310,18 @@ class Enhancements:
         except (LookupError, AttributeError, TypeError, ValueError) as e:
             raise ValueError("invalid stack trace rule config: %s" % e)
 
+    @classmethod
+    def loads_cached(cls, data):
+        """Like ``loads``, but returns a shared instance for configs that were
+        already loaded by this process. The returned object must not be
+        modified.
+        """
+        rv = _enhancements_cache.get(data)
+        if rv is None:
+            rv = cls.loads(data)
+            _enhancements_cache.set(data, rv)
+        return rv
+
     @classmethod
     def from_config_string(self, s, bases=None, id=None):
         try:
@@ -288,6 +351,35 @@ class Rule:
         self.actions = actions
         self._is_updater = any(action.is_updater for action in actions)
         self._is_modifier = any(action.is_modifier for action in actions)
+        self._compile_frame_filters()
+
+    def _compile_frame_filters(self):
+        """Derives cheap necessary conditions for a frame to match this rule
+        from its (non-negated) frame matchers:
+
+        * ``_families``: the frame's family must be one of these
+        * ``_literals``: immutable fields that must be equal to a literal
+        * ``_prefixes``: fields that must start with a literal prefix
+        """
+        self._families = None
+        self._literals = []
+        self._prefixes = []
+
+        for matcher in self._other_matchers:
+            if not isinstance(matcher, FrameMatch) or matcher.negated:
+                continue
+
+            if isinstance(matcher, FamilyMatch):
+                if b"all" not in matcher._flags:
+                    if self._families is None:
+                        self._families = frozenset(matcher._flags)
+                    else:
+                        self._families &= matcher._flags
+            elif isinstance(matcher, LiteralPrefixMixin) and matcher._literal_prefix:
+                if matcher._is_literal and matcher.field in IMMUTABLE_MATCH_FIELDS:
+                    self._literals.append((matcher.field, matcher._literal_prefix))
+                else:
+                    self._prefixes.append((matcher.field, matcher._literal_prefix))
 
     @property
     def matcher_description(self):
@@ -312,9 +404,14 @@ class Rule:
             matchers[matcher.key] = matcher.pattern
         return {"match": matchers, "actions": [str(x) for x in self.actions]}
 
-    def get_matching_frame_actions(self, frames, platform, exception_data=None, cache=None):
+    def get_matching_frame_actions(
+        self, frames, platform, exception_data=None, cache=None, index=None
+    ):
         """Given a frame returns all the matching actions based on this rule.
         If the rule does not match `None` is returned.
+
+        ``index`` is an optional ``MatchFrameIndex`` of ``frames`` that is used
+        to skip frames that cannot match.
         """
         if not self.matchers:
             return []
@@ -326,8 +423,18 @@ class Rule:
 
         rv = []
 
+        if index is None:
+            index = MatchFrameIndex(frames)
+
         # 2 - Check if frame matchers match
-        for idx, frame in enumerate(frames):
+        for idx in index.get_candidates(self):
+            frame = frames[idx]
+            if not all(
+                frame[field] is not None and frame[field].startswith(prefix)
+                for field, prefix in self._prefixes
+            ):
+                continue
+
             if all(
                 m.matches_frame(frames, idx, platform, exception_data, cache)
                 for m in self._other_matchers
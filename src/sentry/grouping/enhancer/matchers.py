@@ -25,6 +25,10 @@ SHORT_MATCH_KEYS = {v: k for k, v in MATCH_KEYS.items()}
 
 assert len(SHORT_MATCH_KEYS) == len(MATCH_KEYS)  # assert short key names are not reused
 
+# Characters with a special meaning in glob patterns. Everything in front of
+# the first of these is a literal prefix every matching value must start with.
+GLOB_SPECIAL_CHARS = frozenset(b"*?[]{}!\\")
+
 FAMILIES = {"native": "N", "javascript": "J", "all": "a"}
 REVERSE_FAMILIES = {v: k for k, v in FAMILIES.items()}
 
@@ -50,6 +54,14 @@ MATCHERS = {
 }
 
 
+def get_literal_prefix(pattern: bytes) -> bytes:
+    """Returns the literal prefix of an (encoded) glob pattern."""
+    for idx, char in enumerate(pattern):
+        if char in GLOB_SPECIAL_CHARS:
+            return pattern[:idx]
+    return pattern
+
+
 def _get_function_name(frame_data: dict, platform: Optional[str]):
 
     function_name = get_function_name_for_frame(frame_data, platform)
@@ -240,13 +252,29 @@ class InAppMatch(FrameMatch):
         return ref_val is not None and ref_val == match_frame["in_app"]
 
 
-class FunctionMatch(FrameMatch):
+class LiteralPrefixMixin:
+    """
+    Matchers using plain ``glob_match`` on a frame field can only match values
+    starting with the literal prefix of their pattern. This is used to skip
+    frames without evaluating the glob (see ``Rule``).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._literal_prefix = get_literal_prefix(self._encoded_pattern)
+        self._is_literal = self._literal_prefix == self._encoded_pattern
+
+
+class FunctionMatch(LiteralPrefixMixin, FrameMatch):
+
+    field = "function"
+
     def _positive_frame_match(self, match_frame, platform, exception_data, cache):
 
         return cached(cache, glob_match, match_frame["function"], self._encoded_pattern)
 
 
-class FrameFieldMatch(FrameMatch):
+class FrameFieldMatch(LiteralPrefixMixin, FrameMatch):
     def _positive_frame_match(self, match_frame, platform, exception_data, cache):
         field = match_frame[self.field]
         if field is None:
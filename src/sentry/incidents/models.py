@@ -84,6 +84,52 @@ class IncidentManager(BaseManager):
 
         return incident
 
+    def get_active_incidents(self, alert_rule_projects):
+        """
+        Fetches the active incidents for multiple ``(alert_rule, project)`` pairs,
+        keyed by ``(alert_rule_id, project_id)``. Pairs without an active incident are
+        omitted. Attempts to fetch from cache then hits the database once for all of
+        the misses.
+        """
+        cache_keys = {
+            self._build_active_incident_cache_key(alert_rule.id, project.id): (
+                alert_rule.id,
+                project.id,
+            )
+            for alert_rule, project in alert_rule_projects
+        }
+        cached = cache.get_many(list(cache_keys))
+        incidents = {
+            cache_keys[cache_key]: incident for cache_key, incident in cached.items() if incident
+        }
+
+        missing = {
+            pair: cache_key for cache_key, pair in cache_keys.items() if cache_key not in cached
+        }
+        if missing:
+            incident_projects = (
+                IncidentProject.objects.filter(
+                    incident__type=IncidentType.ALERT_TRIGGERED.value,
+                    incident__alert_rule_id__in={alert_rule_id for alert_rule_id, _ in missing},
+                    project_id__in={project_id for _, project_id in missing},
+                )
+                .exclude(incident__status=IncidentStatus.CLOSED.value)
+                .select_related("incident")
+                .order_by("-incident__date_added")
+            )
+            for incident_project in incident_projects:
+                pair = (incident_project.incident.alert_rule_id, incident_project.project_id)
+                if pair in missing and pair not in incidents:
+                    incidents[pair] = incident_project.incident
+
+            # Pairs without an active incident are stored as False so that we have a
+            # negative cache as well.
+            cache.set_many(
+                {cache_key: incidents.get(pair, False) for pair, cache_key in missing.items()}
+            )
+
+        return incidents
+
     @classmethod
     def clear_active_incident_cache(cls, instance, **kwargs):
         for project in instance.projects.all():
@@ -335,6 +381,44 @@ class AlertRuleManager(BaseManager):
 
         return alert_rule
 
+    def get_for_subscriptions(self, subscriptions):
+        """
+        Fetches the AlertRules associated with multiple Subscriptions, keyed by
+        subscription id. Subscriptions without an AlertRule are omitted. Attempts to
+        fetch from cache then hits the database once for all of the misses.
+        """
+        cache_keys = {
+            self.__build_subscription_cache_key(subscription.id): subscription
+            for subscription in subscriptions
+        }
+        cached = cache.get_many(list(cache_keys))
+        alert_rules = {
+            cache_keys[cache_key].id: alert_rule for cache_key, alert_rule in cached.items()
+        }
+
+        missing = {
+            cache_key: subscription
+            for cache_key, subscription in cache_keys.items()
+            if cache_key not in cached
+        }
+        if missing:
+            snuba_query_alert_rules = {
+                alert_rule.snuba_query_id: alert_rule
+                for alert_rule in self.filter(
+                    snuba_query_id__in={
+                        subscription.snuba_query_id for subscription in missing.values()
+                    }
+                )
+            }
+            to_cache = {}
+            for cache_key, subscription in missing.items():
+                alert_rule = snuba_query_alert_rules.get(subscription.snuba_query_id)
+                if alert_rule is not None:
+                    alert_rules[subscription.id] = to_cache[cache_key] = alert_rule
+            cache.set_many(to_cache, 3600)
+
+        return alert_rules
+
     @classmethod
     def clear_subscription_cache(cls, instance, **kwargs):
         cache.delete(cls.__build_subscription_cache_key(instance.id))
@@ -482,6 +566,39 @@ class AlertRuleTriggerManager(BaseManager):
             cache.set(cache_key, triggers, 3600)
         return triggers
 
+    def get_for_alert_rules(self, alert_rules):
+        """
+        Fetches the AlertRuleTriggers associated with multiple AlertRules, keyed by
+        alert rule id. Attempts to fetch from cache then hits the database once for
+        all of the misses.
+        """
+        cache_keys = {
+            self._build_trigger_cache_key(alert_rule.id): alert_rule.id
+            for alert_rule in alert_rules
+        }
+        cached = cache.get_many(list(cache_keys))
+        triggers = {cache_keys[cache_key]: value for cache_key, value in cached.items()}
+
+        missing = [
+            alert_rule_id
+            for cache_key, alert_rule_id in cache_keys.items()
+            if cache_key not in cached
+        ]
+        if missing:
+            for alert_rule_id in missing:
+                triggers[alert_rule_id] = []
+            for trigger in self.filter(alert_rule_id__in=missing):
+                triggers[trigger.alert_rule_id].append(trigger)
+            cache.set_many(
+                {
+                    self._build_trigger_cache_key(alert_rule_id): triggers[alert_rule_id]
+                    for alert_rule_id in missing
+                },
+                3600,
+            )
+
+        return triggers
+
     @classmethod
     def clear_trigger_cache(cls, instance, **kwargs):
         cache.delete(cls._build_trigger_cache_key(instance.alert_rule_id))
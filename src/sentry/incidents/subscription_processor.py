@@ -27,7 +27,7 @@ from sentry.incidents.models import (
     TriggerStatus,
 )
 from sentry.incidents.tasks import handle_trigger_action
-from sentry.models import Project
+from sentry.models import Organization, Project
 from sentry.utils import metrics, redis
 from sentry.utils.compat import zip
 from sentry.utils.dates import to_datetime, to_timestamp
@@ -55,21 +55,32 @@ class SubscriptionProcessor:
         AlertRuleThresholdType.BELOW: (operator.lt, operator.gt),
     }
 
-    def __init__(self, subscription):
+    def __init__(self, subscription, alert_rule=None, triggers=None, alert_rule_stats=None):
+        """
+        The alert rule, its triggers and the alert rule stats are fetched unless they
+        were already loaded in bulk, see `process_updates`.
+        """
         self.subscription = subscription
-        try:
-            self.alert_rule = AlertRule.objects.get_for_subscription(subscription)
-        except AlertRule.DoesNotExist:
-            return
-
-        self.triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
-        self.triggers.sort(key=lambda trigger: trigger.alert_threshold)
-
+        if alert_rule is None:
+            try:
+                alert_rule = AlertRule.objects.get_for_subscription(subscription)
+            except AlertRule.DoesNotExist:
+                return
+        self.alert_rule = alert_rule
+
+        if triggers is None:
+            triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
+        self.triggers = sorted(triggers, key=lambda trigger: trigger.alert_threshold)
+
+        if alert_rule_stats is None:
+            alert_rule_stats = get_alert_rule_stats(
+                self.alert_rule, self.subscription, self.triggers
+            )
         (
             self.last_update,
             self.trigger_alert_counts,
             self.trigger_resolve_counts,
-        ) = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
+        ) = alert_rule_stats
         self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
         self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
 
@@ -140,7 +151,32 @@ class SubscriptionProcessor:
 
         return trigger.alert_threshold + resolve_add
 
-    def process_update(self, subscription_update):
+    def changes_trigger_state(self, aggregation_value, alert_operator, resolve_operator):
+        """
+        Determines whether processing an aggregation value will fire or resolve any
+        trigger. Nothing is written to the database otherwise, so we can skip opening
+        a transaction for the majority of updates.
+        :return: True if a trigger will fire or resolve, otherwise False
+        """
+        # Triggers only affect each other once one of them fires or resolves, so
+        # checking each of them against the current state is enough.
+        for trigger in self.triggers:
+            if (
+                alert_operator(aggregation_value, trigger.alert_threshold)
+                and not self.check_trigger_status(trigger, TriggerStatus.ACTIVE)
+                and self.trigger_alert_counts[trigger.id] + 1 >= self.alert_rule.threshold_period
+            ):
+                return True
+            if (
+                resolve_operator(aggregation_value, self.calculate_resolve_threshold(trigger))
+                and self.active_incident
+                and self.check_trigger_status(trigger, TriggerStatus.ACTIVE)
+                and self.trigger_resolve_counts[trigger.id] + 1 >= self.alert_rule.threshold_period
+            ):
+                return True
+        return False
+
+    def process_update(self, subscription_update, update_stats=True):
         dataset = self.subscription.snuba_query.dataset
         try:
             # Check that the project exists
@@ -196,40 +232,52 @@ class SubscriptionProcessor:
         alert_operator, resolve_operator = self.THRESHOLD_TYPE_OPERATORS[
             AlertRuleThresholdType(self.alert_rule.threshold_type)
         ]
-        fired_incident_triggers = []
-        with transaction.atomic():
-            for trigger in self.triggers:
-                if alert_operator(
-                    aggregation_value, trigger.alert_threshold
-                ) and not self.check_trigger_status(trigger, TriggerStatus.ACTIVE):
-                    metrics.incr("incidents.alert_rules.threshold", tags={"type": "alert"})
-                    incident_trigger = self.trigger_alert_threshold(trigger, aggregation_value)
-                    if incident_trigger is not None:
-                        fired_incident_triggers.append(incident_trigger)
-                else:
-                    self.trigger_alert_counts[trigger.id] = 0
-
-                if (
-                    resolve_operator(aggregation_value, self.calculate_resolve_threshold(trigger))
-                    and self.active_incident
-                    and self.check_trigger_status(trigger, TriggerStatus.ACTIVE)
-                ):
-                    metrics.incr("incidents.alert_rules.threshold", tags={"type": "resolve"})
-                    incident_trigger = self.trigger_resolve_threshold(trigger, aggregation_value)
-                    if incident_trigger is not None:
-                        fired_incident_triggers.append(incident_trigger)
-                else:
-                    self.trigger_resolve_counts[trigger.id] = 0
-
-            if fired_incident_triggers:
-                self.handle_trigger_actions(fired_incident_triggers, aggregation_value)
+        if self.changes_trigger_state(aggregation_value, alert_operator, resolve_operator):
+            with transaction.atomic():
+                self.process_triggers(aggregation_value, alert_operator, resolve_operator)
+        else:
+            # Only the counts in Redis change, so there's no need for a transaction
+            self.process_triggers(aggregation_value, alert_operator, resolve_operator)
 
         # We update the rule stats here after we commit the transaction. This guarantees
         # that we'll never miss an update, since we'll never roll back if the process
         # is killed here. The trade-off is that we might process an update twice. Mostly
         # this will have no effect, but if someone manages to close a triggered incident
         # before the next one then we might alert twice.
-        self.update_alert_rule_stats()
+        if update_stats:
+            self.update_alert_rule_stats()
+
+    def process_triggers(self, aggregation_value, alert_operator, resolve_operator):
+        """
+        Checks each trigger against the aggregation value, updating the trigger counts
+        and firing or resolving triggers as needed.
+        """
+        fired_incident_triggers = []
+        for trigger in self.triggers:
+            if alert_operator(
+                aggregation_value, trigger.alert_threshold
+            ) and not self.check_trigger_status(trigger, TriggerStatus.ACTIVE):
+                metrics.incr("incidents.alert_rules.threshold", tags={"type": "alert"})
+                incident_trigger = self.trigger_alert_threshold(trigger, aggregation_value)
+                if incident_trigger is not None:
+                    fired_incident_triggers.append(incident_trigger)
+            else:
+                self.trigger_alert_counts[trigger.id] = 0
+
+            if (
+                resolve_operator(aggregation_value, self.calculate_resolve_threshold(trigger))
+                and self.active_incident
+                and self.check_trigger_status(trigger, TriggerStatus.ACTIVE)
+            ):
+                metrics.incr("incidents.alert_rules.threshold", tags={"type": "resolve"})
+                incident_trigger = self.trigger_resolve_threshold(trigger, aggregation_value)
+                if incident_trigger is not None:
+                    fired_incident_triggers.append(incident_trigger)
+            else:
+                self.trigger_resolve_counts[trigger.id] = 0
+
+        if fired_incident_triggers:
+            self.handle_trigger_actions(fired_incident_triggers, aggregation_value)
 
     def calculate_event_date_from_update_date(self, update_date):
         """
@@ -384,9 +432,11 @@ class SubscriptionProcessor:
                     status_method=IncidentStatusMethod.RULE_TRIGGERED,
                 )
 
-    def update_alert_rule_stats(self):
+    def update_alert_rule_stats(self, pipeline=None):
         """
         Updates stats about the alert rule, if they're changed.
+        :param pipeline: A Redis pipeline to add the updates to. If not passed, the
+        updates are written immediately.
         :return:
         """
         updated_trigger_alert_counts = {
@@ -406,9 +456,87 @@ class SubscriptionProcessor:
             self.last_update,
             updated_trigger_alert_counts,
             updated_trigger_resolve_counts,
+            pipeline=pipeline,
         )
 
 
+def process_updates(updates):
+    """
+    Processes a batch of subscription updates. The subscriptions' projects, alert
+    rules, triggers and active incidents are fetched in bulk, the alert rule stats
+    are read and written with a single Redis pipeline each, and updates for the same
+    subscription are processed in order by a single `SubscriptionProcessor`.
+    :param updates: A list of ``(subscription_update, subscription)`` pairs
+    """
+    subscriptions = {subscription.id: subscription for _, subscription in updates}
+
+    projects = {
+        project.id: project
+        for project in Project.objects.get_many_from_cache(
+            {subscription.project_id for subscription in subscriptions.values()}
+        )
+    }
+    organizations = {
+        organization.id: organization
+        for organization in Organization.objects.get_many_from_cache(
+            {project.organization_id for project in projects.values()}
+        )
+    }
+    for project in projects.values():
+        if project.organization_id in organizations:
+            project._organization_cache = organizations[project.organization_id]
+    for subscription in subscriptions.values():
+        if subscription.project_id in projects:
+            subscription.project = projects[subscription.project_id]
+
+    alert_rules = AlertRule.objects.get_for_subscriptions(subscriptions.values())
+    triggers = AlertRuleTrigger.objects.get_for_alert_rules(alert_rules.values())
+    active_incidents = Incident.objects.get_active_incidents(
+        [
+            (alert_rule, projects[subscriptions[subscription_id].project_id])
+            for subscription_id, alert_rule in alert_rules.items()
+            if subscriptions[subscription_id].project_id in projects
+        ]
+    )
+    alert_rule_stats = get_alert_rule_stats_many(
+        [
+            (alert_rule, subscriptions[subscription_id], triggers[alert_rule.id])
+            for subscription_id, alert_rule in alert_rules.items()
+        ]
+    )
+
+    processors = {}
+    for (subscription_id, alert_rule), stats in zip(alert_rules.items(), alert_rule_stats):
+        subscription = subscriptions[subscription_id]
+        processor = SubscriptionProcessor(
+            subscription,
+            alert_rule=alert_rule,
+            triggers=triggers[alert_rule.id],
+            alert_rule_stats=stats,
+        )
+        processor.active_incident = active_incidents.get((alert_rule.id, subscription.project_id))
+        processors[subscription_id] = processor
+
+    last_updates = {
+        subscription_id: processor.last_update for subscription_id, processor in processors.items()
+    }
+    for subscription_update, subscription in updates:
+        processor = processors.get(subscription.id)
+        if processor is None:
+            # The subscription has no alert rule, which the processor reports
+            SubscriptionProcessor(subscription).process_update(subscription_update)
+            continue
+        processor.process_update(subscription_update, update_stats=False)
+
+    # As with single updates, the stats are only written once all of the
+    # transactions have been committed.
+    pipeline = get_redis_client().pipeline()
+    for subscription_id, processor in processors.items():
+        if processor.last_update != last_updates[subscription_id]:
+            processor.update_alert_rule_stats(pipeline=pipeline)
+    pipeline.execute()
+
+
 def build_alert_rule_stat_keys(alert_rule, subscription):
     """
     Builds keys for fetching stats about alert rules
@@ -463,6 +591,33 @@ def get_alert_rule_stats(alert_rule, subscription, triggers):
     alert_rule_keys = build_alert_rule_stat_keys(alert_rule, subscription)
     trigger_keys = build_trigger_stat_keys(alert_rule, subscription, triggers)
     results = get_redis_client().mget(alert_rule_keys + trigger_keys)
+    return parse_alert_rule_stats(triggers, results)
+
+
+def get_alert_rule_stats_many(items):
+    """
+    Fetches stats about multiple alert rules with a single Redis pipeline.
+    :param items: A list of ``(alert_rule, subscription, triggers)`` tuples
+    :return: A list containing a tuple of stats for each item, as returned by
+    `get_alert_rule_stats`
+    """
+    pipeline = get_redis_client().pipeline()
+    for alert_rule, subscription, triggers in items:
+        keys = build_alert_rule_stat_keys(alert_rule, subscription) + build_trigger_stat_keys(
+            alert_rule, subscription, triggers
+        )
+        for key in keys:
+            pipeline.get(key)
+    results = iter(pipeline.execute())
+
+    stats = []
+    for alert_rule, subscription, triggers in items:
+        key_count = len(ALERT_RULE_STAT_KEYS) + len(triggers) * len(ALERT_RULE_TRIGGER_STAT_KEYS)
+        stats.append(parse_alert_rule_stats(triggers, [next(results) for _ in range(key_count)]))
+    return stats
+
+
+def parse_alert_rule_stats(triggers, results):
     results = tuple(0 if result is None else int(result) for result in results)
     last_update = to_datetime(results[0])
     trigger_results = results[1:]
@@ -477,11 +632,17 @@ def get_alert_rule_stats(alert_rule, subscription, triggers):
     return last_update, trigger_alert_counts, trigger_resolve_counts
 
 
-def update_alert_rule_stats(alert_rule, subscription, last_update, alert_counts, resolve_counts):
+def update_alert_rule_stats(
+    alert_rule, subscription, last_update, alert_counts, resolve_counts, pipeline=None
+):
     """
     Updates stats about the alert rule, subscription and triggers if they've changed.
+    If a pipeline is passed the updates are only added to it, and the caller is
+    responsible for executing it.
     """
-    pipeline = get_redis_client().pipeline()
+    execute = pipeline is None
+    if execute:
+        pipeline = get_redis_client().pipeline()
 
     counts_with_stat_keys = zip(ALERT_RULE_TRIGGER_STAT_KEYS, (alert_counts, resolve_counts))
     for stat_key, trigger_counts in counts_with_stat_keys:
@@ -496,7 +657,8 @@ def update_alert_rule_stats(alert_rule, subscription, last_update, alert_counts,
 
     last_update_key = build_alert_rule_stat_keys(alert_rule, subscription)[0]
     pipeline.set(last_update_key, int(to_timestamp(last_update)), ex=REDIS_TTL)
-    pipeline.execute()
+    if execute:
+        pipeline.execute()
 
 
 def get_redis_client():
@@ -20,7 +20,7 @@ from sentry.incidents.models import (
     PendingIncidentSnapshot,
 )
 from sentry.models import Project
-from sentry.snuba.query_subscription_consumer import register_subscriber
+from sentry.snuba.query_subscription_consumer import register_batch_subscriber, register_subscriber
 from sentry.tasks.base import instrumented_task
 from sentry.utils import metrics
 from sentry.utils.email import MessageBuilder
@@ -119,6 +119,19 @@ def handle_snuba_query_update(subscription_update, subscription):
         SubscriptionProcessor(subscription).process_update(subscription_update)
 
 
+@register_batch_subscriber(INCIDENTS_SNUBA_SUBSCRIPTION_TYPE)
+def handle_snuba_query_updates(updates):
+    """
+    Handles a batch of subscription updates for `QuerySubscription`s.
+    :param updates: A list of `(subscription_update, subscription)` pairs, in the order
+    they were received
+    """
+    from sentry.incidents.subscription_processor import process_updates
+
+    with metrics.timer("incidents.subscription_procesor.process_updates"):
+        process_updates(updates)
+
+
 @instrumented_task(
     name="sentry.incidents.tasks.handle_trigger_action",
     queue="incidents",
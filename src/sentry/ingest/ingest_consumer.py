@@ -2,7 +2,7 @@ import functools
 import logging
 import random
 import time
-from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import (
     Any,
     Callable,
@@ -22,10 +22,11 @@ import sentry_sdk
 from django.conf import settings
 from django.core.cache import cache
 
-from sentry import eventstore, features
+from sentry import eventstore, features, options
 from sentry.attachments import CachedAttachment, attachment_cache
 from sentry.event_manager import save_attachment
 from sentry.eventstore.processing import event_processing_store
+from sentry.ingest.project_cache import ProjectCache
 from sentry.ingest.types import ConsumerType
 from sentry.ingest.userreport import Conflict, save_userreport
 from sentry.killswitches import killswitch_matches_context
@@ -44,6 +45,10 @@ logger = logging.getLogger(__name__)
 
 CACHE_TIMEOUT = 3600
 
+# Number of event payloads sent to a worker process at once when parsing them
+# with a process pool.
+PARSE_CHUNK_SIZE = 16
+
 
 T = TypeVar("T")
 
@@ -57,8 +62,15 @@ Message = Any
 
 
 class IngestConsumerWorker(AbstractBatchWorker):
-    def __init__(self, process_event_executor: Optional[ThreadPoolExecutor] = None) -> None:
+    def __init__(
+        self,
+        process_event_executor: Optional[ThreadPoolExecutor] = None,
+        project_cache: Optional[ProjectCache] = None,
+        process_pool: Optional[ProcessPoolExecutor] = None,
+    ) -> None:
         self.__process_event_executor = process_event_executor
+        self.__process_pool = process_pool
+        self.__project_cache = project_cache if project_cache is not None else ProjectCache()
         if self.__process_event_executor is None:
             self.__process_event = process_event
         else:
@@ -73,8 +85,32 @@ class IngestConsumerWorker(AbstractBatchWorker):
     def flush_batch(self, batch):
         mark_scope_as_unsafe()
         with metrics.timer("ingest_consumer.flush_batch"):
+            if self.__process_pool is not None:
+                with metrics.timer("ingest_consumer.parse_events"):
+                    batch = self._parse_events(batch)
             return self._flush_batch(batch)
 
+    def _parse_events(self, batch: Sequence[Message]) -> Sequence[Message]:
+        """
+        Parse the payloads of all events in the process pool. Events are
+        filtered on their headers beforehand, so that dropped events are never
+        parsed. Only parsing happens in the pool: ``map`` returns the results
+        in the order of the batch, and the events are dispatched from here, so
+        per-partition ordering is preserved.
+        """
+        events = [
+            message
+            for message in batch
+            if message["type"] == "event" and _should_load_event(message)
+        ]
+        payloads = self.__process_pool.map(
+            _parse_payload, [message["payload"] for message in events], chunksize=PARSE_CHUNK_SIZE
+        )
+        for message, data in zip(events, payloads):
+            message["data"] = data
+
+        return [message for message in batch if message["type"] != "event" or "data" in message]
+
     def _flush_batch(self, batch: Sequence[Message]):
         attachment_chunks = []
 
@@ -116,7 +152,7 @@ class IngestConsumerWorker(AbstractBatchWorker):
                 )
 
         with metrics.timer("ingest_consumer.fetch_projects"):
-            projects = {p.id: p for p in Project.objects.get_many_from_cache(projects_to_fetch)}
+            projects = self.__project_cache.get_many(projects_to_fetch)
 
         if attachment_chunks:
             # attachment_chunk messages need to be processed before attachment/event messages.
@@ -124,6 +160,14 @@ class IngestConsumerWorker(AbstractBatchWorker):
                 for attachment_chunk in attachment_chunks:
                     process_attachment_chunk(attachment_chunk, projects=projects)
 
+        if (
+            other_messages
+            and self.__process_event_executor is None
+            and options.get("store.ingest-batch-store")
+        ):
+            with metrics.timer("ingest_consumer.store_events"):
+                other_messages = store_events(other_messages, projects)
+
         if other_messages:
             with metrics.timer("ingest_consumer.process_other_messages_batch"):
                 other_messages_flush_start = time.monotonic()
@@ -149,8 +193,11 @@ class IngestConsumerWorker(AbstractBatchWorker):
                 )
 
     def shutdown(self):
+        self.__project_cache.close()
         if self.__process_event_executor is not None:
             self.__process_event_executor.shutdown()
+        if self.__process_pool is not None:
+            self.__process_pool.shutdown()
 
 
 def trace_func(**span_kwargs):
@@ -188,11 +235,20 @@ def _load_event(
     processing after the event has been persisted and is available to be read by
     other processing components.
     """
-    payload = message["payload"]
-    start_time = float(message["start_time"])
+    # Events that have been parsed in the process pool are checked already.
+    if "data" not in message and not _should_load_event(message):
+        return None
+
+    return _parse_event(message, projects)
+
+
+def _should_load_event(message: Message) -> bool:
+    """
+    Filter events based on the message headers only, before their payload is
+    deserialized.
+    """
     event_id = message["event_id"]
     project_id = int(message["project_id"])
-    remote_addr = message.get("remote_addr")
     attachments = message.get("attachments") or ()
 
     sentry_sdk.set_extra("event_id", event_id)
@@ -215,14 +271,13 @@ def _load_event(
     # This code has been ripped from the old python store endpoint. We're
     # keeping it around because it does provide some protection against
     # reprocessing good events if a single consumer is in a restart loop.
-    deduplication_key = f"ev:{project_id}:{event_id}"
-    if cache.get(deduplication_key) is not None:
+    if cache.get(_get_deduplication_key(project_id, event_id)) is not None:
         logger.warning(
             "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
             event_id,
             project_id,
         )
-        return  # message already processed do not reprocess
+        return False  # message already processed do not reprocess
 
     if killswitch_matches_context(
         "store.load-shed-pipeline-projects",
@@ -234,7 +289,20 @@ def _load_event(
     ):
         # This killswitch is for the worst of scenarios and should probably not
         # cause additional load on our logging infrastructure
-        return
+        return False
+
+    return True
+
+
+def _parse_event(
+    message: Message, projects: Mapping[int, Project]
+) -> Optional[Tuple[Any, Callable[[str], None]]]:
+    payload = message["payload"]
+    start_time = float(message["start_time"])
+    event_id = message["event_id"]
+    project_id = int(message["project_id"])
+    remote_addr = message.get("remote_addr")
+    attachments = message.get("attachments") or ()
 
     try:
         project = projects[project_id]
@@ -244,10 +312,14 @@ def _load_event(
 
     # Parse the JSON payload. This is required to compute the cache key and
     # call process_event. The payload will be put into Kafka raw, to avoid
-    # serializing it again.
+    # serializing it again. When running with a process pool, the payload has
+    # already been parsed by ``_parse_payload``.
     # XXX: Do not use CanonicalKeyDict here. This may break preprocess_event
     # which assumes that data passed in is a raw dictionary.
-    data = json.loads(payload)
+    if "data" in message:
+        data = message["data"]
+    else:
+        data = _parse_payload(payload)
 
     if project_id == settings.SENTRY_PROJECT:
         metrics.incr(
@@ -292,7 +364,7 @@ def _load_event(
             )
 
         # remember for an 1 hour that we saved this event (deduplication protection)
-        cache.set(deduplication_key, "", CACHE_TIMEOUT)
+        cache.set(_get_deduplication_key(project_id, event_id), "", CACHE_TIMEOUT)
 
         # emit event_accepted once everything is done
         event_accepted.send_robust(ip=remote_addr, data=data, project=project, sender=process_event)
@@ -300,6 +372,14 @@ def _load_event(
     return data, dispatch_task
 
 
+def _parse_payload(payload: bytes) -> Any:
+    return json.loads(payload)
+
+
+def _get_deduplication_key(project_id: int, event_id: str) -> str:
+    return f"ev:{project_id}:{event_id}"
+
+
 def _store_event(data) -> str:
     return event_processing_store.store(data)
 
@@ -309,6 +389,55 @@ def process_event(message: Message, projects: Mapping[int, Project]) -> None:
     return _do_process_event(message, projects)
 
 
+@metrics.wraps("ingest_consumer.store_events")
+def store_events(
+    messages: Sequence[Tuple[Callable[..., Any], Message]], projects: Mapping[int, Project]
+) -> Sequence[Tuple[Callable[..., Any], Message]]:
+    """
+    Load the events among ``messages`` and write them to the processing store
+    at once. Returns the messages with ``process_event`` replaced by a
+    function that only dispatches the stored event, so that all messages are
+    still processed in the order of the batch.
+    """
+    results = {}
+    for processing_func, message in messages:
+        if processing_func is process_event:
+            key = (int(message["project_id"]), message["event_id"])
+            # The deduplication key is only set once the event has been
+            # dispatched, so duplicates within the batch are loaded once.
+            if key not in results:
+                results[key] = _load_event(message, projects)
+
+    loaded = {key: result for key, result in results.items() if result is not None}
+    if loaded:
+        cache_keys = dict(
+            zip(loaded, event_processing_store.store_many([data for data, _ in loaded.values()]))
+        )
+
+    stored_messages = []
+    for processing_func, message in messages:
+        if processing_func is process_event:
+            key = (int(message["project_id"]), message["event_id"])
+            if key not in loaded:
+                continue
+
+            _, callback = loaded.pop(key)
+            processing_func = functools.partial(_dispatch_event, callback, cache_keys[key])
+
+        stored_messages.append((processing_func, message))
+
+    return stored_messages
+
+
+def _dispatch_event(
+    callback: Callable[[str], None],
+    cache_key: str,
+    message: Message,
+    projects: Mapping[int, Project],
+) -> None:
+    callback(cache_key)
+
+
 def process_event_async(
     executor: ThreadPoolExecutor, message: Message, projects: Mapping[int, Project]
 ) -> Optional["AsyncResult[str]"]:
@@ -411,7 +540,11 @@ def process_userreport(message, projects) -> None:
 
 
 def get_ingest_consumer(
-    consumer_types, once=False, executor: Optional[ThreadPoolExecutor] = None, **options
+    consumer_types,
+    once=False,
+    executor: Optional[ThreadPoolExecutor] = None,
+    process_pool: Optional[ProcessPoolExecutor] = None,
+    **options,
 ):
     """
     Handles events coming via a kafka queue.
@@ -420,5 +553,7 @@ def get_ingest_consumer(
     """
     topic_names = {ConsumerType.get_topic_name(consumer_type) for consumer_type in consumer_types}
     return create_batching_kafka_consumer(
-        topic_names=topic_names, worker=IngestConsumerWorker(executor), **options
+        topic_names=topic_names,
+        worker=IngestConsumerWorker(executor, process_pool=process_pool),
+        **options,
     )
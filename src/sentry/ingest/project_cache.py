@@ -0,0 +1,72 @@
+from typing import Iterable, Mapping
+
+from django.db.models.signals import post_delete, post_save
+
+from sentry.models import Organization, Project
+from sentry.utils import metrics
+from sentry.utils.cache import LRUCache
+
+DEFAULT_MAXSIZE = 10000
+DEFAULT_TTL = 60
+
+
+class ProjectCache:
+    """
+    Per-consumer cache of projects along with their organizations.
+
+    Steady-state batches of the ingest consumer touch the same set of hot
+    projects over and over again, so we keep them in process instead of asking
+    memcached for every batch. Entries expire after ``ttl`` seconds, and saves
+    or deletes that happen in this process invalidate them right away.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: int = DEFAULT_TTL) -> None:
+        self._projects = LRUCache(maxsize, ttl=ttl)
+        self._organizations = LRUCache(maxsize, ttl=ttl)
+
+        for signal in (post_save, post_delete):
+            signal.connect(self._invalidate_project, sender=Project)
+            signal.connect(self._invalidate_organization, sender=Organization)
+
+    def close(self) -> None:
+        for signal in (post_save, post_delete):
+            signal.disconnect(self._invalidate_project, sender=Project)
+            signal.disconnect(self._invalidate_organization, sender=Organization)
+
+    def _invalidate_project(self, instance, **kwargs) -> None:
+        self._projects.delete(instance.id)
+
+    def _invalidate_organization(self, instance, **kwargs) -> None:
+        self._organizations.delete(instance.id)
+
+    def get_many(self, project_ids: Iterable[int]) -> Mapping[int, Project]:
+        """
+        Returns a mapping of the given project IDs to projects, with the
+        organization already attached. Projects that do not exist are omitted.
+        """
+        project_ids = set(project_ids)
+        projects = self._projects.get_many(project_ids)
+
+        missing = project_ids - projects.keys()
+        metrics.incr("ingest_consumer.project_cache.hit", amount=len(projects))
+        metrics.incr("ingest_consumer.project_cache.miss", amount=len(missing))
+
+        if missing:
+            for project in Project.objects.get_many_from_cache(missing):
+                self._projects.set(project.id, project)
+                projects[project.id] = project
+
+        organization_ids = {p.organization_id for p in projects.values()}
+        organizations = self._organizations.get_many(organization_ids)
+        missing = organization_ids - organizations.keys()
+        if missing:
+            for organization in Organization.objects.get_many_from_cache(missing):
+                self._organizations.set(organization.id, organization)
+                organizations[organization.id] = organization
+
+        for project in projects.values():
+            organization = organizations.get(project.organization_id)
+            if organization is not None:
+                project._organization_cache = organization
+
+        return projects
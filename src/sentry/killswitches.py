@@ -8,8 +8,9 @@ features and more performant.
 """
 
 import copy
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple, Union
 
 from sentry import options
 from sentry.utils import metrics
@@ -103,39 +104,79 @@ def normalize_value(
     return rv
 
 
+@dataclass(frozen=True)
+class _Matcher:
+    """
+    The conditions of a killswitch, grouped by the fields they set. Matching a
+    context takes one set lookup per distinct group of fields.
+    """
+
+    conditions: Dict[Tuple[str, ...], FrozenSet[Tuple[str, ...]]]
+
+    def matches(self, context: Context) -> bool:
+        for fields, matching_values in self.conditions.items():
+            values = []
+            for field in fields:
+                value = context.get(field)
+                if value is None:
+                    break
+                values.append(str(value))
+            else:
+                if tuple(values) in matching_values:
+                    return True
+
+        return False
+
+
+# Compiled matchers along with the raw option value they were compiled from,
+# by killswitch name.
+_matchers: Dict[str, Tuple[LegacyKillswitchConfig, _Matcher]] = {}
+
+
+def _compile(killswitch_name: str, raw_option_value: LegacyKillswitchConfig) -> _Matcher:
+    conditions: Dict[Tuple[str, ...], Set[Tuple[str, ...]]] = defaultdict(set)
+
+    # ``normalize_value`` fills in missing fields in place, copy the value so
+    # that the one cached by the options store is left alone.
+    for condition in normalize_value(killswitch_name, copy.deepcopy(raw_option_value)):
+        fields = tuple(sorted(condition))
+        conditions[fields].add(tuple(str(condition[field]) for field in fields))
+
+    return _Matcher({fields: frozenset(values) for fields, values in conditions.items()})
+
+
+def _get_matcher(killswitch_name: str, raw_option_value: LegacyKillswitchConfig) -> _Matcher:
+    try:
+        cached_value, matcher = _matchers[killswitch_name]
+    except KeyError:
+        pass
+    else:
+        # The options store hands out the same object for as long as the value
+        # stays in its local cache, so this is usually an identity check.
+        if cached_value is raw_option_value or cached_value == raw_option_value:
+            return matcher
+
+    matcher = _compile(killswitch_name, raw_option_value)
+    _matchers[killswitch_name] = (raw_option_value, matcher)
+    return matcher
+
+
 def killswitch_matches_context(killswitch_name: str, context: Context) -> bool:
-    assert killswitch_name in ALL_KILLSWITCH_OPTIONS
-    assert set(ALL_KILLSWITCH_OPTIONS[killswitch_name].fields) == set(context)
-    option_value = options.get(killswitch_name)
-    rv = _value_matches(killswitch_name, option_value, context)
+    assert context.keys() == ALL_KILLSWITCH_OPTIONS[killswitch_name].fields.keys()
+    matcher = _get_matcher(killswitch_name, options.get(killswitch_name))
+    if not matcher.conditions or not matcher.matches(context):
+        return False
+
     metrics.incr(
-        "killswitches.run",
-        tags={"killswitch_name": killswitch_name, "decision": "matched" if rv else "passed"},
+        "killswitches.run", tags={"killswitch_name": killswitch_name, "decision": "matched"}
     )
-
-    return rv
+    return True
 
 
 def _value_matches(
     killswitch_name: str, raw_option_value: LegacyKillswitchConfig, context: Context
 ) -> bool:
-    option_value = normalize_value(killswitch_name, raw_option_value)
-
-    for condition in option_value:
-        for field, matching_value in condition.items():
-            if matching_value is None:
-                continue
-
-            value = context.get(field)
-            if value is None:
-                break
-
-            if str(value) != matching_value:
-                break
-        else:
-            return True
-
-    return False
+    return _compile(killswitch_name, raw_option_value).matches(context)
 
 
 def print_conditions(killswitch_name: str, raw_option_value: LegacyKillswitchConfig) -> str:
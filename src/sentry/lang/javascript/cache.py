@@ -1,8 +1,10 @@
 from symbolic import SourceView
 
+from sentry.utils import metrics
+from sentry.utils.cache import LRUCache
 from sentry.utils.strings import codec_lookup
 
-__all__ = ["SourceCache", "SourceMapCache"]
+__all__ = ["SourceCache", "SourceMapCache", "SharedViewCache", "make_source_view"]
 
 
 def is_utf8(codec):
@@ -10,6 +12,22 @@ def is_utf8(codec):
     return name in ("utf-8", "ascii")
 
 
+def make_source_view(source, encoding=None):
+    if isinstance(source, SourceView):
+        return source
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    # If an encoding is provided and it's not utf-8 compatible
+    # we try to re-encoding the source and create a source view
+    # from it.
+    elif encoding is not None and not is_utf8(encoding):
+        try:
+            source = source.decode(encoding).encode("utf-8")
+        except UnicodeError:
+            pass
+    return SourceView.from_bytes(source)
+
+
 class SourceCache:
     def __init__(self):
         self._cache = {}
@@ -38,20 +56,7 @@ class SourceCache:
 
     def add(self, url, source, encoding=None):
         url = self._get_canonical_url(url)
-
-        if not isinstance(source, SourceView):
-            if isinstance(source, str):
-                source = source.encode("utf-8")
-            # If an encoding is provided and it's not utf-8 compatible
-            # we try to re-encoding the source and create a source view
-            # from it.
-            elif encoding is not None and not is_utf8(encoding):
-                try:
-                    source = source.decode(encoding).encode("utf-8")
-                except UnicodeError:
-                    pass
-            source = SourceView.from_bytes(source)
-        self._cache[url] = source
+        self._cache[url] = make_source_view(source, encoding)
 
     def add_error(self, url, error):
         url = self._get_canonical_url(url)
@@ -90,3 +95,49 @@ class SourceMapCache:
             sourcemap = self.get(sourcemap_url)
             return (sourcemap_url, sourcemap)
         return (None, None)
+
+
+class SharedViewCache:
+    """
+    Process-wide cache of parsed sources and source maps of releases.
+
+    Unlike ``SourceCache`` and ``SourceMapCache``, which only live as long as
+    a single processor, this is shared by all events processed by a worker, so
+    that popular bundles and their source maps are fetched and parsed once.
+    Entries are keyed by release, dist and URL and weighted by their size in
+    bytes.
+    """
+
+    def __init__(self, maxsize, maxweight, ttl):
+        self._cache = LRUCache(maxsize, ttl=ttl, maxweight=maxweight)
+
+    def _get(self, kind, key):
+        rv = self._cache.get((kind,) + key)
+        metrics.incr(
+            "sourcemaps.shared_cache.hit" if rv is not None else "sourcemaps.shared_cache.miss",
+            tags={"type": kind},
+        )
+        return rv
+
+    def _set(self, kind, key, value, size):
+        self._cache.set((kind,) + key, value, weight=size)
+        metrics.timing("sourcemaps.shared_cache.size", self._cache.weight)
+
+    def get_source(self, key):
+        """
+        Returns ``(url, source_view, sourcemap_url)`` for a previously added
+        source file.
+        """
+        return self._get("source", key)
+
+    def add_source(self, key, url, source_view, sourcemap_url, size):
+        self._set("source", key, (url, source_view, sourcemap_url), size)
+
+    def get_sourcemap(self, key):
+        return self._get("sourcemap", key)
+
+    def add_sourcemap(self, key, sourcemap_view, size):
+        self._set("sourcemap", key, sourcemap_view, size)
+
+    def clear(self):
+        self._cache.clear()
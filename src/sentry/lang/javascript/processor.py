@@ -5,21 +5,28 @@ import re
 import sys
 import time
 import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from io import BytesIO
 from os.path import splitext
-from typing import IO, Optional, Tuple
+from typing import IO, Optional, Tuple, Union
 from urllib.parse import urlsplit
 
 import sentry_sdk
 from django.conf import settings
+from django.db import connections
 from django.utils.encoding import force_bytes, force_text
 from requests.utils import get_encoding_from_headers
 from symbolic import SourceMapView
 
-from sentry import http
+from sentry import http, options
 from sentry.interfaces.stacktrace import Stacktrace
 from sentry.models import EventError, Organization, ReleaseFile
-from sentry.models.releasefile import ARTIFACT_INDEX_FILENAME, ReleaseArchive, read_artifact_index
+from sentry.models.releasefile import (
+    ARTIFACT_INDEX_FILENAME,
+    MappedReleaseArchive,
+    ReleaseArchive,
+    read_artifact_index,
+)
 from sentry.stacktraces.processing import StacktraceProcessor
 from sentry.utils import json, metrics
 
@@ -34,7 +41,7 @@ from sentry.utils.retries import ConditionalRetryPolicy, exponential_delay
 from sentry.utils.safe import get_path
 from sentry.utils.urls import non_standard_url_join
 
-from .cache import SourceCache, SourceMapCache
+from .cache import SharedViewCache, SourceCache, SourceMapCache, make_source_view
 
 __all__ = ["JavaScriptStacktraceProcessor"]
 
@@ -68,11 +75,37 @@ CACHE_CONTROL_MIN = 60
 # fetched
 MAX_RESOURCE_FETCHES = 100
 
+# Limits of the process-wide cache of parsed release sources and source maps.
+# The weight of an entry is the size of the file it was parsed from. Release
+# files themselves are cached for an hour, so a short TTL is good enough to pick
+# up re-uploaded artifacts.
+SHARED_VIEW_CACHE_MAX_ITEMS = 1000
+SHARED_VIEW_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SHARED_VIEW_CACHE_TTL = 300
+
+shared_view_cache = SharedViewCache(
+    maxsize=SHARED_VIEW_CACHE_MAX_ITEMS,
+    maxweight=SHARED_VIEW_CACHE_MAX_BYTES,
+    ttl=SHARED_VIEW_CACHE_TTL,
+)
+
 CACHE_MAX_VALUE_SIZE = settings.SENTRY_CACHE_MAX_VALUE_SIZE
 
 logger = logging.getLogger(__name__)
 
 
+def _run_fetch(func, *args):
+    """
+    Runs a fetch in a worker thread of ``_fetch_concurrently``. Fetches query
+    the database, and connections are per thread, so the connections of the
+    worker thread are closed afterwards.
+    """
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
+
+
 class UnparseableSourcemap(http.BadSource):
     error_type = EventError.JS_INVALID_SOURCEMAP
 
@@ -239,7 +272,7 @@ def fetch_and_cache_artifact(filename, fetch_fn, cache_key, cache_key_meta, head
     def fetch_release_body():
         with fetch_fn() as fp:
             if z_body_size and z_body_size > CACHE_MAX_VALUE_SIZE:
-                return None, fp.read()
+                return None, bytes(fp) if isinstance(fp, memoryview) else fp.read()
             else:
                 return compress_fn(fp)
 
@@ -378,11 +411,20 @@ def fetch_release_file(filename, release, dist=None):
 
 
 @metrics.wraps("sourcemaps.get_from_archive")
-def get_from_archive(url: str, archive: ReleaseArchive) -> Tuple[bytes, dict]:
+def get_from_archive(
+    url: str, archive: Union[ReleaseArchive, MappedReleaseArchive]
+) -> Tuple[Union[IO, bytes, memoryview], dict]:
+    """Return a file-like object and headers, or for memory-mapped archives
+    the file contents and headers."""
+    if isinstance(archive, MappedReleaseArchive):
+        get_file = archive.read_file_by_url
+    else:
+        get_file = archive.get_file_by_url
+
     candidates = ReleaseFile.normalize(url)
     for candidate in candidates:
         try:
-            return archive.get_file_by_url(candidate)
+            return get_file(candidate)
         except KeyError:
             pass
 
@@ -481,12 +523,48 @@ def fetch_release_archive_for_url(release, dist, url) -> Optional[IO]:
             return file_
 
 
+@metrics.wraps("sourcemaps.fetch_mapped_release_archive")
+def fetch_mapped_release_archive_for_url(release, dist, url) -> Optional[MappedReleaseArchive]:
+    """Like ``fetch_release_archive_for_url``, but returns a memory-mapped
+    archive.
+
+    The archive is shared and must not be closed by the caller.
+    """
+    info = get_index_entry(release, dist, url)
+    if info is None:
+        return None
+
+    archive_ident = info["archive_ident"]
+    qs = ReleaseFile.objects.filter(
+        release_id=release.id, dist_id=dist.id if dist else dist, ident=archive_ident
+    ).select_related("file")
+    try:
+        releasefile = qs[0]
+    except IndexError:
+        # This should not happen when there is an archive_ident in the manifest
+        logger.error("sourcemaps.missing_archive", exc_info=sys.exc_info())
+        return None
+
+    try:
+        return fetch_retry_policy(lambda: ReleaseFile.cache.getarchive(releasefile))
+    except Exception:
+        logger.error("sourcemaps.read_archive_failed", exc_info=sys.exc_info())
+        return None
+
+
 def compress(fp: IO) -> Tuple[bytes, bytes]:
     """Alternative for compress_file when fp does not support chunks"""
     content = fp.read()
     return zlib.compress(content), content
 
 
+def compress_view(view: memoryview) -> Tuple[bytes, bytes]:
+    """Alternative for compress when the contents are already in memory, for
+    instance mapped from a release archive. The contents are copied only once
+    into the returned body."""
+    return zlib.compress(view), bytes(view)
+
+
 def fetch_release_artifact(url, release, dist):
     """
     Get a release artifact either by extracting it or fetching it directly.
@@ -506,46 +584,52 @@ def fetch_release_artifact(url, release, dist):
         return result_from_cache(url, result)
 
     start = time.monotonic()
-    archive_file = fetch_release_archive_for_url(release, dist, url)
-    if archive_file is not None:
-        try:
-            archive = ReleaseArchive(archive_file)
-        except Exception as exc:
-            logger.error("Failed to initialize archive for release %s", release.id, exc_info=exc)
-            # TODO(jjbayer): cache error and return here
-        else:
-            with archive:
-                try:
-                    fp, headers = get_from_archive(url, archive)
-                except KeyError:
-                    # The manifest mapped the url to an archive, but the file
-                    # is not there.
-                    logger.error(
-                        "Release artifact %r not found in archive %s", url, archive_file.id
-                    )
-                    cache.set(cache_key, -1, 60)
-                    metrics.timing(
-                        "sourcemaps.release_artifact_from_archive", time.monotonic() - start
-                    )
-                    return None
-                except Exception as exc:
-                    logger.error("Failed to read %s from release %s", url, release.id, exc_info=exc)
-                    # TODO(jjbayer): cache error and return here
-                else:
-                    result = fetch_and_cache_artifact(
-                        url,
-                        lambda: fp,
-                        cache_key,
-                        cache_key_meta,
-                        headers,
-                        # Cannot use `compress_file` because `ZipExtFile` does not support chunks
-                        compress_fn=compress,
-                    )
-                    metrics.timing(
-                        "sourcemaps.release_artifact_from_archive", time.monotonic() - start
-                    )
+    archive = None
+    if options.get("processing.mmap-release-archives"):
+        archive = fetch_mapped_release_archive_for_url(release, dist, url)
+    else:
+        archive_file = fetch_release_archive_for_url(release, dist, url)
+        if archive_file is not None:
+            try:
+                archive = ReleaseArchive(archive_file)
+            except Exception as exc:
+                logger.error(
+                    "Failed to initialize archive for release %s", release.id, exc_info=exc
+                )
+                # TODO(jjbayer): cache error and return here
 
-                    return result
+    if archive is not None:
+        with archive:
+            try:
+                fp, headers = get_from_archive(url, archive)
+            except KeyError:
+                # The manifest mapped the url to an archive, but the file
+                # is not there.
+                logger.error(
+                    "Release artifact %r not found in archive of release %s", url, release.id
+                )
+                cache.set(cache_key, -1, 60)
+                metrics.timing("sourcemaps.release_artifact_from_archive", time.monotonic() - start)
+                return None
+            except Exception as exc:
+                logger.error("Failed to read %s from release %s", url, release.id, exc_info=exc)
+                # TODO(jjbayer): cache error and return here
+            else:
+                # Mapped archives return the file contents, which are compressed
+                # without copying them first.
+                mapped = isinstance(archive, MappedReleaseArchive)
+                result = fetch_and_cache_artifact(
+                    url,
+                    (lambda: memoryview(fp)) if mapped else (lambda: fp),
+                    cache_key,
+                    cache_key_meta,
+                    headers,
+                    # Cannot use `compress_file` because `ZipExtFile` does not support chunks
+                    compress_fn=compress_view if mapped else compress,
+                )
+                metrics.timing("sourcemaps.release_artifact_from_archive", time.monotonic() - start)
+
+                return result
 
     # Fall back to maintain compatibility with old releases and versions of
     # sentry-cli which upload files individually
@@ -689,6 +773,11 @@ def get_max_age(headers):
 
 
 def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=True):
+    return _fetch_sourcemap(url, project, release, dist, allow_scraping)[0]
+
+
+def _fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=True):
+    """Like ``fetch_sourcemap``, but also returns the size of the source map."""
     if is_data_uri(url):
         try:
             body = base64.b64decode(
@@ -708,7 +797,7 @@ def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=T
         )
         body = result.body
     try:
-        return SourceMapView.from_json_bytes(body)
+        return SourceMapView.from_json_bytes(body), len(body)
     except Exception as exc:
         # This is in debug because the product shows an error already.
         logger.debug(str(exc), exc_info=True)
@@ -1078,74 +1167,158 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             self.cache_source(filename)
         return self.cache.get(filename)
 
-    def cache_source(self, filename):
+    def _get_shared_cache_key(self, url):
         """
-        Look for and (if found) cache a source file and its associated source
-        map (if any).
+        Returns the key of ``url`` in the process-wide ``shared_view_cache``,
+        or ``None`` if the file must not be shared across events. Only files
+        of releases are shared.
+
+        Release artifacts are shared between all projects of the release.
+        Whether a file may be scraped depends on settings of the project, such
+        as allowed domains and the security token, so files fetched with
+        scraping enabled are only shared within the project.
         """
+        if self.release is None or is_data_uri(url):
+            return None
+        return (
+            self.release.id,
+            self.dist.id if self.dist is not None else None,
+            self.project.id if self.allow_scraping else None,
+            url,
+        )
 
-        sourcemaps = self.sourcemaps
-        cache = self.cache
-
+    def _reserve_fetch(self, filename):
+        """
+        Counts a fetch towards the limit of the event. Returns ``False`` and
+        records an error if the limit has been reached.
+        """
         self.fetch_count += 1
 
         if self.fetch_count > self.max_fetches:
-            cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
-            return
+            self.cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
+            return False
+        return True
+
+    def _fetch_source(self, filename):
+        """
+        Fetches a source file and returns ``(url, source_view, sourcemap_url)``.
+        Raises ``BadSource`` if the file cannot be fetched.
+
+        This does not touch the caches of the processor and can therefore run
+        in a worker thread.
+        """
+        shared_key = self._get_shared_cache_key(filename)
+        if shared_key is not None:
+            shared = shared_view_cache.get_source(shared_key)
+            if shared is not None:
+                return shared
 
         # TODO: respect cache-control/max-age headers to some extent
         logger.debug("Attempting to cache source %r", filename)
-        try:
-            # this both looks in the database and tries to scrape the internet
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.cache_source.fetch_file"
-            ) as span:
-                span.set_data("filename", filename)
-                result = fetch_file(
-                    filename,
-                    project=self.project,
-                    release=self.release,
-                    dist=self.dist,
-                    allow_scraping=self.allow_scraping,
-                )
-        except http.BadSource as exc:
-            # most people don't upload release artifacts for their third-party libraries,
-            # so ignore missing node_modules files
-            if exc.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
-                pass
-            else:
-                cache.add_error(filename, exc.data)
+        # this both looks in the database and tries to scrape the internet
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.cache_source.fetch_file"
+        ) as span:
+            span.set_data("filename", filename)
+            result = fetch_file(
+                filename,
+                project=self.project,
+                release=self.release,
+                dist=self.dist,
+                allow_scraping=self.allow_scraping,
+            )
+
+        source_view = make_source_view(result.body, result.encoding)
+        sourcemap_url = discover_sourcemap(result)
+        if shared_key is not None:
+            shared_view_cache.add_source(
+                shared_key, result.url, source_view, sourcemap_url, len(result.body)
+            )
+        return result.url, source_view, sourcemap_url
+
+    def _fetch_sourcemap_view(self, sourcemap_url):
+        """
+        Fetches and parses a source map. Raises ``BadSource`` if the source map
+        cannot be fetched or is invalid. Like ``_fetch_source``, this can run in
+        a worker thread.
+        """
+        shared_key = self._get_shared_cache_key(sourcemap_url)
+        if shared_key is not None:
+            sourcemap_view = shared_view_cache.get_sourcemap(shared_key)
+            if sourcemap_view is not None:
+                return sourcemap_view
+
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
+        ) as span:
+            span.set_data("sourcemap_url", sourcemap_url)
+            sourcemap_view, sourcemap_size = _fetch_sourcemap(
+                sourcemap_url,
+                project=self.project,
+                release=self.release,
+                dist=self.dist,
+                allow_scraping=self.allow_scraping,
+            )
+
+        if shared_key is not None:
+            shared_view_cache.add_sourcemap(shared_key, sourcemap_view, sourcemap_size)
+        return sourcemap_view
 
-            # either way, there's no more for us to do here, since we don't have
-            # a valid file to cache
+    def _add_source_error(self, filename, exc):
+        # most people don't upload release artifacts for their third-party libraries,
+        # so ignore missing node_modules files
+        if exc.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
             return
-        cache.add(filename, result.body, result.encoding)
-        cache.alias(result.url, filename)
+        self.cache.add_error(filename, exc.data)
+
+    def _add_source(self, filename, url, source_view, sourcemap_url):
+        """
+        Adds a fetched source file to the cache. Returns the URL of its source
+        map if that still needs to be fetched.
+        """
+        self.cache.add(filename, source_view)
+        self.cache.alias(url, filename)
 
-        sourcemap_url = discover_sourcemap(result)
         if not sourcemap_url:
+            return None
+
+        logger.debug("Found sourcemap URL %r for minified script %r", sourcemap_url[:256], filename)
+        self.sourcemaps.link(filename, sourcemap_url)
+        if sourcemap_url in self.sourcemaps:
+            return None
+        return sourcemap_url
+
+    def _add_sourcemap(self, sourcemap_url, sourcemap_view):
+        self.sourcemaps.add(sourcemap_url, sourcemap_view)
+
+        # cache any inlined sources
+        for src_id, source_name in sourcemap_view.iter_sources():
+            source_view = sourcemap_view.get_sourceview(src_id)
+            if source_view is not None:
+                self.cache.add(non_standard_url_join(sourcemap_url, source_name), source_view)
+
+    def cache_source(self, filename):
+        """
+        Look for and (if found) cache a source file and its associated source
+        map (if any).
+        """
+        if not self._reserve_fetch(filename):
             return
 
-        logger.debug(
-            "Found sourcemap URL %r for minified script %r", sourcemap_url[:256], result.url
-        )
-        sourcemaps.link(filename, sourcemap_url)
-        if sourcemap_url in sourcemaps:
+        try:
+            url, source_view, sourcemap_url = self._fetch_source(filename)
+        except http.BadSource as exc:
+            # there's no more for us to do here, since we don't have a valid
+            # file to cache
+            self._add_source_error(filename, exc)
+            return
+
+        sourcemap_url = self._add_source(filename, url, source_view, sourcemap_url)
+        if sourcemap_url is None:
             return
 
-        # pull down sourcemap
         try:
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
-            ) as span:
-                span.set_data("sourcemap_url", sourcemap_url)
-                sourcemap_view = fetch_sourcemap(
-                    sourcemap_url,
-                    project=self.project,
-                    release=self.release,
-                    dist=self.dist,
-                    allow_scraping=self.allow_scraping,
-                )
+            sourcemap_view = self._fetch_sourcemap_view(sourcemap_url)
         except http.BadSource as exc:
             # we don't perform the same check here as above, because if someone has
             # uploaded a node_modules file, which has a sourceMappingURL, they
@@ -1153,16 +1326,10 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             # working, if that's the case). If they're not looking for it to be
             # mapped, then they shouldn't be uploading the source file in the
             # first place.
-            cache.add_error(filename, exc.data)
+            self.cache.add_error(filename, exc.data)
             return
 
-        sourcemaps.add(sourcemap_url, sourcemap_view)
-
-        # cache any inlined sources
-        for src_id, source_name in sourcemap_view.iter_sources():
-            source_view = sourcemap_view.get_sourceview(src_id)
-            if source_view is not None:
-                self.cache.add(non_standard_url_join(sourcemap_url, source_name), source_view)
+        self._add_sourcemap(sourcemap_url, sourcemap_view)
 
     def populate_source_cache(self, frames):
         """
@@ -1185,6 +1352,14 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 continue
             pending_file_list.add(f["abs_path"])
 
+        if settings.SENTRY_SOURCE_FETCH_CONCURRENCY > 1 and len(pending_file_list) > 1:
+            with sentry_sdk.start_span(
+                op="JavaScriptStacktraceProcessor.populate_source_cache.fetch_concurrently"
+            ) as span:
+                span.set_data("files", len(pending_file_list))
+                self._fetch_concurrently(pending_file_list)
+            return
+
         for idx, filename in enumerate(pending_file_list):
             with sentry_sdk.start_span(
                 op="JavaScriptStacktraceProcessor.populate_source_cache.cache_source"
@@ -1192,6 +1367,93 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 span.set_data("filename", filename)
                 self.cache_source(filename=filename)
 
+    def _fetch_concurrently(self, filenames):
+        """
+        Like calling ``cache_source`` for every file, but fetches sources and
+        source maps in a thread pool. Source maps are fetched as soon as the
+        source that references them is available. Files that have not been
+        fetched by the end of ``SENTRY_SOURCE_FETCH_EVENT_TIMEOUT`` get a
+        timeout error.
+
+        Only the fetching happens in worker threads. The caches of the processor
+        are updated in the calling thread. Every event gets its own thread
+        pool, so that fetches still running after the timeout cannot hold up
+        the fetches of later events.
+        """
+        pool = ThreadPoolExecutor(max_workers=settings.SENTRY_SOURCE_FETCH_CONCURRENCY)
+        try:
+            self._fetch_in_pool(pool, filenames)
+        finally:
+            # Fetches that timed out are abandoned rather than waited for.
+            pool.shutdown(wait=False)
+
+    def _fetch_in_pool(self, pool, filenames):
+        timeout = settings.SENTRY_SOURCE_FETCH_EVENT_TIMEOUT
+        deadline = time.monotonic() + timeout
+
+        # future -> (filename, sourcemap_url), where sourcemap_url is None for
+        # source fetches
+        pending = {}
+        # sourcemap_url -> filenames of the sources linking to it
+        sourcemap_files = {}
+
+        for filename in filenames:
+            if self._reserve_fetch(filename):
+                future = pool.submit(_run_fetch, self._fetch_source, filename)
+                pending[future] = (filename, None)
+
+        while pending:
+            done, _ = wait(
+                pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED
+            )
+            if not done:
+                break
+
+            for future in done:
+                filename, sourcemap_url = pending.pop(future)
+
+                if sourcemap_url is not None:
+                    try:
+                        sourcemap_view = future.result()
+                    except http.BadSource as exc:
+                        # see cache_source for why this is not filtered
+                        for source_filename in sourcemap_files[sourcemap_url]:
+                            self.cache.add_error(source_filename, exc.data)
+                    else:
+                        self._add_sourcemap(sourcemap_url, sourcemap_view)
+                    continue
+
+                try:
+                    url, source_view, sourcemap_url = future.result()
+                except http.BadSource as exc:
+                    self._add_source_error(filename, exc)
+                    continue
+
+                sourcemap_url = self._add_source(filename, url, source_view, sourcemap_url)
+                if sourcemap_url is None:
+                    continue
+                if sourcemap_url in sourcemap_files:
+                    # already being fetched for another source
+                    sourcemap_files[sourcemap_url].append(filename)
+                    continue
+
+                sourcemap_files[sourcemap_url] = [filename]
+                future = pool.submit(_run_fetch, self._fetch_sourcemap_view, sourcemap_url)
+                pending[future] = (filename, sourcemap_url)
+
+        for future, (filename, sourcemap_url) in pending.items():
+            future.cancel()
+            error = {
+                "type": EventError.FETCH_TIMEOUT,
+                "url": http.expose_url(sourcemap_url or filename),
+                "timeout": timeout,
+            }
+            for source_filename in sourcemap_files.get(sourcemap_url, [filename]):
+                self.cache.add_error(source_filename, error)
+
+        if pending:
+            metrics.incr("sourcemaps.fetch_timeout", amount=len(pending), skip_internal=True)
+
     def close(self):
         StacktraceProcessor.close(self)
         if self.sourcemaps_touched:
@@ -1,5 +1,8 @@
 import itertools
 import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 from typing import Any, Optional, Sequence
 
 from django.utils import dateformat
@@ -24,6 +27,53 @@ from sentry.utils.linksign import generate_signed_link
 
 logger = logging.getLogger(__name__)
 
+_digest_batch = threading.local()
+
+
+@contextmanager
+def batched_digests():
+    """
+    Collect the digest records added by ``MailAdapter.rule_notify`` within the
+    block and write them with a single ``digests.add_many`` call once the block
+    exits. Records for the same event and digest are coalesced into a single
+    record listing all of the rules that fired.
+
+    Failing to write the records is logged rather than raised, like a failing
+    notification would be, so that it does not abort the caller.
+    """
+    if getattr(_digest_batch, "entries", None) is not None:
+        # Nested batches are flushed by the outermost one.
+        yield
+        return
+
+    _digest_batch.entries = entries = {}
+    try:
+        yield
+    finally:
+        _digest_batch.entries = None
+
+    if not entries:
+        return
+
+    try:
+        _add_digest_records(entries)
+    except Exception:
+        logger.exception("mail.adapter.batched_digests.failed")
+
+
+def _add_digest_records(entries):
+    items_by_delay = defaultdict(list)
+    for (digest_key, _), (event, rules, increment_delay, maximum_delay) in entries.items():
+        items_by_delay[(increment_delay, maximum_delay)].append(
+            (digest_key, event_to_record(event, rules))
+        )
+
+    for (increment_delay, maximum_delay), items in items_by_delay.items():
+        for digest_key in digests.add_many(
+            items, increment_delay=increment_delay, maximum_delay=maximum_delay
+        ):
+            deliver_digest.delay(digest_key)
+
 
 class MailAdapter:
     """This class contains generic logic for notifying users via Email."""
@@ -66,16 +116,31 @@ class MailAdapter:
 
             digest_key = unsplit_key(event.group.project, target_type, target_identifier)
             extra["digest_key"] = digest_key
-            immediate_delivery = digests.add(
-                digest_key,
-                event_to_record(event, rules),
-                increment_delay=get_digest_option("increment_delay"),
-                maximum_delay=get_digest_option("maximum_delay"),
-            )
-            if immediate_delivery:
-                deliver_digest.delay(digest_key)
+
+            entries = getattr(_digest_batch, "entries", None)
+            if entries is not None:
+                _, batched_rules, _, _ = entries.setdefault(
+                    (digest_key, event.event_id),
+                    (
+                        event,
+                        [],
+                        get_digest_option("increment_delay"),
+                        get_digest_option("maximum_delay"),
+                    ),
+                )
+                batched_rules.extend(rule for rule in rules if rule not in batched_rules)
+                log_event = "batched"
             else:
-                log_event = "digested"
+                immediate_delivery = digests.add(
+                    digest_key,
+                    event_to_record(event, rules),
+                    increment_delay=get_digest_option("increment_delay"),
+                    maximum_delay=get_digest_option("maximum_delay"),
+                )
+                if immediate_delivery:
+                    deliver_digest.delay(digest_key)
+                else:
+                    log_event = "digested"
 
         else:
             notification = Notification(event=event, rules=rules)
@@ -1,7 +1,106 @@
-from django.db import models
+import time
+
+from django.core.cache import cache
+from django.db import models, router, transaction
 from django.utils.translation import ugettext_lazy as _
 
 from sentry.db.models import BoundedPositiveIntegerField, FlexibleForeignKey, Model
+from sentry.db.models.manager import BaseManager
+
+# How long resolved grouphashes are kept in the shared cache. Entries are
+# invalidated per project whenever hashes are merged, unmerged, tombstoned or
+# deleted, so this only bounds how long unused entries linger.
+HASH_CACHE_TTL = 60 * 60
+
+
+class GroupHashManager(BaseManager):
+    """
+    Read-through cache of ``(project_id, hash) -> (id, group_id, state)``.
+
+    Only hashes that are already associated with a group are cached. Every
+    entry is stamped with the project's cache generation at the time the
+    database was read; bumping the generation (see ``invalidate_hash_cache``)
+    makes all entries of a project stale at once, which is far cheaper than
+    figuring out which hashes a merge or deletion has touched.
+    """
+
+    def _get_generation_key(self, project_id):
+        return f"grouphash-gen:{project_id}"
+
+    def _get_hash_key(self, project_id, hash):
+        return f"grouphash:{project_id}:{hash}"
+
+    def get_many_from_hash_cache(self, project_id, hashes):
+        """
+        Returns a tuple of the current cache generation for the project and a
+        mapping of hashes to (unsaved) ``GroupHash`` instances found in the
+        cache. The generation has to be passed to ``set_many_in_hash_cache``
+        when writing back what was read from the database.
+        """
+        generation_key = self._get_generation_key(project_id)
+        hash_keys = {self._get_hash_key(project_id, hash): hash for hash in hashes}
+        values = cache.get_many([generation_key] + list(hash_keys))
+
+        generation = values.pop(generation_key, None)
+        if generation is None:
+            # Seed the generation from the clock so it cannot collide with
+            # one that has been evicted before.
+            cache.add(generation_key, int(time.time() * 1000), None)
+            return cache.get(generation_key), {}
+
+        results = {}
+        for key, value in values.items():
+            entry_generation, id, group_id, state = value
+            if entry_generation != generation:
+                continue
+            hash = hash_keys[key]
+            results[hash] = self.model(
+                id=id, project_id=project_id, hash=hash, group_id=group_id, state=state
+            )
+        return generation, results
+
+    def set_many_in_hash_cache(self, project_id, generation, grouphashes):
+        if generation is None:
+            return
+
+        cache.set_many(
+            {
+                self._get_hash_key(project_id, h.hash): (generation, h.id, h.group_id, h.state)
+                for h in grouphashes
+                if h.group_id is not None and h.state != self.model.State.LOCKED_IN_MIGRATION
+            },
+            HASH_CACHE_TTL,
+        )
+
+    def _bump_generation(self, project_id):
+        try:
+            cache.incr(self._get_generation_key(project_id))
+        except ValueError:
+            # No generation means there is nothing to invalidate.
+            pass
+
+    def invalidate_hash_cache(self, project_id):
+        """
+        Marks all cached hashes of the project as stale. This has to be called
+        whenever existing hashes are moved between groups, tombstoned or
+        deleted.
+
+        The generation is bumped right away and once more when the current
+        transaction commits: until then concurrent readers still see the old
+        rows, and could otherwise cache them under the new generation.
+        """
+        self._bump_generation(project_id)
+        transaction.on_commit(
+            lambda: self._bump_generation(project_id), using=router.db_for_write(self.model)
+        )
+
+    def post_save(self, instance, **kwargs):
+        # Newly created hashes cannot be cached yet.
+        if not kwargs.get("created"):
+            self.invalidate_hash_cache(instance.project_id)
+
+    def post_delete(self, instance, **kwargs):
+        self.invalidate_hash_cache(instance.project_id)
 
 
 class GroupHash(Model):
@@ -24,6 +123,8 @@ class GroupHash(Model):
         choices=[(State.LOCKED_IN_MIGRATION, _("Locked (Migration in Progress)"))], null=True
     )
 
+    objects = GroupHashManager()
+
     class Meta:
         app_label = "sentry"
         db_table = "sentry_grouphash"
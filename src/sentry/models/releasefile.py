@@ -1,14 +1,18 @@
 import errno
 import logging
+import mmap
 import os
+import struct
 import zipfile
+import zlib
 from contextlib import contextmanager
 from hashlib import sha1
 from io import BytesIO
-from tempfile import TemporaryDirectory
-from typing import IO, Optional, Tuple
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import IO, Optional, Tuple, Union
 from urllib.parse import urlsplit, urlunsplit
 
+import msgpack
 from django.core.files.base import File as FileObj
 from django.db import models, transaction
 
@@ -25,6 +29,7 @@ from sentry.models.distribution import Distribution
 from sentry.models.file import File
 from sentry.models.release import Release
 from sentry.utils import json, metrics
+from sentry.utils.cache import LRUCache
 from sentry.utils.hashlib import sha1_text
 from sentry.utils.zip import safe_extract_zip
 
@@ -34,6 +39,16 @@ logger = logging.getLogger(__name__)
 ARTIFACT_INDEX_FILENAME = "artifact-index.json"
 ARTIFACT_INDEX_TYPE = "release.artifact-index"
 
+#: Maximum number of release archives kept open by ``ReleaseFileCache``
+MAX_MAPPED_ARCHIVES = 100
+
+#: Version of the URL index written next to memory-mapped release archives
+MAPPED_ARCHIVE_INDEX_VERSION = 1
+
+# Signature and format of the local file header of a ZIP entry
+ZIP_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
 
 class PublicReleaseFileManager(models.Manager):
     """Manager for all release files that are not internal.
@@ -141,17 +156,15 @@ class ReleaseFile(Model):
 
 
 class ReleaseFileCache:
+    def __init__(self):
+        # Memory-mapped release archives by file ID
+        self._archives = LRUCache(MAX_MAPPED_ARCHIVES)
+
     @property
     def cache_path(self):
         return options.get("releasefile.cache-path")
 
-    def getfile(self, releasefile):
-        cutoff = options.get("releasefile.cache-limit")
-        file_size = releasefile.file.size
-        if file_size < cutoff:
-            metrics.timing("release_file.cache.get.size", file_size, tags={"cutoff": True})
-            return releasefile.file.getfile()
-
+    def _getpath(self, releasefile):
         file_id = str(releasefile.file.id)
         organization_id = str(releasefile.organization_id)
         file_path = os.path.join(self.cache_path, organization_id, file_id)
@@ -165,9 +178,36 @@ class ReleaseFileCache:
             releasefile.file.save_to(file_path)
             hit = False
 
+        return file_path, hit
+
+    def getfile(self, releasefile):
+        cutoff = options.get("releasefile.cache-limit")
+        file_size = releasefile.file.size
+        if file_size < cutoff:
+            metrics.timing("release_file.cache.get.size", file_size, tags={"cutoff": True})
+            return releasefile.file.getfile()
+
+        file_path, hit = self._getpath(releasefile)
+
         metrics.timing("release_file.cache.get.size", file_size, tags={"hit": hit, "cutoff": False})
         return FileObj(open(file_path, "rb"))
 
+    def getarchive(self, releasefile) -> "MappedReleaseArchive":
+        """Return the release archive stored in ``releasefile``, memory-mapped
+        from the local cache.
+
+        Regardless of ``releasefile.cache-limit``, archives are always cached on
+        disk. Opened archives are shared and must not be closed by the caller.
+        """
+        archive = self._archives.get(releasefile.file.id)
+        if archive is None:
+            file_path, hit = self._getpath(releasefile)
+            metrics.incr("release_file.cache.get_archive", tags={"hit": hit}, skip_internal=True)
+            archive = MappedReleaseArchive(file_path)
+            self._archives.set(releasefile.file.id, archive)
+
+        return archive
+
     def clear_old_entries(self):
         clear_cached_files(self.cache_path)
 
@@ -224,6 +264,105 @@ class ReleaseArchive:
         return temp_dir
 
 
+class MappedReleaseArchive:
+    """Read-only, memory-mapped view of a release archive on local disk.
+
+    Instead of parsing the ZIP file and its manifest every time it is opened,
+    the location of every file is stored in an index file next to the
+    archive. A lookup is a dict probe followed by a view of the mapping, plus
+    decompression for deflated files.
+
+    Instances are shared by ``ReleaseFileCache``, so leaving the context
+    manager does not close the archive.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._entries_by_url = self._load_index(path)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc, value, tb):
+        pass
+
+    def close(self):
+        self._mmap.close()
+
+    def _load_index(self, path: str) -> dict:
+        index_path = path + ".index"
+        try:
+            with open(index_path, "rb") as f:
+                index = msgpack.unpackb(f.read())
+            if index["version"] == MAPPED_ARCHIVE_INDEX_VERSION:
+                return index["entries"]
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.warning("Failed to read release archive index %s", index_path, exc_info=True)
+
+        entries = self._build_index(path)
+        index_bytes = msgpack.packb(
+            {"version": MAPPED_ARCHIVE_INDEX_VERSION, "entries": entries}, use_bin_type=True
+        )
+
+        # Write atomically, other processes might be reading the index already
+        with NamedTemporaryFile(dir=os.path.dirname(index_path), delete=False) as f:
+            f.write(index_bytes)
+        os.replace(f.name, index_path)
+
+        return entries
+
+    def _build_index(self, path: str) -> dict:
+        """Map URLs to ``[offset, compressed size, size, compression, headers]``"""
+        entries = {}
+        with zipfile.ZipFile(path) as zip_file:
+            manifest = json.loads(zip_file.read("manifest.json").decode("utf-8"))
+            for filename, entry in manifest.get("files", {}).items():
+                info = zip_file.getinfo(filename)
+                if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                    raise ValueError(f"Unsupported compression in release archive: {filename}")
+                if info.flag_bits & 0x1:
+                    raise ValueError(f"Encrypted file in release archive: {filename}")
+
+                header = ZIP_LOCAL_HEADER.unpack_from(self._mmap, info.header_offset)
+                if header[0] != ZIP_LOCAL_HEADER_SIGNATURE:
+                    raise ValueError(f"Bad local file header in release archive: {filename}")
+                name_length, extra_length = header[-2:]
+                offset = info.header_offset + ZIP_LOCAL_HEADER.size + name_length + extra_length
+
+                entries[entry["url"]] = [
+                    offset,
+                    info.compress_size,
+                    info.file_size,
+                    info.compress_type,
+                    entry.get("headers", {}),
+                ]
+
+        return entries
+
+    def read_file_by_url(self, url: str) -> Tuple[Union[bytes, memoryview], dict]:
+        """Return file contents and headers.
+
+        Stored files are returned as a ``memoryview`` of the mapping without
+        copying them, deflated files are decompressed into ``bytes``.
+
+        May raise ``KeyError``
+        """
+        offset, compress_size, file_size, compress_type, headers = self._entries_by_url[url]
+        data = memoryview(self._mmap)[offset : offset + compress_size]
+        if compress_type == zipfile.ZIP_DEFLATED:
+            return zlib.decompress(data, -zlib.MAX_WBITS, file_size), headers
+
+        return data, headers
+
+
 class _ArtifactIndexData:
     """Holds data of artifact index and keeps track of changes"""
 
@@ -1,4 +1,5 @@
 from enum import Enum
+from uuid import uuid4
 
 from django.db import models
 from django.utils import timezone
@@ -53,12 +54,26 @@ class Rule(Model):
 
     @classmethod
     def get_for_project(cls, project_id):
+        return cls.get_for_project_with_version(project_id)[1]
+
+    @classmethod
+    def get_for_project_with_version(cls, project_id):
+        """
+        Returns a tuple of a version and the active rules of the project. The
+        version changes whenever the rules are reloaded after a rule of the
+        project was saved or deleted, so it can be used to cache data derived
+        from the rules.
+        """
         cache_key = f"project:{project_id}:rules"
-        rules_list = cache.get(cache_key)
-        if rules_list is None:
+        version_key = f"{cache_key}:version"
+        result = cache.get_many([cache_key, version_key])
+        rules_list = result.get(cache_key)
+        version = result.get(version_key)
+        if rules_list is None or version is None:
             rules_list = list(cls.objects.filter(project=project_id, status=RuleStatus.ACTIVE))
-            cache.set(cache_key, rules_list, 60)
-        return rules_list
+            version = uuid4().hex
+            cache.set_many({cache_key: rules_list, version_key: version}, 60)
+        return version, rules_list
 
     @property
     def created_by(self):
@@ -75,13 +90,13 @@ class Rule(Model):
     def delete(self, *args, **kwargs):
         rv = super().delete(*args, **kwargs)
         cache_key = f"project:{self.project_id}:rules"
-        cache.delete(cache_key)
+        cache.delete_many([cache_key, f"{cache_key}:version"])
         return rv
 
     def save(self, *args, **kwargs):
         rv = super().save(*args, **kwargs)
         cache_key = f"project:{self.project_id}:rules"
-        cache.delete(cache_key)
+        cache.delete_many([cache_key, f"{cache_key}:version"])
         return rv
 
     def get_audit_log_data(self):
@@ -1,8 +1,11 @@
+import struct
+from collections.abc import Mapping
 from threading import local
 
 import sentry_sdk
 from django.core.cache import InvalidCacheBackendError, caches
 
+from sentry import options
 from sentry.utils import json
 from sentry.utils.cache import memoize
 from sentry.utils.services import Service
@@ -22,6 +25,18 @@ json_dumps = json.JSONEncoder(
 
 json_loads = json._default_decoder.decode
 
+# Values written in the framed format start with a magic prefix that can never
+# start a JSON document, so they can be told apart from the newline-separated
+# format written by older versions.
+FRAMED_MAGIC = b"\x00NSF"
+
+# Magic prefix, number of entries.
+_frame_header = struct.Struct("<4sH")
+
+# Subkey length, payload offset, payload length. The subkey itself follows the
+# entry, the default subkey is stored as an empty string.
+_frame_entry = struct.Struct("<HII")
+
 
 class NodeStorage(local, Service):
     """
@@ -64,7 +79,9 @@ class NodeStorage(local, Service):
         "get",
         "get_multi",
         "set",
+        "set_many",
         "set_subkeys",
+        "set_subkeys_many",
         "cleanup",
         "validate",
         "bootstrap",
@@ -92,14 +109,60 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
-        lines_iter = iter(value.splitlines())
+        # Those keys should be statically known identifiers in the app, such as
+        # "unprocessed_event". There is really no reason to allow anything but
+        # ASCII here.
+        subkey = subkey.encode("ascii") if subkey is not None else None
+
+        if value.startswith(FRAMED_MAGIC):
+            payload = self._find_framed_payload(value, subkey)
+        else:
+            payload = self._find_line_payload(value, subkey)
+
+        if payload is None:
+            return None
+
+        return json_loads(payload)
+
+    def _find_framed_payload(self, value, subkey):
+        """
+        Looks up the payload of ``subkey`` in the header of a value written in
+        the framed format. Only the requested payload is copied out of
+        ``value``, the others are never touched.
+        """
+        view = memoryview(value)
+        _, count = _frame_header.unpack_from(view)
+        pos = _frame_header.size
+        subkey = subkey or b""
+
+        for _ in range(count):
+            key_length, offset, length = _frame_entry.unpack_from(view, pos)
+            pos += _frame_entry.size
+            if view[pos : pos + key_length] == subkey:
+                return bytes(view[offset : offset + length])
+            pos += key_length
+
+        return None
+
+    def _find_line_payload(self, value, subkey):
+        """
+        Looks up the payload of ``subkey`` in a value written in the
+        newline-separated format. Lines are scanned in place instead of
+        splitting the whole value up front.
+        """
+
+        def iter_lines():
+            start = 0
+            while start < len(value):
+                end = value.find(b"\n", start)
+                if end == -1:
+                    end = len(value)
+                yield value[start:end]
+                start = end + 1
+
+        lines_iter = iter_lines()
         try:
             if subkey is not None:
-                # Those keys should be statically known identifiers in the app, such as
-                # "unprocessed_event". There is really no reason to allow anything but
-                # ASCII here.
-                subkey = subkey.encode("ascii")
-
                 next(lines_iter)
 
                 for line in lines_iter:
@@ -108,7 +171,7 @@ class NodeStorage(local, Service):
 
                     next(lines_iter)
 
-            return json_loads(next(lines_iter))
+            return next(lines_iter)
         except StopIteration:
             return None
 
@@ -199,17 +262,48 @@ class NodeStorage(local, Service):
 
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
         b'{"stacktrace": {}}\nunprocessed\n{}'
+
+        With the ``nodestore.framed-encoding`` option enabled, values with
+        subkeys are instead prefixed with a header holding the offset of every
+        payload, so that reads can jump straight to the subkey they need.
         """
-        lines = [json_dumps(data.pop(None)).encode("utf8")]
+        items = [(b"", json_dumps(data.pop(None)).encode("utf8"))]
         for key, value in data.items():
-            lines.append(key.encode("ascii"))
-            lines.append(json_dumps(value).encode("utf8"))
+            items.append((key.encode("ascii"), json_dumps(value).encode("utf8")))
+
+        if len(items) == 1 or not options.get("nodestore.framed-encoding"):
+            lines = [items[0][1]]
+            for key, payload in items[1:]:
+                lines.append(key)
+                lines.append(payload)
+
+            return b"\n".join(lines)
+
+        offset = _frame_header.size + sum(_frame_entry.size + len(key) for key, _ in items)
+        header = [_frame_header.pack(FRAMED_MAGIC, len(items))]
+        for key, payload in items:
+            header.append(_frame_entry.pack(len(key), offset, len(payload)))
+            header.append(key)
+            offset += len(payload)
 
-        return b"\n".join(lines)
+        return b"".join(header + [payload for _, payload in items])
 
-    def _set_bytes(self, id, data, ttl=None):
+    def _get_platform(self, data):
         """
-        >>> nodestore.set('key1', b"{'foo': 'bar'}")
+        Returns the platform of the event stored as the default subkey, which
+        backends use to select the dictionary to compress the node with.
+
+        >>> _get_platform({None: {"platform": "python"}})
+        'python'
+        """
+        value = data.get(None)
+        if isinstance(value, Mapping):
+            return value.get("platform")
+        return None
+
+    def _set_bytes(self, id, data, ttl=None, platform=None):
+        """
+        >>> nodestore._set_bytes('key1', b"{'foo': 'bar'}", platform='python')
         """
         raise NotImplementedError
 
@@ -238,11 +332,57 @@ class NodeStorage(local, Service):
         """
         with sentry_sdk.start_span(op="nodestore.set_subkeys"):
             cache_item = data.get(None)
+            platform = self._get_platform(data)
             bytes_data = self._encode(data)
-            self._set_bytes(id, bytes_data, ttl=ttl)
+            self._set_bytes(id, bytes_data, ttl=ttl, platform=platform)
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
 
+    def _set_bytes_multi(self, items, ttl=None, platforms=None):
+        """
+        >>> nodestore._set_bytes_multi({
+        ...     'key1': b"{'foo': 'bar'}",
+        ...     'key2': b"{'foo': 'baz'}",
+        ... }, platforms={'key1': 'python'})
+        """
+        platforms = platforms or {}
+        for id, data in items.items():
+            self._set_bytes(id, data, ttl=ttl, platform=platforms.get(id))
+
+    def set_many(self, items, ttl=None):
+        """
+        Set values for multiple ids. Like `set`, this deletes existing subkeys.
+
+        Note: This is not guaranteed to be atomic and may result in a partial
+        write.
+
+        >>> nodestore.set_many({'key1': {'foo': 'bar'}, 'key2': {'foo': 'baz'}})
+        """
+        return self.set_subkeys_many({id: {None: data} for id, data in items.items()}, ttl=ttl)
+
+    def set_subkeys_many(self, items, ttl=None):
+        """
+        Set values and subkeys for multiple ids in as few writes as the backend
+        allows.
+
+        Note: This is not guaranteed to be atomic and may result in a partial
+        write.
+
+        >>> nodestore.set_subkeys_many({
+        ...     'key1': {None: {'foo': 'bar'}, "unprocessed": {'foo': 'bam'}},
+        ...     'key2': {None: {'foo': 'baz'}},
+        ... })
+        """
+        with sentry_sdk.start_span(op="nodestore.set_subkeys_many") as span:
+            span.set_tag("num_ids", len(items))
+
+            cache_items = {id: data.get(None) for id, data in items.items()}
+            platforms = {id: self._get_platform(data) for id, data in items.items()}
+            bytes_items = {id: self._encode(data) for id, data in items.items()}
+            self._set_bytes_multi(bytes_items, ttl=ttl, platforms=platforms)
+            # set cache only after encoding and write to nodestore has succeeded
+            self._set_cache_items({id: data for id, data in cache_items.items() if data})
+
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
 
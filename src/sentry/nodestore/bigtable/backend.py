@@ -17,7 +17,14 @@ class BigtableNodeStorage(NodeStorage):
     :param default_ttl: How many days keys should be stored (and considered
         valid for reading + returning)
     :param compression: A boolean whether to enable zlib-compression, or the
-        string "zstd" to use zstd.
+        string "zstd" to use zstd, or "zstd-dictionary" to use zstd with the
+        trained ``compression_dictionaries``.
+    :param compression_dictionaries: Paths of zstd dictionaries by platform,
+        as written by ``sentry nodestore train-dictionary``. Values are
+        compressed with the dictionary of their event's platform, or the one
+        of the ``"default"`` platform. A platform may map to a list of paths
+        to keep older dictionaries readable, the first one is used for
+        compression.
 
     >>> BigtableNodeStorage(
     ...     project='some-project',
@@ -38,6 +45,7 @@ class BigtableNodeStorage(NodeStorage):
         automatic_expiry=False,
         default_ttl=None,
         compression=False,
+        compression_dictionaries=None,
         **client_options,
     ):
         if compression is True:
@@ -51,6 +59,7 @@ class BigtableNodeStorage(NodeStorage):
             table_name=table,
             default_ttl=default_ttl,
             compression=compression,
+            compression_dictionaries=compression_dictionaries,
             client_options=client_options,
         )
         self.automatic_expiry = automatic_expiry
@@ -64,8 +73,11 @@ class BigtableNodeStorage(NodeStorage):
         rv.update(self.store.get_many(id_list))
         return rv
 
-    def _set_bytes(self, id, data, ttl=None):
-        self.store.set(id, data, ttl)
+    def _set_bytes(self, id, data, ttl=None, platform=None):
+        self.store.set(id, data, ttl, platform=platform)
+
+    def _set_bytes_multi(self, items, ttl=None, platforms=None):
+        self.store.set_many(list(items.items()), ttl, platforms=platforms)
 
     def delete(self, id):
         if self.skip_deletes:
@@ -1,12 +1,17 @@
+import base64
 import logging
 import math
 import pickle
+import zlib
 
+import zstandard
+from django.db import connections, router
 from django.utils import timezone
 
 from sentry.db.models import create_or_update
-from sentry.nodestore.base import NodeStorage
-from sentry.utils.strings import compress, decompress
+from sentry.nodestore.base import FRAMED_MAGIC, NodeStorage
+from sentry.utils.codecs import ZstdDictionaryCodec
+from sentry.utils.strings import compress
 
 from .models import Node
 
@@ -14,6 +19,35 @@ logger = logging.getLogger("sentry")
 
 
 class DjangoNodeStorage(NodeStorage):
+    """
+    A Django-based backend for storing node data.
+
+    :param compression_dictionaries: Paths of zstd dictionaries by platform,
+        as written by ``sentry nodestore train-dictionary``. If given, nodes
+        are compressed with zstd instead of zlib, using the dictionary of
+        their event's platform or the one of the ``"default"`` platform. A
+        platform may map to a list of paths, the first one is used for
+        compression. Nodes compressed with either are always readable, as
+        long as their dictionary is still configured.
+    """
+
+    def __init__(self, compression_dictionaries=None):
+        self.compression_codec = ZstdDictionaryCodec.from_files(compression_dictionaries or {})
+
+    def _compress(self, data, platform=None):
+        if not self.compression_codec.compression_dictionaries:
+            return compress(data)
+
+        compressed = self.compression_codec.encode(data, platform=platform)
+        return base64.b64encode(compressed).decode("utf-8")
+
+    def _decompress(self, data):
+        data = base64.b64decode(data)
+        if data.startswith(zstandard.FRAME_HEADER):
+            return self.compression_codec.decode(data)
+
+        return zlib.decompress(data)
+
     def delete(self, id):
         Node.objects.filter(id=id).delete()
         self._delete_cache_item(id)
@@ -23,7 +57,7 @@ class DjangoNodeStorage(NodeStorage):
             return None
 
         try:
-            if value.startswith(b"{"):
+            if value.startswith((b"{", FRAMED_MAGIC)):
                 return NodeStorage._decode(self, value, subkey=subkey)
 
             if subkey is None:
@@ -37,19 +71,55 @@ class DjangoNodeStorage(NodeStorage):
     def _get_bytes(self, id):
         try:
             data = Node.objects.get(id=id).data
-            return decompress(data)
+            return self._decompress(data)
         except Node.DoesNotExist:
             return None
 
     def _get_bytes_multi(self, id_list):
-        return {n.id: decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
+        return {n.id: self._decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
 
     def delete_multi(self, id_list):
         Node.objects.filter(id__in=id_list).delete()
         self._delete_cache_items(id_list)
 
-    def _set_bytes(self, id, data, ttl=None):
-        create_or_update(Node, id=id, values={"data": compress(data), "timestamp": timezone.now()})
+    def _set_bytes(self, id, data, ttl=None, platform=None):
+        create_or_update(
+            Node,
+            id=id,
+            values={"data": self._compress(data, platform), "timestamp": timezone.now()},
+        )
+
+    def _set_bytes_multi(self, items, ttl=None, platforms=None):
+        if not items:
+            return
+
+        connection = connections[router.db_for_write(Node)]
+        if connection.vendor != "postgresql":
+            return NodeStorage._set_bytes_multi(self, items, ttl=ttl, platforms=platforms)
+
+        # Upsert all nodes with a single statement instead of one
+        # update-or-insert roundtrip per node.
+        qn = connection.ops.quote_name
+        timestamp = timezone.now()
+        platforms = platforms or {}
+        params = []
+        for id, data in items.items():
+            params.extend((id, self._compress(data, platforms.get(id)), timestamp))
+
+        sql = (
+            "INSERT INTO {table} ({id}, {data}, {timestamp}) VALUES {values} "
+            "ON CONFLICT ({id}) DO UPDATE SET "
+            "{data} = EXCLUDED.{data}, {timestamp} = EXCLUDED.{timestamp}"
+        ).format(
+            table=qn(Node._meta.db_table),
+            id=qn("id"),
+            data=qn("data"),
+            timestamp=qn("timestamp"),
+            values=", ".join(["(%s, %s, %s)"] * len(items)),
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
 
     def cleanup(self, cutoff_timestamp):
         from sentry.db.deletion import BulkDeleteQuery
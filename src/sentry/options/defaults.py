@@ -342,6 +342,28 @@ register("store.load-shed-process-event-projects", type=Any, default=[])
 # Killswitch for dropping events in symbolicate_event
 register("store.load-shed-symbolicate-event-projects", type=Any, default=[])
 
+# Write events to nodestore in a background thread while save_event does the
+# remaining bookkeeping. The write always completes before the event is
+# published to the eventstream.
+register("store.nodestore-async-flush", default=False)
+
+# Write nodestore values with subkeys in the framed format, which allows
+# decoding a single subkey without scanning the whole value. Only enable once
+# every reader understands the format.
+register("nodestore.framed-encoding", default=False)
+
+# Write the events of an ingest consumer batch to the processing store at once
+# instead of one by one. Only applies when the consumer has no thread pool.
+register("store.ingest-batch-store", default=False)
+
+# Look up grouphashes of known groups in the shared cache before going to
+# Postgres in `_save_aggregate`
+register("store.grouphash-cache", default=False)
+
+# Hand a compact envelope of the event to post_process_group and only keep a
+# marker in the processing store instead of the full event payload
+register("store.post-process-envelope", default=False)
+
 # Store release files bundled as zip files
 register("processing.save-release-archives", default=False)  # unused
 
@@ -352,8 +374,28 @@ register("processing.release-archive-min-files", default=10)
 # Try to read release artifacts from zip archives
 register("processing.use-release-archives-sample-rate", default=0.0)  # unused
 
+# Read release archives from memory-mapped files on local disk instead of
+# loading them from the cache and opening them for every artifact
+register("processing.mmap-release-archives", default=False)
+
 # All Relay options (statically authenticated Relays can be registered here)
 register("relay.static_auth", default={}, flags=FLAG_NOSTORE)
 
+# Write buffer filters and extra values with the msgpack codec instead of
+# pickle. Readers understand both encodings.
+register("buffer.msgpack-codec", default=False)
+
 # Use rapidjson in post process forwarder
 register("post-process-forwarder:rapidjson", default=False)
+
+# Schedule digests with one task per partition of the digest backend, and
+# deliver ready digests in batches that share their database and TSDB lookups
+register("digests.partitioned-scheduling", default=False)
+
+# Build the weekly reports of an organization for all of its projects at once
+# instead of querying TSDB, Postgres and Snuba once per project
+register("reports.organization-builder", default=False)
+
+# Deliver the weekly reports of an organization with a single task that
+# shares the report context between members and sends the emails in batches
+register("reports.organization-delivery", default=False)
@@ -16,6 +16,11 @@ CACHE_UPDATE_ERR = "Unable to update option cache for %s"
 
 logger = logging.getLogger("sentry")
 
+# Stored in the local cache for options that have no value in the database,
+# so that options that are never set (such as most killswitches) don't cause
+# a cache and database lookup on every access.
+_MISSING = object()
+
 
 def _make_cache_key(key):
     return "o:%s" % md5_text(key).hexdigest()
@@ -57,6 +62,8 @@ class OptionsStore:
         Fetches a value from the options store.
         """
         result = self.get_cache(key, silent=silent)
+        if result is _MISSING:
+            return None
         if result is not None:
             return result
 
@@ -66,7 +73,10 @@ class OptionsStore:
 
         # As a last ditch effort, let's hope we have a key
         # in local cache that's possibly stale
-        return self.get_local_cache(key, force_grace=True)
+        result = self.get_local_cache(key, force_grace=True)
+        if result is _MISSING:
+            return None
+        return result
 
     def get_cache(self, key, silent=False):
         """
@@ -152,7 +162,13 @@ class OptionsStore:
         """
         try:
             value = self.model.objects.get(key=key.name).value
-        except (self.model.DoesNotExist, ProgrammingError, OperationalError):
+        except self.model.DoesNotExist:
+            value = None
+            # Remember the miss locally, it is replaced as soon as the option
+            # is set through this store or once it expires.
+            if self.cache is not None and key.ttl > 0:
+                self._local_cache[key.cache_key] = _make_cache_value(key, _MISSING)
+        except (ProgrammingError, OperationalError):
             value = None
         except Exception:
             if not silent:
@@ -58,7 +58,7 @@ class BaseEventFrequencyCondition(EventCondition):
 
         super().__init__(*args, **kwargs)
 
-    def passes(self, event, state):
+    def passes(self, event, state, rate_cache=None):
         interval = self.get_option("interval")
         try:
             value = float(self.get_option("value"))
@@ -68,7 +68,9 @@ class BaseEventFrequencyCondition(EventCondition):
         if not interval:
             return False
 
-        current_value = self.get_rate(event, interval, self.rule.environment_id)
+        current_value = self.get_rate(
+            event, interval, self.rule.environment_id, rate_cache=rate_cache
+        )
         return current_value > value
 
     def query(self, event, start, end, environment_id):
@@ -86,7 +88,29 @@ class BaseEventFrequencyCondition(EventCondition):
         """ """
         raise NotImplementedError  # subclass must implement
 
-    def get_rate(self, event, interval, environment_id):
+    def get_rate_cache_key(self, event, interval, environment_id):
+        """
+        Returns the key under which the rate is shared with other conditions
+        evaluated for the same event. Subclasses whose rate depends on more
+        than the interval and environment have to extend it.
+        """
+        return (self.__class__, event.group_id, interval, environment_id)
+
+    def get_rate(self, event, interval, environment_id, rate_cache=None):
+        """
+        Returns the rate for the given interval. Rates are looked up in and
+        stored to ``rate_cache`` if given, so that conditions evaluated for
+        the same event share their results.
+        """
+        if rate_cache is not None:
+            key = self.get_rate_cache_key(event, interval, environment_id)
+            if key not in rate_cache:
+                rate_cache[key] = self._get_rate(event, interval, environment_id)
+            return rate_cache[key]
+
+        return self._get_rate(event, interval, environment_id)
+
+    def _get_rate(self, event, interval, environment_id):
         _, duration = self.intervals[interval]
         end = timezone.now()
         return self.query(event, end - duration, end, environment_id=environment_id)
@@ -4,16 +4,33 @@ from datetime import timedelta
 from random import randrange
 
 from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
 from django.utils import timezone
 
 from sentry import analytics
 from sentry.models import GroupRuleStatus, Rule
 from sentry.rules import EventState, rules
+from sentry.rules.conditions.event_frequency import BaseEventFrequencyCondition
+from sentry.utils.cache import LRUCache
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import safe_execute
 
 RuleFuture = namedtuple("RuleFuture", ["rule", "kwargs"])
 
+# A rule with its conditions and filters already instantiated. Cheap
+# predicates are ordered before expensive (TSDB or Snuba backed) ones.
+RulePlan = namedtuple(
+    "RulePlan", ["rule", "condition_match", "filter_match", "frequency", "conditions", "filters"]
+)
+
+# Compiled plans keyed by project ID and the version of its rules. Saving or
+# deleting a rule changes the version, so stale plans are never looked up again.
+_rule_plan_cache = LRUCache(10000, ttl=300)
+
+
+def is_expensive(condition):
+    return isinstance(condition, BaseEventFrequencyCondition)
+
 
 class RuleProcessor:
     logger = logging.getLogger("sentry.rules")
@@ -29,17 +46,53 @@ class RuleProcessor:
         self.has_reappeared = has_reappeared
 
         self.grouped_futures = {}
+        self.rate_cache = {}
+
+    def get_rule_plans(self):
+        """
+        Get the compiled plans of all rules for this project. Plans are shared
+        between events until a rule of the project changes.
 
-    def get_rules(self):
+        :return: a tuple of `RulePlan`s
+        """
+        version, rule_list = Rule.get_for_project_with_version(self.project.id)
+        key = (self.project.id, version)
+        plans = _rule_plan_cache.get(key)
+        if plans is None:
+            plans = tuple(self.compile_rule(rule) for rule in rule_list)
+            _rule_plan_cache.set(key, plans)
+        return plans
+
+    def compile_rule(self, rule):
         """
-        Get all of the rules for this project from the DB (or cache).
+        Instantiate the conditions and filters of a rule.
 
-        :return: a list of `Rule`s
+        :param rule: `Rule` object
+        :return: a `RulePlan`
         """
-        return Rule.get_for_project(self.project.id)
+        condition_list = []
+        filter_list = []
+        for rule_cond in rule.data.get("conditions", ()):
+            condition = self.get_condition(rule_cond, rule)
+            if condition is not None and condition.rule_type == "condition/event":
+                condition_list.append(condition)
+            else:
+                filter_list.append(condition)
+
+        return RulePlan(
+            rule=rule,
+            condition_match=rule.data.get("action_match") or Rule.DEFAULT_CONDITION_MATCH,
+            filter_match=rule.data.get("filter_match") or Rule.DEFAULT_FILTER_MATCH,
+            frequency=rule.data.get("frequency") or Rule.DEFAULT_FREQUENCY,
+            conditions=tuple(sorted(condition_list, key=is_expensive)),
+            filters=tuple(sorted(filter_list, key=is_expensive)),
+        )
+
+    def _get_rule_status_key(self, rule_id):
+        return "grouprulestatus:1:%s" % hash_values([self.group.id, rule_id])
 
     def get_rule_status(self, rule):
-        key = "grouprulestatus:1:%s" % hash_values([self.group.id, rule.id])
+        key = self._get_rule_status_key(rule.id)
         rule_status = cache.get(key)
         if rule_status is None:
             rule_status, _ = GroupRuleStatus.objects.get_or_create(
@@ -48,22 +101,80 @@ class RuleProcessor:
             cache.set(key, rule_status, 300)
         return rule_status
 
-    def condition_matches(self, condition, state, rule):
+    def bulk_get_rule_status(self, rule_list):
+        """
+        Like ``get_rule_status``, but for many rules at once. Statuses are
+        read with a single cache lookup, and missing ones are fetched and
+        created in bulk.
+
+        :return: a mapping of rule IDs to `GroupRuleStatus`es
+        """
+        keys = {self._get_rule_status_key(rule.id): rule.id for rule in rule_list}
+        rule_statuses = {keys[key]: status for key, status in cache.get_many(keys).items()}
+
+        missing_rule_ids = set(keys.values()) - rule_statuses.keys()
+        if not missing_rule_ids:
+            return rule_statuses
+
+        fetched_statuses = {
+            status.rule_id: status
+            for status in GroupRuleStatus.objects.filter(
+                group=self.group, rule_id__in=missing_rule_ids
+            )
+        }
+
+        to_create = missing_rule_ids - fetched_statuses.keys()
+        if to_create:
+            try:
+                with transaction.atomic(using=router.db_for_write(GroupRuleStatus)):
+                    created_statuses = GroupRuleStatus.objects.bulk_create(
+                        [
+                            GroupRuleStatus(rule_id=rule_id, group=self.group, project=self.project)
+                            for rule_id in to_create
+                        ]
+                    )
+            except IntegrityError:
+                # Another event for this group created some of the statuses
+                # concurrently, fall back to creating them one by one.
+                created_statuses = [
+                    GroupRuleStatus.objects.get_or_create(
+                        rule_id=rule_id, group=self.group, defaults={"project": self.project}
+                    )[0]
+                    for rule_id in to_create
+                ]
+
+            for status in created_statuses:
+                fetched_statuses[status.rule_id] = status
+
+        cache.set_many(
+            {
+                self._get_rule_status_key(status.rule_id): status
+                for status in fetched_statuses.values()
+            },
+            300,
+        )
+        rule_statuses.update(fetched_statuses)
+        return rule_statuses
+
+    def get_condition(self, condition, rule):
         condition_cls = rules.get(condition["id"])
         if condition_cls is None:
-            self.logger.warning("Unregistered condition %r", condition["id"])
+            self.logger.warning("Unregistered condition or filter %r", condition["id"])
             return
 
-        condition_inst = condition_cls(self.project, data=condition, rule=rule)
-        return safe_execute(condition_inst.passes, self.event, state, _with_transaction=False)
+        return condition_cls(self.project, data=condition, rule=rule)
 
-    def get_rule_type(self, condition):
-        rule_cls = rules.get(condition["id"])
-        if rule_cls is None:
-            self.logger.warning("Unregistered condition or filter %r", condition["id"])
+    def condition_matches(self, condition, state):
+        if condition is None:
             return
 
-        return rule_cls.rule_type
+        kwargs = {}
+        if is_expensive(condition):
+            # All frequency conditions of this event share their results, so
+            # that rules with the same condition do not query it repeatedly.
+            kwargs["rate_cache"] = self.rate_cache
+
+        return safe_execute(condition.passes, self.event, state, _with_transaction=False, **kwargs)
 
     def get_state(self):
         return EventState(
@@ -82,69 +193,51 @@ class RuleProcessor:
             return lambda bool_iter: not any(bool_iter)
         return None
 
-    def apply_rule(self, rule):
+    def apply_rule(self, plan, status):
         """
         If all conditions and filters pass, execute every action.
 
-        :param rule: `Rule` object
+        :param plan: `RulePlan` of the rule
+        :param status: the `GroupRuleStatus` of the rule for this group
         :return: void
         """
-        condition_match = rule.data.get("action_match") or Rule.DEFAULT_CONDITION_MATCH
-        filter_match = rule.data.get("filter_match") or Rule.DEFAULT_FILTER_MATCH
-        rule_condition_list = rule.data.get("conditions", ())
-        frequency = rule.data.get("frequency") or Rule.DEFAULT_FREQUENCY
-
-        if (
-            rule.environment_id is not None
-            and self.event.get_environment().id != rule.environment_id
-        ):
-            return
-
-        status = self.get_rule_status(rule)
+        rule = plan.rule
 
         now = timezone.now()
-        freq_offset = now - timedelta(minutes=frequency)
+        freq_offset = now - timedelta(minutes=plan.frequency)
 
         if status.last_active and status.last_active > freq_offset:
             return
 
         state = self.get_state()
 
-        condition_list = []
-        filter_list = []
-        for rule_cond in rule_condition_list:
-            if self.get_rule_type(rule_cond) == "condition/event":
-                condition_list.append(rule_cond)
-            else:
-                filter_list.append(rule_cond)
-
-        # if conditions exist evaluate them, otherwise move to the filters section
-        if condition_list:
-            condition_iter = (self.condition_matches(c, state, rule) for c in condition_list)
-
-            condition_func = self.get_match_function(condition_match)
-            if condition_func:
-                condition_passed = condition_func(condition_iter)
-            else:
+        # both conditions and filters have to pass, if they exist
+        predicate_groups = []
+        if plan.conditions:
+            condition_func = self.get_match_function(plan.condition_match)
+            if not condition_func:
                 self.logger.error(
-                    "Unsupported condition_match %r for rule %d", condition_match, rule.id
+                    "Unsupported condition_match %r for rule %d", plan.condition_match, rule.id
                 )
                 return
+            predicate_groups.append((condition_func, plan.conditions))
 
-            if not condition_passed:
-                return
-
-        # if filters exist evaluate them, otherwise pass
-        if filter_list:
-            filter_iter = (self.condition_matches(f, state, rule) for f in filter_list)
-            filter_func = self.get_match_function(filter_match)
-            if filter_func:
-                passed = filter_func(filter_iter)
-            else:
-                self.logger.error("Unsupported filter_match %r for rule %d", filter_match, rule.id)
+        if plan.filters:
+            filter_func = self.get_match_function(plan.filter_match)
+            if not filter_func:
+                self.logger.error(
+                    "Unsupported filter_match %r for rule %d", plan.filter_match, rule.id
+                )
                 return
-        else:
-            passed = True
+            predicate_groups.append((filter_func, plan.filters))
+
+        # evaluate the group without expensive predicates first, so that the
+        # expensive ones can be skipped if the rule does not match anyway
+        predicate_groups.sort(key=lambda group: any(map(is_expensive, group[1])))
+        passed = all(
+            match_func(self.condition_matches(predicate, state) for predicate in predicates)
+            for match_func, predicates in predicate_groups
+        )
 
         if passed:
             passed = (
@@ -194,6 +287,16 @@ class RuleProcessor:
             return {}.values()
 
         self.grouped_futures.clear()
-        for rule in self.get_rules():
-            self.apply_rule(rule)
+        self.rate_cache.clear()
+
+        plans = [
+            plan
+            for plan in self.get_rule_plans()
+            if plan.rule.environment_id is None
+            or self.event.get_environment().id == plan.rule.environment_id
+        ]
+        rule_statuses = self.bulk_get_rule_status([plan.rule for plan in plans])
+
+        for plan in plans:
+            self.apply_rule(plan, rule_statuses[plan.rule.id])
         return self.grouped_futures.values()
@@ -0,0 +1,105 @@
+import os
+from datetime import timedelta
+
+import click
+
+from sentry.runner.decorators import configuration
+
+
+@click.group()
+def nodestore():
+    "Manage the node storage."
+
+
+@nodestore.command("train-dictionary")
+@click.argument(
+    "outdir", type=click.Path(file_okay=False, dir_okay=True, writable=True), required=True
+)
+@click.option(
+    "--project",
+    "project_ids",
+    type=int,
+    multiple=True,
+    required=True,
+    help="Project to sample events from. May be passed multiple times.",
+)
+@click.option(
+    "--platform",
+    "platforms",
+    multiple=True,
+    help="Train a dictionary on events of the given platform. May be passed multiple times. "
+    'The "default" platform samples events of all platforms.',
+)
+@click.option("--days", default=7, show_default=True, help="Sample events of the last N days.")
+@click.option("--samples", default=10000, show_default=True, help="Number of events to sample.")
+@click.option(
+    "--size", default=1024 * 110, show_default=True, help="Size of the dictionary in bytes."
+)
+@configuration
+def train_dictionary(outdir, project_ids, platforms, days, samples, size):
+    """
+    Train zstd compression dictionaries from a sample of node payloads.
+
+    One dictionary is trained per platform and written to
+    OUTDIR/<platform>.zdict. The files can be passed to the nodestore with
+    the ``compression_dictionaries`` option, which maps platforms to their
+    dictionary. Without any platform, only the "default" dictionary is
+    trained, which is used for all platforms without their own dictionary.
+    """
+    import zstandard
+    from django.utils import timezone
+
+    from sentry import eventstore, nodestore
+    from sentry.eventstore.models import Event
+    from sentry.nodestore.base import json_dumps
+    from sentry.utils import json
+    from sentry.utils.codecs import ZstdDictionaryCodec
+    from sentry.utils.iterators import chunked
+
+    os.makedirs(outdir, exist_ok=True)
+    end = timezone.now()
+
+    paths = {}
+    for platform in platforms or [ZstdDictionaryCodec.DEFAULT_PLATFORM]:
+        if platform == ZstdDictionaryCodec.DEFAULT_PLATFORM:
+            conditions = []
+        else:
+            conditions = [["platform", "=", platform]]
+
+        events = eventstore.get_unfetched_events(
+            eventstore.Filter(
+                project_ids=list(project_ids),
+                start=end - timedelta(days=days),
+                end=end,
+                conditions=conditions,
+            ),
+            limit=samples,
+            referrer="nodestore.train_dictionary",
+        )
+        node_ids = [Event.generate_node_id(event.project_id, event.event_id) for event in events]
+
+        payloads = []
+        with click.progressbar(length=len(node_ids), label=f"Fetching {platform} payloads") as bar:
+            for chunk in chunked(node_ids, 100):
+                for data in nodestore.get_multi(chunk).values():
+                    if data:
+                        payloads.append(json_dumps(data).encode("utf8"))
+                bar.update(len(chunk))
+
+        if not payloads:
+            raise click.ClickException(
+                f"No {platform} payloads found to train the dictionary with."
+            )
+
+        dictionary = zstandard.train_dictionary(size, payloads)
+        paths[platform] = os.path.join(outdir, f"{platform}.zdict")
+        with open(paths[platform], "wb") as f:
+            f.write(dictionary.as_bytes())
+
+        click.echo(
+            f"Trained {platform} dictionary {dictionary.dict_id()} ({len(dictionary)} bytes) "
+            f"from {len(payloads)} payloads.",
+            err=True,
+        )
+
+    click.echo(json.dumps({"compression_dictionaries": paths}, indent=2))
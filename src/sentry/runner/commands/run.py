@@ -1,6 +1,6 @@
 import signal
 import sys
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from multiprocessing import cpu_count
 
 import click
@@ -319,6 +319,12 @@ def cron(**options):
     type=click.Choice(["earliest", "latest"]),
     help="Position in the commit log topic to begin reading from when no prior offset has been recorded.",
 )
+@click.option(
+    "--batch-size",
+    default=1,
+    type=int,
+    help="How many messages to consume at once. Tasks for a batch are dispatched together.",
+)
 @log_options()
 @configuration
 def post_process_forwarder(**options):
@@ -332,6 +338,7 @@ def post_process_forwarder(**options):
             synchronize_commit_group=options["synchronize_commit_group"],
             commit_batch_size=options["commit_batch_size"],
             initial_offset_reset=options["initial_offset_reset"],
+            batch_size=options["batch_size"],
         )
     except ForwarderNotRequired:
         sys.stdout.write(
@@ -366,6 +373,12 @@ def post_process_forwarder(**options):
     type=click.Choice(["earliest", "latest"]),
     help="Force subscriptions to start from a particular offset",
 )
+@click.option(
+    "--batch-size",
+    default=1,
+    type=int,
+    help="How many messages to process together. Subscribers that support batches receive all of the updates of a batch at once.",
+)
 @log_options()
 @configuration
 def query_subscription_consumer(**options):
@@ -377,6 +390,7 @@ def query_subscription_consumer(**options):
         commit_batch_size=options["commit_batch_size"],
         initial_offset_reset=options["initial_offset_reset"],
         force_offset_reset=options["force_offset_reset"],
+        batch_size=options["batch_size"],
     )
 
     def handler(signum, frame):
@@ -472,6 +486,12 @@ def batching_kafka_options(group):
     default=None,
     help="Thread pool size (only utilitized for message types that support concurrent processing)",
 )
+@click.option(
+    "--processes",
+    type=int,
+    default=None,
+    help="Process pool size for parsing event payloads.",
+)
 @configuration
 def ingest_consumer(consumer_types, all_consumer_types, **options):
     """
@@ -500,7 +520,18 @@ def ingest_consumer(consumer_types, all_consumer_types, **options):
     else:
         executor = None
 
+    processes = options.pop("processes", None)
+    if processes is not None:
+        process_pool = ProcessPoolExecutor(processes)
+    else:
+        process_pool = None
+
     with metrics.global_tags(
         ingest_consumer_types=",".join(sorted(consumer_types)), _all_threads=True
     ):
-        get_ingest_consumer(consumer_types=consumer_types, executor=executor, **options).run()
+        get_ingest_consumer(
+            consumer_types=consumer_types,
+            executor=executor,
+            process_pool=process_pool,
+            **options,
+        ).run()
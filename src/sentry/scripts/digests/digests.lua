@@ -424,6 +424,44 @@ local commands = {
             arguments.truncation_chance
         )
     end,
+    ADD_MANY = function (cursor, arguments)
+        local cursor, configuration, options, records = multiple_argument_parser(
+            configuration_argument_parser,
+            object_argument_parser({
+                {"delay_increment", argument_parser(tonumber)},
+                {"delay_maximum", argument_parser(tonumber)},
+                {"timeline_capacity", argument_parser(tonumber)},
+                {"truncation_chance", argument_parser(tonumber)},
+            }),
+            variadic_argument_parser(
+                object_argument_parser({
+                    {"timeline_id", argument_parser()},
+                    {"record_id", argument_parser()},
+                    {"value", argument_parser()},
+                    {"timestamp", argument_parser(tonumber)},
+                })
+            )
+        )(cursor, arguments)
+
+        -- Lua booleans can't be returned as part of a table, so the ready
+        -- state of each record is returned as an integer instead.
+        local results = {}
+        for i, record in ipairs(records) do
+            local ready = add_record_to_timeline(
+                configuration,
+                record.timeline_id,
+                record.record_id,
+                record.value,
+                record.timestamp,
+                options.delay_increment,
+                options.delay_maximum,
+                options.timeline_capacity,
+                options.truncation_chance
+            )
+            results[i] = ready and 1 or 0
+        end
+        return results
+    end,
     DELETE = function (cursor, arguments)
         local cursor, configuration, timeline_id = multiple_argument_parser(
             configuration_argument_parser,
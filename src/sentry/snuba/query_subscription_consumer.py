@@ -1,6 +1,7 @@
 import logging
+from collections import defaultdict
 from random import random
-from typing import Any, Callable, Dict, Iterable, List, Optional, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, cast
 
 import jsonschema
 import pytz
@@ -20,7 +21,10 @@ logger = logging.getLogger(__name__)
 
 TQuerySubscriptionCallable = Callable[[Dict[str, Any], QuerySubscription], None]
 
+TQuerySubscriptionBatchCallable = Callable[[List[Tuple[Dict[str, Any], QuerySubscription]]], None]
+
 subscriber_registry: Dict[str, TQuerySubscriptionCallable] = {}
+batch_subscriber_registry: Dict[str, TQuerySubscriptionBatchCallable] = {}
 
 CONSUMER_TRANSACTION_SAMPLE_RATE = 0.01
 
@@ -37,6 +41,24 @@ def register_subscriber(
     return inner
 
 
+def register_batch_subscriber(
+    subscriber_key: str,
+) -> Callable[[TQuerySubscriptionBatchCallable], TQuerySubscriptionBatchCallable]:
+    """
+    Registers a callback that receives a list of `(update, subscription)` pairs when the
+    consumer processes messages in batches. Subscription types without a batch
+    subscriber have their updates passed to their regular subscriber one at a time.
+    """
+
+    def inner(func: TQuerySubscriptionBatchCallable) -> TQuerySubscriptionBatchCallable:
+        if subscriber_key in batch_subscriber_registry:
+            raise Exception("Batch handler already registered for %s" % subscriber_key)
+        batch_subscriber_registry[subscriber_key] = func
+        return func
+
+    return inner
+
+
 class InvalidMessageError(Exception):
     pass
 
@@ -50,6 +72,9 @@ class QuerySubscriptionConsumer:
     A Kafka consumer that processes query subscription update messages. Each message has
     a related subscription id and the latest values related to the subscribed query.
     These values are passed along to a callback associated with the subscription.
+
+    With a `batch_size` greater than one, messages are accumulated and handled together
+    (see `handle_messages`) once the batch is full or no more messages are available.
     """
 
     topic_to_dataset: Dict[str, QueryDatasets] = {
@@ -64,6 +89,7 @@ class QuerySubscriptionConsumer:
         commit_batch_size: int = 100,
         initial_offset_reset: str = "earliest",
         force_offset_reset: Optional[str] = None,
+        batch_size: int = 1,
     ):
         self.group_id = group_id
         if not topic:
@@ -73,6 +99,7 @@ class QuerySubscriptionConsumer:
         self.topic = topic
         cluster_name: str = settings.KAFKA_TOPICS[topic]["cluster"]
         self.commit_batch_size = commit_batch_size
+        self.batch_size = batch_size
         self.initial_offset_reset = initial_offset_reset
         self.offsets: Dict[int, Optional[int]] = {}
         self.consumer: Consumer = None
@@ -137,9 +164,15 @@ class QuerySubscriptionConsumer:
                 },
             )
 
+        batch: List[Message] = []
+
         def on_revoke(consumer: Consumer, partitions: List[TopicPartition]) -> None:
             partition_numbers = [partition.partition for partition in partitions]
             self.commit_offsets(partition_numbers)
+            # Pending messages from revoked partitions will be consumed by their new owner
+            batch[:] = [
+                message for message in batch if message.partition() not in partition_numbers
+            ]
             for partition_number in partition_numbers:
                 self.offsets.pop(partition_number, None)
             logger.info(
@@ -161,31 +194,46 @@ class QuerySubscriptionConsumer:
 
         self.consumer.subscribe([self.topic], on_assign=on_assign, on_revoke=on_revoke)
 
-        i = 0
+        uncommitted = 0
         while not self.__shutdown_requested:
             message = self.consumer.poll(0.1)
-            if message is None:
-                continue
-
-            error = message.error()
-            if error is not None:
-                raise KafkaException(error)
-
-            i = i + 1
+            if message is not None:
+                error = message.error()
+                if error is not None:
+                    raise KafkaException(error)
 
-            with sentry_sdk.start_transaction(
-                op="handle_message",
-                name="query_subscription_consumer_process_message",
-                sampled=random() <= CONSUMER_TRANSACTION_SAMPLE_RATE,
-            ), metrics.timer("snuba_query_subscriber.handle_message"):
-                self.handle_message(message)
+                batch.append(message)
 
-            # Track latest completed message here, for use in `shutdown` handler.
-            self.offsets[message.partition()] = message.offset() + 1
+            # Wait for a full batch, unless no more messages are available right now
+            if not batch or (message is not None and len(batch) < self.batch_size):
+                continue
 
-            if i % self.commit_batch_size == 0:
+            if len(batch) == 1:
+                with sentry_sdk.start_transaction(
+                    op="handle_message",
+                    name="query_subscription_consumer_process_message",
+                    sampled=random() <= CONSUMER_TRANSACTION_SAMPLE_RATE,
+                ), metrics.timer("snuba_query_subscriber.handle_message"):
+                    self.handle_message(batch[0])
+            else:
+                with sentry_sdk.start_transaction(
+                    op="handle_messages",
+                    name="query_subscription_consumer_process_messages",
+                    sampled=random() <= CONSUMER_TRANSACTION_SAMPLE_RATE,
+                ), metrics.timer("snuba_query_subscriber.handle_messages"):
+                    self.handle_messages(batch)
+
+            # Track latest completed messages here, for use in `shutdown` handler.
+            for message in batch:
+                self.offsets[message.partition()] = message.offset() + 1
+
+            uncommitted += len(batch)
+            batch.clear()
+
+            if uncommitted >= self.commit_batch_size:
                 logger.debug("Committing offsets")
                 self.commit_offsets()
+                uncommitted = 0
 
         logger.debug("Committing offsets and closing consumer")
         self.commit_offsets()
@@ -222,20 +270,8 @@ class QuerySubscriptionConsumer:
         :return:
         """
         with sentry_sdk.push_scope() as scope:
-            try:
-                with metrics.timer("snuba_query_subscriber.parse_message_value"):
-                    contents = self.parse_message_value(message.value())
-            except InvalidMessageError:
-                # If the message is in an invalid format, just log the error
-                # and continue
-                logger.exception(
-                    "Subscription update could not be parsed",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
+            contents = self.parse_message(message)
+            if contents is None:
                 return
             scope.set_tag("query_subscription_id", contents["subscription_id"])
 
@@ -244,37 +280,11 @@ class QuerySubscriptionConsumer:
                     subscription: QuerySubscription = QuerySubscription.objects.get_from_cache(
                         subscription_id=contents["subscription_id"]
                     )
-                    if subscription.status != QuerySubscription.Status.ACTIVE.value:
-                        metrics.incr("snuba_query_subscriber.subscription_inactive")
-                        return
             except QuerySubscription.DoesNotExist:
-                metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
-                logger.error(
-                    "Received subscription update, but subscription does not exist",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
-                try:
-                    _delete_from_snuba(
-                        self.topic_to_dataset[message.topic()], contents["subscription_id"]
-                    )
-                except Exception:
-                    logger.exception("Failed to delete unused subscription from snuba.")
+                self.handle_missing_subscription(message, contents)
                 return
 
-            if subscription.type not in subscriber_registry:
-                metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
-                logger.error(
-                    "Received subscription update, but no subscription handler registered",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
+            if not self.check_subscription(message, subscription):
                 return
 
             sentry_sdk.set_tag("project_id", subscription.project_id)
@@ -296,6 +306,115 @@ class QuerySubscriptionConsumer:
 
                 callback(contents, subscription)
 
+    def handle_messages(self, messages: List[Message]) -> None:
+        """
+        Handles a batch of messages like `handle_message`, but fetches all of their
+        subscriptions at once. Updates for subscription types with a batch subscriber are
+        passed to it in a single call, in the order they were consumed, while the updates
+        for other types are passed to their callback one at a time.
+        :param messages:
+        :return:
+        """
+        parsed = []
+        for message in messages:
+            contents = self.parse_message(message)
+            if contents is not None:
+                parsed.append((message, contents))
+
+        with metrics.timer("snuba_query_subscriber.fetch_subscriptions"):
+            subscriptions = {
+                subscription.subscription_id: subscription
+                for subscription in QuerySubscription.objects.get_many_from_cache(
+                    {contents["subscription_id"] for _, contents in parsed},
+                    key="subscription_id",
+                )
+            }
+
+        updates: Dict[str, List[Tuple[Dict[str, Any], QuerySubscription]]] = defaultdict(list)
+        for message, contents in parsed:
+            subscription = subscriptions.get(contents["subscription_id"])
+            if subscription is None:
+                self.handle_missing_subscription(message, contents)
+            elif self.check_subscription(message, subscription):
+                updates[subscription.type].append((contents, subscription))
+
+        for subscription_type, type_updates in updates.items():
+            metrics.incr(
+                "snuba_query_subscriber.batch_updates",
+                amount=len(type_updates),
+                tags={"type": subscription_type},
+            )
+            with sentry_sdk.start_span(op="process_messages") as span, metrics.timer(
+                "snuba_query_subscriber.callback.duration", instance=subscription_type
+            ):
+                span.set_data("subscription_type", subscription_type)
+                span.set_data("updates", len(type_updates))
+
+                if subscription_type in batch_subscriber_registry:
+                    batch_subscriber_registry[subscription_type](type_updates)
+                else:
+                    callback = subscriber_registry[subscription_type]
+                    for contents, subscription in type_updates:
+                        callback(contents, subscription)
+
+    def parse_message(self, message: Message) -> Optional[Dict[str, Any]]:
+        """
+        Parses the value of a message, logging and returning `None` if it's invalid.
+        """
+        try:
+            with metrics.timer("snuba_query_subscriber.parse_message_value"):
+                return self.parse_message_value(message.value())
+        except InvalidMessageError:
+            # If the message is in an invalid format, just log the error
+            # and continue
+            logger.exception(
+                "Subscription update could not be parsed",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return None
+
+    def handle_missing_subscription(self, message: Message, contents: Dict[str, Any]) -> None:
+        metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
+        logger.error(
+            "Received subscription update, but subscription does not exist",
+            extra={
+                "offset": message.offset(),
+                "partition": message.partition(),
+                "value": message.value(),
+            },
+        )
+        try:
+            _delete_from_snuba(self.topic_to_dataset[message.topic()], contents["subscription_id"])
+        except Exception:
+            logger.exception("Failed to delete unused subscription from snuba.")
+
+    def check_subscription(self, message: Message, subscription: QuerySubscription) -> bool:
+        """
+        Checks whether updates for the subscription should be passed to a callback, logging
+        metrics/errors if not.
+        """
+        if subscription.status != QuerySubscription.Status.ACTIVE.value:
+            metrics.incr("snuba_query_subscriber.subscription_inactive")
+            return False
+
+        if subscription.type not in subscriber_registry:
+            metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
+            logger.error(
+                "Received subscription update, but no subscription handler registered",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return False
+
+        return True
+
     def parse_message_value(self, value: str) -> Dict[str, Any]:
         """
         Parses the value received via the Kafka consumer and verifies that it
@@ -1,15 +1,32 @@
+import itertools
 import logging
+import sys
 import time
+from contextlib import ExitStack
 
+from sentry import options
 from sentry.digests import get_option_key
 from sentry.digests.backends.base import InvalidState
-from sentry.digests.notifications import build_digest, split_key
+from sentry.digests.notifications import build_digest, fetch_state, fetch_states, split_key
 from sentry.models import Project, ProjectOption
 from sentry.tasks.base import instrumented_task
 from sentry.utils import snuba
 
 logger = logging.getLogger(__name__)
 
+# The maximum (but hopefully not typical) expected delay can be roughly
+# calculated by adding together the schedule interval, the schedule timeout of
+# the slowest partition (or the sum of all of them when they are scheduled
+# serially), the expected duration of time an item spends waiting in the queue
+# to be processed for delivery and the expected duration of time an item takes
+# to be processed for delivery, so this timeout should be relatively high to
+# avoid requeueing items before they even had a chance to be processed.
+MAINTENANCE_TIMEOUT = 300
+
+# The maximum number of digests that are delivered by a single
+# ``deliver_digests`` task.
+DELIVERY_BATCH_SIZE = 20
+
 
 @instrumented_task(name="sentry.tasks.digests.schedule_digests", queue="digests.scheduling")
 def schedule_digests():
@@ -17,53 +34,118 @@ def schedule_digests():
 
     deadline = time.time()
 
-    # The maximum (but hopefully not typical) expected delay can be roughly
-    # calculated by adding together the schedule interval, the # of shards *
-    # schedule timeout (at least until these are able to be processed in
-    # parallel), the expected duration of time an item spends waiting in the
-    # queue to be processed for delivery and the expected duration of time an
-    # item takes to be processed for delivery, so this timeout should be
-    # relatively high to avoid requeueing items before they even had a chance
-    # to be processed.
-    timeout = 300
-    digests.maintenance(deadline - timeout)
+    if options.get("digests.partitioned-scheduling"):
+        for partition in digests.partitions():
+            schedule_digest_partition.delay(partition, deadline)
+        return
+
+    digests.maintenance(deadline - MAINTENANCE_TIMEOUT)
 
     for entry in digests.schedule(deadline):
         deliver_digest.delay(entry.key, entry.timestamp)
 
 
+@instrumented_task(
+    name="sentry.tasks.digests.schedule_digest_partition", queue="digests.scheduling"
+)
+def schedule_digest_partition(partition, deadline):
+    from sentry import digests
+
+    digests.maintenance(deadline - MAINTENANCE_TIMEOUT, partition=partition)
+
+    keys = [entry.key for entry in digests.schedule(deadline, partition=partition)]
+    for i in range(0, len(keys), DELIVERY_BATCH_SIZE):
+        deliver_digests.delay(keys[i : i + DELIVERY_BATCH_SIZE])
+
+
 @instrumented_task(name="sentry.tasks.digests.deliver_digest", queue="digests.delivery")
 def deliver_digest(key, schedule_timestamp=None):
+    deliver_digests([key])
+
+
+@instrumented_task(name="sentry.tasks.digests.deliver_digests", queue="digests.delivery")
+def deliver_digests(keys):
     from sentry import digests
     from sentry.mail import mail_adapter
 
-    try:
-        project, target_type, target_identifier = split_key(key)
-    except Project.DoesNotExist as error:
-        logger.info("Cannot deliver digest %r due to error: %s", key, error)
-        digests.delete(key)
-        return
+    targets = []
+    for key in keys:
+        try:
+            project, target_type, target_identifier = split_key(key)
+        except Project.DoesNotExist as error:
+            logger.info("Cannot deliver digest %r due to error: %s", key, error)
+            digests.delete(key)
+            continue
 
-    minimum_delay = ProjectOption.objects.get_value(
-        project, get_option_key("mail", "minimum_delay")
-    )
+        targets.append((key, project, target_type, target_identifier))
 
     with snuba.options_override({"consistent": True}):
-        try:
-            with digests.digest(key, minimum_delay=minimum_delay) as records:
-                digest = build_digest(project, records)
-        except InvalidState as error:
-            logger.info("Skipped digest delivery: %s", error, exc_info=True)
-            return
-
-        if digest:
-            mail_adapter.notify_digest(project, digest, target_type, target_identifier)
-        else:
-            logger.info(
-                "Skipped digest delivery due to empty digest",
-                extra={
-                    "project": project.id,
-                    "target_type": target_type.value,
-                    "target_identifier": target_identifier,
-                },
-            )
+        # All of the digests are held open until they have been built, so that
+        # the state for all of them can be fetched at once. As with a single
+        # digest, nothing is sent until every digest has been closed. Every
+        # digest has its own exit stack, so that a digest that fails to build
+        # can be exited with the error on its own. Like a failing single
+        # digest, it is then delivered again once maintenance has moved it
+        # back to the ready state.
+        pending = []
+        with ExitStack() as stack:
+            for key, project, target_type, target_identifier in targets:
+                digest_stack = ExitStack()
+                try:
+                    minimum_delay = ProjectOption.objects.get_value(
+                        project, get_option_key("mail", "minimum_delay")
+                    )
+                    records = list(
+                        digest_stack.enter_context(digests.digest(key, minimum_delay=minimum_delay))
+                    )
+                except InvalidState as error:
+                    logger.info("Skipped digest delivery: %s", error, exc_info=True)
+                    continue
+                except Exception:
+                    logger.exception("Failed to open digest %r", key)
+                    continue
+
+                stack.push(digest_stack)
+                pending.append(
+                    (key, digest_stack, project, target_type, target_identifier, records)
+                )
+
+            try:
+                states = iter(
+                    fetch_states(
+                        [(project, records) for _, _, project, _, _, records in pending if records]
+                    )
+                )
+            except Exception:
+                logger.exception("Failed to fetch digest states, fetching them one by one")
+                states = itertools.repeat(None)
+
+            notifications = []
+            for key, digest_stack, project, target_type, target_identifier, records in pending:
+                state = next(states) if records else None
+                try:
+                    if records and state is None:
+                        state = fetch_state(project, records)
+                    digest = build_digest(project, records, state) if records else None
+                except Exception:
+                    logger.exception("Failed to build digest %r", key)
+                    digest_stack.__exit__(*sys.exc_info())
+                    continue
+
+                notifications.append((key, project, digest, target_type, target_identifier))
+
+        for key, project, digest, target_type, target_identifier in notifications:
+            if digest:
+                try:
+                    mail_adapter.notify_digest(project, digest, target_type, target_identifier)
+                except Exception:
+                    logger.exception("Failed to deliver digest %r", key)
+            else:
+                logger.info(
+                    "Skipped digest delivery due to empty digest",
+                    extra={
+                        "project": project.id,
+                        "target_type": target_type.value,
+                        "target_identifier": target_identifier,
+                    },
+                )
@@ -1,3 +1,4 @@
+import functools
 import logging
 
 from sentry import analytics, features
@@ -13,6 +14,64 @@ from sentry.utils.sdk import bind_organization_context, set_current_event_projec
 
 logger = logging.getLogger("sentry")
 
+# Stored in the processing store in place of the event payload when events are
+# handed to post_process_group through an envelope.
+ENVELOPE_MARKER = "_post_process_envelope"
+
+
+def get_processing_store_marker(data):
+    """
+    Returns the placeholder written to the processing store after the event
+    has been saved. It only signals that the event still has to be
+    post-processed, the event itself is read from nodestore.
+    """
+    return {"project": data["project"], "event_id": data["event_id"], ENVELOPE_MARKER: True}
+
+
+def get_post_process_envelope(event):
+    """
+    Returns the compact representation of a saved event that is passed to
+    ``post_process_group`` along with the task. It holds the Snuba columns
+    that ``Event`` answers its common properties (tags, type, title, ...)
+    from, so that rules can be evaluated without loading the full payload.
+    """
+    from sentry.reprocessing2 import is_reprocessed_event
+    from sentry.snuba.events import Columns
+
+    tags = event.tags
+    snuba_data = {
+        Columns.PLATFORM.value.event_name: event.platform,
+        Columns.TIMESTAMP.value.event_name: event.datetime.isoformat(),
+        Columns.TAGS_KEY.value.event_name: [k for k, v in tags],
+        Columns.TAGS_VALUE.value.event_name: [v for k, v in tags],
+        Columns.TYPE.value.event_name: event.get_event_type(),
+        Columns.TITLE.value.event_name: event.title,
+        Columns.CULPRIT.value.event_name: event.culprit,
+        Columns.LOCATION.value.event_name: event.location,
+    }
+
+    return {
+        "snuba_data": snuba_data,
+        "size": event.size,
+        "is_reprocessed": is_reprocessed_event(event.data),
+    }
+
+
+def _get_event_from_envelope(data, group_id, envelope):
+    from sentry.eventstore.models import Event
+    from sentry.models import EventDict
+
+    event = Event(
+        project_id=data["project"],
+        event_id=data["event_id"],
+        group_id=group_id,
+        snuba_data=envelope["snuba_data"] if envelope else None,
+    )
+    # The payload is only fetched from nodestore if something needs more than
+    # the envelope. It has been normalized by save_event already.
+    event.data.wrapper = functools.partial(EventDict, skip_renormalization=True)
+    return event
+
 
 def _get_service_hooks(project_id):
     from sentry.models import ServiceHook
@@ -52,7 +111,7 @@ def _should_send_error_created_hooks(project):
     return result
 
 
-def _capture_stats(event, is_new):
+def _capture_stats(event, is_new, size=None):
     # TODO(dcramer): limit platforms to... something?
     platform = event.group.platform
     if not platform:
@@ -65,7 +124,7 @@ def _capture_stats(event, is_new):
 
     metrics.incr("events.processed", tags=tags, skip_internal=False)
     metrics.incr(f"events.processed.{platform}", skip_internal=False)
-    metrics.timing("events.size.data", event.size, tags=tags)
+    metrics.timing("events.size.data", event.size if size is None else size, tags=tags)
 
     # This is an experiment to understand whether we have, in production,
     # mismatches between event and group before we permanently rely on events
@@ -177,10 +236,19 @@ def update_existing_attachments(event):
 
 @instrumented_task(name="sentry.tasks.post_process.post_process_group")
 def post_process_group(
-    is_new, is_regression, is_new_group_environment, cache_key, group_id=None, **kwargs
+    is_new,
+    is_regression,
+    is_new_group_environment,
+    cache_key,
+    group_id=None,
+    envelope=None,
+    **kwargs,
 ):
     """
     Fires post processing hooks for a group.
+
+    If ``envelope`` is given (see ``get_post_process_envelope``), it is used
+    to answer common event properties without loading the full event.
     """
     from sentry.eventstore.models import Event
     from sentry.eventstore.processing import event_processing_store
@@ -198,19 +266,23 @@ def post_process_group(
                 extra={"cache_key": cache_key, "reason": "missing_cache"},
             )
             return
-        event = Event(
-            project_id=data["project"], event_id=data["event_id"], group_id=group_id, data=data
-        )
 
-        set_current_event_project(event.project_id)
+        from sentry.models import EventDict, Organization, Project
 
-        is_transaction_event = not bool(event.group_id)
+        if data.get(ENVELOPE_MARKER):
+            event = _get_event_from_envelope(data, group_id, envelope)
+        else:
+            event = Event(
+                project_id=data["project"], event_id=data["event_id"], group_id=group_id, data=data
+            )
 
-        from sentry.models import EventDict, Organization, Project
+            # Re-bind node data to avoid renormalization. We only want to
+            # renormalize when loading old data from the database.
+            event.data = EventDict(event.data, skip_renormalization=True)
 
-        # Re-bind node data to avoid renormalization. We only want to
-        # renormalize when loading old data from the database.
-        event.data = EventDict(event.data, skip_renormalization=True)
+        set_current_event_project(event.project_id)
+
+        is_transaction_event = not bool(event.group_id)
 
         # Re-bind Project and Org since we're reading the Event object
         # from cache which may contain stale parent models.
@@ -233,11 +305,15 @@ def post_process_group(
 
             return
 
-        is_reprocessed = is_reprocessed_event(event.data)
+        if envelope is not None:
+            is_reprocessed = envelope["is_reprocessed"]
+        else:
+            is_reprocessed = is_reprocessed_event(event.data)
 
         # NOTE: we must pass through the full Event object, and not an
         # event_id since the Event object may not actually have been stored
         # in the database due to sampling.
+        from sentry.mail.adapter import batched_digests
         from sentry.models import Commit, GroupInboxReason
         from sentry.models.group import get_group_with_redirect
         from sentry.models.groupinbox import add_group_to_inbox
@@ -255,7 +331,7 @@ def post_process_group(
 
         bind_organization_context(event.project.organization)
 
-        _capture_stats(event, is_new)
+        _capture_stats(event, is_new, size=envelope["size"] if envelope else None)
 
         if is_reprocessed and is_new:
             add_group_to_inbox(event.group, GroupInboxReason.REPROCESSED)
@@ -278,9 +354,10 @@ def post_process_group(
             has_alert = False
             # TODO(dcramer): ideally this would fanout, but serializing giant
             # objects back and forth isn't super efficient
-            for callback, futures in rp.apply():
-                has_alert = True
-                safe_execute(callback, event, futures, _with_transaction=False)
+            with batched_digests():
+                for callback, futures in rp.apply():
+                    has_alert = True
+                    safe_execute(callback, event, futures, _with_transaction=False)
 
             try:
                 lock = locks.get(
@@ -3,34 +3,41 @@ import logging
 import math
 import operator
 import zlib
+from array import array
 from calendar import Calendar
-from collections import OrderedDict, namedtuple
+from collections import OrderedDict, defaultdict, namedtuple
 from datetime import datetime, timedelta
 from functools import partial, reduce
 from itertools import zip_longest
 from typing import Iterable, Mapping, NamedTuple, Tuple
 
 import pytz
+from django.conf import settings
 from django.urls.base import reverse
 from django.utils import dateformat, timezone
 from django.utils.http import urlencode
 from snuba_sdk.column import Column
 from snuba_sdk.conditions import Condition, Op
 from snuba_sdk.entity import Entity
-from snuba_sdk.expressions import Granularity
+from snuba_sdk.expressions import Granularity, Limit
 from snuba_sdk.function import Function
 from snuba_sdk.query import Query
 
-from sentry import features
+from sentry import features, options
 from sentry.app import tsdb
 from sentry.constants import DataCategory
 from sentry.models import (
     Activity,
+    Group,
     GroupStatus,
     Organization,
+    OrganizationMemberTeam,
     OrganizationStatus,
     Project,
+    ProjectStatus,
+    ProjectTeam,
     Team,
+    TeamStatus,
     User,
     UserOption,
 )
@@ -39,7 +46,7 @@ from sentry.tasks.base import instrumented_task
 from sentry.utils import json, redis
 from sentry.utils.compat import filter, map, zip
 from sentry.utils.dates import floor_to_utc_day, to_datetime, to_timestamp
-from sentry.utils.email import MessageBuilder
+from sentry.utils.email import MessageBuilder, send_messages
 from sentry.utils.http import absolute_uri
 from sentry.utils.iterators import chunked
 from sentry.utils.math import mean
@@ -52,6 +59,14 @@ logger = logging.getLogger(__name__)
 
 BATCH_SIZE = 20000
 
+# The number of users whose reports are built and sent together by
+# ``deliver_organization_reports``.
+DELIVERY_BATCH_SIZE = 100
+
+# The maximum number of rows requested at once for the usage outcomes of the
+# projects of an organization.
+ORGANIZATION_OUTCOMES_MAX_ROWS = 10000
+
 ONE_DAY = int(timedelta(days=1).total_seconds())
 
 project_breakdown_colors = ["#422C6E", "#895289", "#D6567F", "#F38150", "#F2B713"]
@@ -483,6 +498,236 @@ Report, build_project_report, merge_reports = build_report(
 )
 
 
+def build_organization_series(start__stop, projects):
+    start, stop = start__stop
+    rollup = ONE_DAY
+
+    resolution, series = tsdb.get_optimal_rollup_series(start, stop, rollup)
+    assert resolution == rollup, "resolution does not match requested value"
+
+    clean = partial(clean_series, start, stop, rollup)
+    timestamps = [timestamp for timestamp, _ in clean([(timestamp, 0) for timestamp in series])]
+
+    issue_projects = dict(
+        Group.objects.filter(
+            project__in=projects,
+            status=GroupStatus.RESOLVED,
+            resolved_at__gte=start,
+            resolved_at__lt=stop,
+        ).values_list("id", "project_id")
+    )
+
+    # Resolved counts are accumulated into one column per project.
+    resolved = {project.id: array("q", [0]) * len(timestamps) for project in projects}
+    tsdb_range_resolved = _query_tsdb_groups_chunked(
+        tsdb.get_range, list(issue_projects), start, stop, rollup
+    )
+    for issue_id, issue_series in tsdb_range_resolved.items():
+        column = resolved[issue_projects[issue_id]]
+        for i, (timestamp, value) in enumerate(clean(issue_series)):
+            column[i] += value
+
+    tsdb_range_total = tsdb.get_range(
+        tsdb.models.project, [project.id for project in projects], start, stop, rollup=rollup
+    )
+
+    results = {}
+    for project in projects:
+        total_series = clean(tsdb_range_total[project.id])
+        total_timestamps = [timestamp for timestamp, _ in total_series]
+        assert total_timestamps == timestamps, "series timestamps must match"
+        results[project.id] = [
+            (timestamp, (resolved_count, total - resolved_count))  # unresolved
+            for (timestamp, total), resolved_count in zip(total_series, resolved[project.id])
+        ]
+    return results
+
+
+def build_organization_aggregates(ignore__stop, projects):
+    _, stop = ignore__stop
+    segments = 4
+    period = timedelta(days=7)
+    start = stop - (period * segments)
+
+    project_ids = [project.id for project in projects]
+    segment_sums = [
+        tsdb.get_sums(
+            tsdb.models.project,
+            project_ids,
+            start + (period * i),
+            start + (period * (i + 1) - timedelta(seconds=1)),
+            rollup=ONE_DAY,
+        )
+        for i in range(segments)
+    ]
+
+    return {project_id: [sums[project_id] for sums in segment_sums] for project_id in project_ids}
+
+
+def build_organization_issue_summaries(interval, projects):
+    start, stop = interval
+
+    queryset = Group.objects.filter(project__in=projects).exclude(status=GroupStatus.IGNORED)
+
+    # Fetch all new issues.
+    new_issue_projects = dict(
+        queryset.filter(first_seen__gte=start, first_seen__lt=stop).values_list("id", "project_id")
+    )
+
+    # Fetch all regressions. See ``build_project_issue_summaries`` for why
+    # this goes through the Activity model.
+    reopened_issue_projects = dict(
+        Activity.objects.filter(
+            group__in=queryset.filter(
+                last_seen__gte=start,
+                last_seen__lt=stop,
+                resolved_at__isnull=False,  # signals this has *ever* been resolved
+            ),
+            type__in=(Activity.SET_REGRESSION, Activity.SET_UNRESOLVED),
+            datetime__gte=start,
+            datetime__lt=stop,
+        )
+        .distinct()
+        .values_list("group_id", "project_id")
+    )
+
+    rollup = ONE_DAY
+    event_counts = _query_tsdb_groups_chunked(
+        tsdb.get_sums,
+        new_issue_projects.keys() | reopened_issue_projects.keys(),
+        start,
+        stop,
+        rollup,
+    )
+
+    new_issue_counts = defaultdict(int)
+    for issue_id, project_id in new_issue_projects.items():
+        new_issue_counts[project_id] += event_counts[issue_id]
+
+    reopened_issue_counts = defaultdict(int)
+    for issue_id, project_id in reopened_issue_projects.items():
+        reopened_issue_counts[project_id] += event_counts[issue_id]
+
+    project_counts = tsdb.get_sums(
+        tsdb.models.project, [project.id for project in projects], start, stop, rollup=rollup
+    )
+
+    return {
+        project.id: [
+            new_issue_counts[project.id],
+            reopened_issue_counts[project.id],
+            max(
+                project_counts[project.id]
+                - new_issue_counts[project.id]
+                - reopened_issue_counts[project.id],
+                0,
+            ),
+        ]
+        for project in projects
+    }
+
+
+def build_organization_usage_outcomes(start__stop, projects):
+    start, stop = start__stop
+
+    # See ``build_project_usage_outcomes`` for why this captures an extra day.
+    end = stop + timedelta(days=1)
+
+    outcomes = [Outcome.ACCEPTED, Outcome.RATE_LIMITED]
+    categories = [*DataCategory.error_categories(), DataCategory.TRANSACTION]
+
+    # Every project has at most one row per outcome and category. Projects are
+    # queried in chunks so that the rows of a chunk fit into a single result.
+    rows_per_project = len(outcomes) * len(categories)
+    chunk_size = max(ORGANIZATION_OUTCOMES_MAX_ROWS // rows_per_project, 1)
+
+    data = []
+    for chunk in chunked(projects, chunk_size):
+        query = Query(
+            dataset=Dataset.Outcomes.value,
+            match=Entity("outcomes"),
+            select=[
+                Column("project_id"),
+                Column("outcome"),
+                Column("category"),
+                Function("sum", [Column("quantity")], "total"),
+            ],
+            where=[
+                Condition(Column("timestamp"), Op.GTE, start),
+                Condition(Column("timestamp"), Op.LT, end),
+                Condition(Column("project_id"), Op.IN, [project.id for project in chunk]),
+                Condition(Column("org_id"), Op.EQ, projects[0].organization_id),
+                Condition(Column("outcome"), Op.IN, outcomes),
+                Condition(Column("category"), Op.IN, categories),
+            ],
+            groupby=[Column("project_id"), Column("outcome"), Column("category")],
+            granularity=Granularity(ONE_DAY),
+            limit=Limit(len(chunk) * rows_per_project),
+        )
+        data.extend(raw_snql_query(query, referrer="reports.organization_outcomes")["data"])
+
+    # Accepted errors, dropped errors, accepted transactions, dropped transactions
+    columns = {
+        (DataCategory.ERROR, Outcome.ACCEPTED): 0,
+        (DataCategory.ERROR, Outcome.RATE_LIMITED): 1,
+        (DataCategory.TRANSACTION, Outcome.ACCEPTED): 2,
+        (DataCategory.TRANSACTION, Outcome.RATE_LIMITED): 3,
+    }
+    error_categories = DataCategory.error_categories()
+
+    results = {project.id: [0, 0, 0, 0] for project in projects}
+    for row in data:
+        category = DataCategory.ERROR if row["category"] in error_categories else row["category"]
+        column = columns.get((category, row["outcome"]))
+        if column is not None:
+            results[row["project_id"]][column] += row["total"]
+
+    return {project_id: tuple(values) for project_id, values in results.items()}
+
+
+def build_organization_calendar_series(interval, projects):
+    start, stop = get_calendar_query_range(interval, 3)
+
+    rollup = ONE_DAY
+    series = tsdb.get_range(
+        tsdb.models.project, [project.id for project in projects], start, stop, rollup=rollup
+    )
+
+    return {
+        project.id: clean_calendar_data(project, series[project.id], start, stop, rollup)
+        for project in projects
+    }
+
+
+# Builders for each field of ``Report`` (in order) that build the field for
+# all projects of an organization at once, returning a mapping of project ID
+# to field value.
+organization_field_builders = [
+    build_organization_series,
+    build_organization_aggregates,
+    build_organization_issue_summaries,
+    build_organization_usage_outcomes,
+    build_organization_calendar_series,
+]
+
+
+def build_organization_reports(interval, projects):
+    """
+    Constructs the reports for all of the given projects of an organization,
+    returning a mapping of project ID to report.
+
+    This is equivalent to calling ``build_project_report`` for each project,
+    but each field is built as a column for all projects at once so that the
+    number of queries does not grow with the number of projects.
+    """
+    projects = list(projects)
+    if not projects:
+        return {}
+
+    columns = [builder(interval, projects) for builder in organization_field_builders]
+    return {project.id: Report(*[column[project.id] for column in columns]) for project in projects}
+
+
 class ReportBackend:
     def build(self, timestamp, duration, project):
         """
@@ -490,6 +735,16 @@ class ReportBackend:
         """
         return build_project_report(_to_interval(timestamp, duration), project)
 
+    def build_many(self, timestamp, duration, projects):
+        """
+        Constructs the reports for projects of a single organization, returning
+        a mapping of project ID to report.
+        """
+        if options.get("reports.organization-builder"):
+            return build_organization_reports(_to_interval(timestamp, duration), projects)
+
+        return {project.id: self.build(timestamp, duration, project) for project in projects}
+
     def prepare(self, timestamp, duration, organization):
         """
         Build and store reports for all projects in an organization.
@@ -536,9 +791,12 @@ class RedisReportBackend(ReportBackend):
         return Report(*json.loads(zlib.decompress(value)))
 
     def prepare(self, timestamp, duration, organization):
-        reports = {}
-        for project in organization.project_set.all():
-            reports[project.id] = self.__encode(self.build(timestamp, duration, project))
+        reports = {
+            project_id: self.__encode(report)
+            for project_id, report in self.build_many(
+                timestamp, duration, organization.project_set.all()
+            ).items()
+        }
 
         if not reports:
             # XXX: HMSET requires at least one key/value pair, so we need to
@@ -590,16 +848,23 @@ def prepare_organization_report(timestamp, duration, organization_id, dry_run=Fa
 
     backend.prepare(timestamp, duration, organization)
 
-    # If an OrganizationMember row doesn't have an associated user, this is
-    # actually a pending invitation, so no report should be delivered.
-    member_set = organization.member_set.filter(user_id__isnull=False, user__is_active=True)
+    if options.get("reports.organization-delivery"):
+        deliver_organization_reports.delay(timestamp, duration, organization_id, dry_run=dry_run)
+        return
 
-    for user_id in member_set.values_list("user_id", flat=True):
+    for user_id in _get_report_user_ids(organization):
         deliver_organization_user_report.delay(
             timestamp, duration, organization_id, user_id, dry_run=dry_run
         )
 
 
+def _get_report_user_ids(organization):
+    # If an OrganizationMember row doesn't have an associated user, this is
+    # actually a pending invitation, so no report should be delivered.
+    member_set = organization.member_set.filter(user_id__isnull=False, user__is_active=True)
+    return member_set.values_list("user_id", flat=True)
+
+
 def fetch_personal_statistics(start__stop, organization, user):
     start, stop = start__stop
     resolved_issue_ids = set(
@@ -625,6 +890,42 @@ def fetch_personal_statistics(start__stop, organization, user):
     return {"resolved": len(resolved_issue_ids), "users": users}
 
 
+def fetch_personal_statistics_many(start__stop, organization, users):
+    """
+    Fetch the personal statistics for many users at once, returning a mapping
+    of user ID to the value ``fetch_personal_statistics`` returns.
+    """
+    start, stop = start__stop
+    resolved_issue_ids = defaultdict(set)
+    for user_id, group_id in (
+        Activity.objects.filter(
+            project__organization_id=organization.id,
+            user_id__in=[user.id for user in users],
+            type__in=(Activity.SET_RESOLVED, Activity.SET_RESOLVED_IN_RELEASE),
+            datetime__gte=start,
+            datetime__lt=stop,
+            group__status=GroupStatus.RESOLVED,  # only count if the issue is still resolved
+        )
+        .distinct()
+        .values_list("user_id", "group_id")
+    ):
+        resolved_issue_ids[user_id].add(group_id)
+
+    # Users that resolved the same set of issues share the (approximate)
+    # distinct count of affected users.
+    users_affected = {}
+    results = {}
+    for user in users:
+        issue_ids = frozenset(resolved_issue_ids[user.id])
+        if issue_ids and issue_ids not in users_affected:
+            users_affected[issue_ids] = tsdb.get_distinct_counts_union(
+                tsdb.models.users_affected_by_group, issue_ids, start, stop, ONE_DAY
+            )
+        results[user.id] = {"resolved": len(issue_ids), "users": users_affected.get(issue_ids, {})}
+
+    return results
+
+
 class Duration(NamedTuple):
     adjective: str  # e.g. "daily" or "weekly",
     noun: str  # relative to today, e.g. "yesterday" or "this week"
@@ -634,9 +935,22 @@ class Duration(NamedTuple):
 durations = {(ONE_DAY * 7): Duration("weekly", "this week", "D")}
 
 
-def build_message(timestamp, duration, organization, user, reports):
+def build_message(
+    timestamp, duration, organization, user, reports, personal=None, report_context=None
+):
+    """
+    Builds the report email for a user. The personal statistics and report
+    context are computed unless they were computed upfront, which allows
+    sharing them between the messages of many users.
+    """
     start, stop = interval = _to_interval(timestamp, duration)
 
+    if personal is None:
+        personal = fetch_personal_statistics(interval, organization, user)
+
+    if report_context is None:
+        report_context = to_context(organization, interval, reports)
+
     duration_spec = durations[duration]
     message = MessageBuilder(
         subject="{} Report for {}: {} - {}".format(
@@ -652,8 +966,8 @@ def build_message(timestamp, duration, organization, user, reports):
             "duration": duration_spec,
             "interval": {"start": date_format(start), "stop": date_format(stop)},
             "organization": organization,
-            "personal": fetch_personal_statistics(interval, organization, user),
-            "report": to_context(organization, interval, reports),
+            "personal": personal,
+            "report": report_context,
             "user": user,
         },
         headers={"X-SMTPAPI": json.dumps({"category": "organization_report_email"})},
@@ -748,6 +1062,137 @@ def deliver_organization_user_report(timestamp, duration, organization_id, user_
         message.send()
 
 
+@instrumented_task(
+    name="sentry.tasks.reports.deliver_organization_reports", queue="reports.deliver"
+)
+def deliver_organization_reports(timestamp, duration, organization_id, dry_run=False):
+    """
+    Delivers the reports of all members of an organization.
+
+    This is equivalent to running ``deliver_organization_user_report`` for
+    each member, but the reports are fetched once, the report context is
+    rendered once for every distinct set of projects, and the personal
+    statistics and emails are handled in batches of users.
+    """
+    try:
+        organization = _get_organization_queryset().get(id=organization_id)
+    except Organization.DoesNotExist:
+        logger.warning(
+            "reports.organization.missing",
+            extra={
+                "timestamp": timestamp,
+                "duration": duration,
+                "organization_id": organization_id,
+            },
+        )
+        return
+
+    interval = _to_interval(timestamp, duration)
+    users = list(User.objects.filter(id__in=list(_get_report_user_ids(organization))))
+
+    disabled_organizations = dict(
+        UserOption.objects.filter(
+            user__in=users,
+            key=DISABLED_ORGANIZATIONS_USER_OPTION_KEY,
+            project__isnull=True,
+            organization__isnull=True,
+        ).values_list("user_id", "value")
+    )
+    users = [
+        user for user in users if organization.id not in disabled_organizations.get(user.id, [])
+    ]
+
+    # This mirrors ``Team.objects.get_for_user`` and ``Project.objects.get_for_user``.
+    teams = Team.objects.filter(organization=organization, status=TeamStatus.VISIBLE)
+    user_teams = defaultdict(set)
+    if settings.SENTRY_PUBLIC:
+        team_ids = set(teams.values_list("id", flat=True))
+        for user in users:
+            user_teams[user.id] = team_ids
+    else:
+        for user_id, team_id in OrganizationMemberTeam.objects.filter(
+            organizationmember__organization=organization,
+            organizationmember__user__in=users,
+            is_active=True,
+            team__in=teams,
+        ).values_list("organizationmember__user_id", "team_id"):
+            user_teams[user_id].add(team_id)
+
+    team_projects = defaultdict(set)
+    for team_id, project_id in ProjectTeam.objects.filter(
+        team__in=teams, project__status=ProjectStatus.VISIBLE
+    ).values_list("team_id", "project_id"):
+        team_projects[team_id].add(project_id)
+
+    user_projects = {}
+    for user in users:
+        project_ids = set()
+        for team_id in user_teams[user.id]:
+            project_ids.update(team_projects[team_id])
+        if project_ids:
+            user_projects[user.id] = frozenset(project_ids)
+
+    projects = list(
+        Project.objects.filter(id__in=set().union(*user_projects.values())) if user_projects else []
+    )
+    reports = {
+        project.id: (project, report)
+        for project, report in zip(
+            projects, backend.fetch(timestamp, duration, organization, projects)
+        )
+        if report is not None and has_valid_aggregates(interval, (project, report))
+    }
+
+    report_contexts = {}
+    delivered = 0
+    for batch in chunked([user for user in users if user.id in user_projects], DELIVERY_BATCH_SIZE):
+        try:
+            personal_statistics = fetch_personal_statistics_many(interval, organization, batch)
+
+            messages = []
+            for user in batch:
+                project_ids = user_projects[user.id] & reports.keys()
+                if not project_ids:
+                    continue
+
+                user_reports = dict(reports[project_id] for project_id in project_ids)
+                if project_ids not in report_contexts:
+                    report_contexts[project_ids] = to_context(organization, interval, user_reports)
+
+                message = build_message(
+                    timestamp,
+                    duration,
+                    organization,
+                    user,
+                    user_reports,
+                    personal=personal_statistics[user.id],
+                    report_context=report_contexts[project_ids],
+                )
+                messages.extend(message.get_built_messages())
+
+            if messages and not dry_run:
+                send_messages(messages)
+            delivered += len(messages)
+        except Exception:
+            # Members of the other batches still get their reports, and the
+            # task is not failed so that batches that were already sent are
+            # not sent again by a retry.
+            logger.exception(
+                "reports.organization.batch-failed",
+                extra={"organization_id": organization_id, "users": [user.id for user in batch]},
+            )
+
+    logger.info(
+        "reports.organization.delivered",
+        extra={
+            "organization_id": organization_id,
+            "users": len(users),
+            "messages": delivered,
+            "report_contexts": len(report_contexts),
+        },
+    )
+
+
 def series_map(function, series):
     return [(timestamp, function(value)) for timestamp, value in series]
 
@@ -16,6 +16,7 @@ from sentry.killswitches import killswitch_matches_context
 from sentry.models import Activity, Organization, Project, ProjectOption
 from sentry.stacktraces.processing import process_stacktraces, should_process_for_stacktraces
 from sentry.tasks.base import instrumented_task
+from sentry.tasks.post_process import get_processing_store_marker
 from sentry.utils import metrics
 from sentry.utils.canonical import CANONICAL_TYPES, CanonicalKeyDict
 from sentry.utils.dates import to_datetime
@@ -125,10 +126,12 @@ def _do_preprocess_event(cache_key, data, start_time, event_id, process_task, pr
 
     from_reprocessing = process_task is process_event_from_reprocessing
 
-    with metrics.timer("tasks.store.preprocess_event.organization.get_from_cache"):
-        project._organization_cache = Organization.objects.get_from_cache(
-            id=project.organization_id
-        )
+    # The ingest consumer hands us projects with their organization attached.
+    if getattr(project, "_organization_cache", None) is None:
+        with metrics.timer("tasks.store.preprocess_event.organization.get_from_cache"):
+            project._organization_cache = Organization.objects.get_from_cache(
+                id=project.organization_id
+            )
 
     if should_process_with_symbolicator(data):
         reprocessing2.backup_unprocessed_event(project=project, data=original_data)
@@ -770,7 +773,10 @@ def _do_save_event(
                 if isinstance(data, CANONICAL_TYPES):
                     data = dict(data.items())
                 with metrics.timer("tasks.store.do_save_event.write_processing_cache"):
-                    event_processing_store.store(data)
+                    if options.get("store.post-process-envelope"):
+                        event_processing_store.store(get_processing_store_marker(data))
+                    else:
+                        event_processing_store.store(data)
         except HashDiscarded:
             # Delete the event payload from cache since it won't show up in post-processing.
             if cache_key:
@@ -450,6 +450,8 @@ def lock_hashes(project_id, source_id, fingerprints):
             state=GroupHash.State.LOCKED_IN_MIGRATION
         )
 
+    GroupHash.objects.invalidate_hash_cache(project_id)
+
     return [h.hash for h in eligible_hashes]
 
 
@@ -459,6 +461,7 @@ def unlock_hashes(project_id, locked_primary_hashes):
         hash__in=locked_primary_hashes,
         state=GroupHash.State.LOCKED_IN_MIGRATION,
     ).update(state=GroupHash.State.UNLOCKED)
+    GroupHash.objects.invalidate_hash_cache(project_id)
 
 
 @instrumented_task(name="sentry.tasks.unmerge", queue="unmerge")
@@ -0,0 +1,30 @@
+import zstandard
+
+from sentry.utils import json
+
+
+def train_compression_dictionary(platform: str = "python") -> zstandard.ZstdCompressionDict:
+    """
+    Trains a zstandard compression dictionary on payloads that resemble events
+    of the given platform.
+    """
+    samples = [
+        json.dumps(
+            {
+                "platform": platform,
+                "modules": {f"{platform}-module-{i}": f"1.{i}" for i in range(50)},
+                "id": i,
+            }
+        ).encode("utf8")
+        for i in range(1000)
+    ]
+    return zstandard.train_dictionary(1024 * 16, samples)
+
+
+def write_compression_dictionary(path, platform: str = "python") -> str:
+    """
+    Writes a dictionary trained by ``train_compression_dictionary`` to the
+    given path, returning the path as string.
+    """
+    path.write_bytes(train_compression_dictionary(platform).as_bytes())
+    return str(path)
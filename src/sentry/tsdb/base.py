@@ -122,6 +122,7 @@ class BaseTSDB(Service):
             "merge_distinct_counts",
             "delete_distinct_counts",
             "record_frequency_multi",
+            "write_batch",
             "merge_frequencies",
             "delete_frequencies",
             "flush",
@@ -464,6 +465,46 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def write_batch(self, incrs=(), records=(), frequencies=()):
+        """
+        Perform many writes of different types at once. Unlike the other
+        write methods, every item carries its own options, which may contain
+        ``timestamp`` and ``environment_id`` (and ``count`` for increments):
+
+        >>> write_batch(
+        ...     incrs=[(TimeSeriesModel.project, 1, {"timestamp": ..., "environment_id": 2})],
+        ...     records=[(TimeSeriesModel.users_affected_by_project, 1, ("user",), {...})],
+        ...     frequencies=[(TimeSeriesModel.frequent_environments_by_group, {5: {2: 1}}, {...})],
+        ... )
+
+        Backends can override this to send all writes in as few requests as
+        possible.
+        """
+        for model, key, options in incrs:
+            self.incr(
+                model,
+                key,
+                timestamp=options.get("timestamp"),
+                count=options.get("count", 1),
+                environment_id=options.get("environment_id"),
+            )
+
+        for model, key, values, options in records:
+            self.record(
+                model,
+                key,
+                values,
+                timestamp=options.get("timestamp"),
+                environment_id=options.get("environment_id"),
+            )
+
+        for model, request, options in frequencies:
+            self.record_frequency_multi(
+                [(model, request)],
+                timestamp=options.get("timestamp"),
+                environment_id=options.get("environment_id"),
+            )
+
     def get_most_frequent(
         self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
     ):
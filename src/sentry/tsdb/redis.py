@@ -661,33 +661,112 @@ class RedisTSDB(BaseTSDB):
             commands = {}
 
             for model, request in requests:
-                for key, items in request.items():
-                    keys = []
-                    expirations = {}
+                self.add_frequency_commands(
+                    commands, model, request, ts, timestamp, environment_ids
+                )
 
-                    # Figure out all of the keys we need to be incrementing, as
-                    # well as their expiration policies.
-                    for rollup, max_values in self.rollups.items():
-                        for environment_id in environment_ids:
-                            chunk = self.make_frequency_table_keys(
-                                model, rollup, ts, key, environment_id
-                            )
-                            keys.extend(chunk)
+            try:
+                cluster.execute_commands(commands)
+            except Exception:
+                if durable:
+                    raise
 
-                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
-                        for k in chunk:
-                            expirations[k] = expiry
-
-                    arguments = ["INCR"] + list(self.DEFAULT_SKETCH_PARAMETERS)
-                    for member, score in items.items():
-                        arguments.extend((score, member))
-
-                    # Since we're essentially merging dictionaries, we need to
-                    # append this to any value that already exists at the key.
-                    cmds = commands.setdefault(key, [])
-                    cmds.append((CountMinScript, keys, arguments))
-                    for k, t in expirations.items():
-                        cmds.append(("EXPIREAT", k, t))
+    def add_frequency_commands(self, commands, model, request, ts, timestamp, environment_ids):
+        """
+        Add the commands for recording ``request`` in the frequency tables of
+        ``model`` to ``commands``, a mapping of routing keys to commands as
+        accepted by ``cluster.execute_commands``.
+        """
+        for key, items in request.items():
+            keys = []
+            expirations = {}
+
+            # Figure out all of the keys we need to be incrementing, as
+            # well as their expiration policies.
+            for rollup, max_values in self.rollups.items():
+                for environment_id in environment_ids:
+                    chunk = self.make_frequency_table_keys(model, rollup, ts, key, environment_id)
+                    keys.extend(chunk)
+
+                expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                for k in chunk:
+                    expirations[k] = expiry
+
+            arguments = ["INCR"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+            for member, score in items.items():
+                arguments.extend((score, member))
+
+            # Since we're essentially merging dictionaries, we need to
+            # append this to any value that already exists at the key.
+            cmds = commands.setdefault(key, [])
+            cmds.append((CountMinScript, keys, arguments))
+            for k, t in expirations.items():
+                cmds.append(("EXPIREAT", k, t))
+
+    def write_batch(self, incrs=(), records=(), frequencies=()):
+        """
+        Like ``incr_multi``, ``record_multi`` and ``record_frequency_multi``
+        combined, but every item has its own timestamp and environment, and
+        all commands for a cluster are sent with a single
+        ``execute_commands`` call, which pipelines them per host. Increments
+        of the same counter are merged into one ``HINCRBY``.
+        """
+        for item in itertools.chain(incrs, records, frequencies):
+            self.validate_arguments([item[0]], [item[-1].get("environment_id")])
+
+        default_timestamp = timezone.now()
+
+        # (cluster, durable) -> (counter increments, counter expiries, commands)
+        batches = defaultdict(lambda: (defaultdict(int), defaultdict(float), defaultdict(list)))
+
+        def iter_cluster_groups(options):
+            for (cluster, durable), environment_ids in self.get_cluster_groups(
+                {None, options.get("environment_id")}
+            ):
+                yield batches[(cluster, durable)], environment_ids
+
+        for model, key, options in incrs:
+            count = options.get("count", 1)
+            timestamp = options.get("timestamp") or default_timestamp
+            for (counters, expiries, _), environment_ids in iter_cluster_groups(options):
+                for rollup, max_values in self.rollups.items():
+                    expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                    for environment_id in environment_ids:
+                        hash_key, hash_field = self.make_counter_key(
+                            model, rollup, timestamp, key, environment_id
+                        )
+                        counters[(hash_key, hash_field)] += count
+                        if expiries[hash_key] < expiry:
+                            expiries[hash_key] = expiry
+
+        for model, key, values, options in records:
+            timestamp = options.get("timestamp") or default_timestamp
+            ts = int(to_timestamp(timestamp))  # ``timestamp`` is not actually a timestamp :(
+            for (_, _, commands), environment_ids in iter_cluster_groups(options):
+                for rollup, max_values in self.rollups.items():
+                    expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                    for environment_id in environment_ids:
+                        k = self.make_key(model, rollup, ts, key, environment_id)
+                        commands[key].append(("PFADD", k, *values))
+                        commands[key].append(("EXPIREAT", k, expiry))
+
+        if self.enable_frequency_sketches:
+            for model, request, options in frequencies:
+                timestamp = options.get("timestamp") or default_timestamp
+                ts = int(to_timestamp(timestamp))
+                for (_, _, commands), environment_ids in iter_cluster_groups(options):
+                    self.add_frequency_commands(
+                        commands, model, request, ts, timestamp, environment_ids
+                    )
+
+        for (cluster, durable), (counters, expiries, commands) in batches.items():
+            for (hash_key, hash_field), count in counters.items():
+                commands[hash_key].append(("HINCRBY", hash_key, hash_field, count))
+            for hash_key, expiry in expiries.items():
+                commands[hash_key].append(("EXPIREAT", hash_key, expiry))
+
+            if not commands:
+                continue
 
             try:
                 cluster.execute_commands(commands)
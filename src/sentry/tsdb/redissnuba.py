@@ -45,6 +45,14 @@ method_specifications = {
         WRITE,
         lambda callargs: {model for model, data in callargs["requests"]},
     ),
+    "write_batch": (
+        WRITE,
+        lambda callargs: {
+            item[0]
+            for items in (callargs["incrs"], callargs["records"], callargs["frequencies"])
+            for item in items
+        },
+    ),
     "merge_frequencies": (WRITE, single_model_argument),
     "delete_frequencies": (WRITE, multiple_model_argument),
     "flush": (WRITE, dont_do_this),
@@ -1,4 +1,7 @@
 import functools
+import threading
+import time
+from collections import OrderedDict
 
 from django.core.cache import cache
 
@@ -72,5 +75,102 @@ class cached_for_request(memoize):
         return functools.partial(self.__call__, obj)
 
 
+class LRUCache:
+    """
+    A thread safe, in-process cache holding at most ``maxsize`` items, with an
+    optional ``ttl`` in seconds after which items are considered stale.
+
+    Items can be given a ``weight`` (for instance their size in bytes). When
+    ``maxweight`` is set, least recently used items are evicted until the
+    total weight fits again.
+
+    Use this for hot data that can be reused across many calls of a long
+    running process (consumers, workers). Invalidation across processes is not
+    possible, so keep the TTL short for anything that users can change.
+
+    >>> projects = LRUCache(maxsize=1000, ttl=60)
+    >>> projects.set(project.id, project)
+    >>> projects.get(project.id)
+    """
+
+    def __init__(self, maxsize, ttl=None, maxweight=None, timer=time.monotonic):
+        assert maxsize > 0
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self.timer = timer
+        self.weight = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _missing) is not _missing
+
+    def _pop(self, key):
+        _, _, weight = self._data.pop(key)
+        self.weight -= weight
+
+    def _get(self, key, default):
+        try:
+            value, expires, _ = self._data[key]
+        except KeyError:
+            return default
+
+        if expires is not None and expires <= self.timer():
+            self._pop(key)
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._get(key, default)
+
+    def get_many(self, keys):
+        """
+        Returns a dictionary with the values of all ``keys`` that are cached.
+        """
+        rv = {}
+        with self._lock:
+            for key in keys:
+                value = self._get(key, _missing)
+                if value is not _missing:
+                    rv[key] = value
+        return rv
+
+    def set(self, key, value, weight=1):
+        if self.maxweight is not None and weight > self.maxweight:
+            # Would evict everything else and still not fit.
+            return
+
+        expires = self.timer() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, expires, weight)
+            self.weight += weight
+            while len(self._data) > self.maxsize or (
+                self.maxweight is not None and self.weight > self.maxweight
+            ):
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+
+_missing = object()
+
+
 def cache_key_for_event(data) -> str:
     return "e:{1}:{0}".format(data["project"], data["event_id"])
@@ -1,6 +1,6 @@
 import zlib
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, cast
+from typing import Dict, Generic, List, Mapping, Optional, Sequence, TypeVar, Union, cast
 
 import zstandard
 
@@ -92,3 +92,84 @@ class ZstdCodec(Codec[bytes, bytes]):
 
     def decode(self, value: bytes) -> bytes:
         return cast(bytes, zstandard.ZstdDecompressor().decompress(value))
+
+
+class ZstdDictionaryCodec(Codec[bytes, bytes]):
+    """
+    Compress values with zstd using pre-trained dictionaries, one per
+    platform.
+
+    ``dictionaries`` maps platforms to their dictionaries. Values are
+    compressed with the first dictionary of their platform, falling back to
+    the one of the ``"default"`` platform and, without that, to no dictionary
+    at all. The dictionary ID is part of the zstd frame header, so values can
+    be decompressed with any of the provided dictionaries, which allows new
+    dictionaries to be rolled out without rewriting existing data.
+    """
+
+    DEFAULT_PLATFORM = "default"
+
+    def __init__(
+        self,
+        dictionaries: Optional[Mapping[str, Sequence[zstandard.ZstdCompressionDict]]] = None,
+        level: int = 3,
+    ) -> None:
+        self.level = level
+        self.dictionaries: Dict[int, zstandard.ZstdCompressionDict] = {}
+        self.compression_dictionaries: Dict[str, zstandard.ZstdCompressionDict] = {}
+
+        for platform, platform_dictionaries in (dictionaries or {}).items():
+            for dictionary in platform_dictionaries:
+                self.dictionaries[dictionary.dict_id()] = dictionary
+
+            if platform_dictionaries:
+                compression_dictionary = platform_dictionaries[0]
+                compression_dictionary.precompute_compress(level=level)
+                self.compression_dictionaries[platform] = compression_dictionary
+
+    @classmethod
+    def from_files(
+        cls, paths: Mapping[str, Union[str, Sequence[str]]], level: int = 3
+    ) -> "ZstdDictionaryCodec":
+        """
+        Load the dictionaries from the given paths. Every platform maps to
+        either a single path or a list of paths, the first of which is used
+        for compression.
+        """
+        dictionaries: Dict[str, List[zstandard.ZstdCompressionDict]] = {}
+        for platform, platform_paths in paths.items():
+            if isinstance(platform_paths, str):
+                platform_paths = [platform_paths]
+
+            dictionaries[platform] = []
+            for path in platform_paths:
+                with open(path, "rb") as f:
+                    dictionaries[platform].append(zstandard.ZstdCompressionDict(f.read()))
+
+        return cls(dictionaries, level=level)
+
+    def get_compression_dictionary(
+        self, platform: Optional[str] = None
+    ) -> Optional[zstandard.ZstdCompressionDict]:
+        return self.compression_dictionaries.get(
+            platform or self.DEFAULT_PLATFORM,
+            self.compression_dictionaries.get(self.DEFAULT_PLATFORM),
+        )
+
+    def encode(self, value: bytes, platform: Optional[str] = None) -> bytes:
+        compressor = zstandard.ZstdCompressor(
+            level=self.level, dict_data=self.get_compression_dictionary(platform)
+        )
+        return cast(bytes, compressor.compress(value))
+
+    def decode(self, value: bytes) -> bytes:
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+
+        dictionary = None
+        if dict_id:
+            try:
+                dictionary = self.dictionaries[dict_id]
+            except KeyError:
+                raise ValueError(f"unknown compression dictionary: {dict_id}")
+
+        return cast(bytes, zstandard.ZstdDecompressor(dict_data=dictionary).decompress(value))
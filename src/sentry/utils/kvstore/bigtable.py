@@ -3,16 +3,17 @@ import logging
 import struct
 from datetime import timedelta
 from threading import Lock
-from typing import Any, Iterator, Mapping, Optional, Sequence, Tuple, cast
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union, cast
 
 from django.utils import timezone
 from google.api_core import exceptions, retry
 from google.cloud import bigtable
+from google.cloud.bigtable.row import DirectRow
 from google.cloud.bigtable.row_data import PartialRowData
 from google.cloud.bigtable.row_set import RowSet
 from google.cloud.bigtable.table import Table
 
-from sentry.utils.codecs import Codec, ZlibCodec, ZstdCodec
+from sentry.utils.codecs import Codec, ZlibCodec, ZstdCodec, ZstdDictionaryCodec
 from sentry.utils.kvstore.abstract import KVStorage
 
 logger = logging.getLogger(__name__)
@@ -46,15 +47,28 @@ class BigtableKVStorage(KVStorage[str, bytes]):
     flags_column = b"f"
     flags_struct = struct.Struct("B")
 
+    # Batched writes and deletes are split into ``MutateRows`` requests that
+    # contain at most ``mutation_batch_size`` rows and (unless a single row
+    # exceeds it) ``mutation_batch_bytes`` bytes of mutations, staying well
+    # below the request size limits enforced by Bigtable.
+    mutation_batch_size = 1000
+    mutation_batch_bytes = 1024 * 1024 * 20
+
     class Flags(enum.IntFlag):
         # XXX: Compression flags are assumed to be mutually exclusive, the
         # behavior is explicitly undefined if both bits are set on a record.
         COMPRESSED_ZLIB = 1 << 0
         COMPRESSED_ZSTD = 1 << 1
+        # The ID of the dictionary is stored in the zstd frame header, the
+        # dictionary is selected by the platform passed on write.
+        COMPRESSED_ZSTD_DICTIONARY = 1 << 2
 
     compression_strategies: Mapping[str, Tuple[Flags, Codec[bytes, bytes]]] = {
         "zlib": (Flags.COMPRESSED_ZLIB, ZlibCodec()),
         "zstd": (Flags.COMPRESSED_ZSTD, ZstdCodec()),
+        # Without any ``compression_dictionaries``, this can only decode
+        # values that were compressed without a dictionary.
+        "zstd-dictionary": (Flags.COMPRESSED_ZSTD_DICTIONARY, ZstdDictionaryCodec()),
     }
 
     def __init__(
@@ -66,6 +80,7 @@ class BigtableKVStorage(KVStorage[str, bytes]):
         default_ttl: Optional[timedelta] = None,
         compression: Optional[str] = None,
         app_profile: Optional[str] = None,
+        compression_dictionaries: Optional[Mapping[str, Union[str, Sequence[str]]]] = None,
     ) -> None:
         client_options = client_options if client_options is not None else {}
         if "admin" in client_options:
@@ -74,6 +89,20 @@ class BigtableKVStorage(KVStorage[str, bytes]):
         if compression is not None and compression not in self.compression_strategies:
             raise ValueError(f'"compression" must be one of {self.compression_strategies.keys()!r}')
 
+        # Dictionaries are loaded from the given paths per platform. Rows are
+        # compressed with the dictionary of the platform passed on write (or
+        # the "default" one), but can be read with any of them.
+        if compression_dictionaries:
+            self.compression_strategies = {
+                **self.compression_strategies,
+                "zstd-dictionary": (
+                    self.Flags.COMPRESSED_ZSTD_DICTIONARY,
+                    ZstdDictionaryCodec.from_files(compression_dictionaries),
+                ),
+            }
+        elif compression == "zstd-dictionary":
+            raise ValueError('"zstd-dictionary" compression requires "compression_dictionaries"')
+
         self.project = project
         self.instance = instance
         self.table_name = table_name
@@ -169,10 +198,17 @@ class BigtableKVStorage(KVStorage[str, bytes]):
 
         return value
 
-    def set(self, key: str, value: bytes, ttl: Optional[timedelta] = None) -> None:
+    def __build_row(
+        self,
+        table: Table,
+        key: str,
+        value: bytes,
+        ttl: Optional[timedelta],
+        platform: Optional[str] = None,
+    ) -> DirectRow:
         # XXX: There is a type mismatch here -- ``direct_row`` expects
         # ``bytes`` but we are providing it with ``str``.
-        row = self._get_table().direct_row(key)
+        row = table.direct_row(key)
 
         # Call to delete is just a state mutation, and in this case is just
         # used to clear all columns so the entire row will be replaced.
@@ -214,7 +250,10 @@ class BigtableKVStorage(KVStorage[str, bytes]):
         if self.compression:
             compression_flag, strategy = self.compression_strategies[self.compression]
             flags |= compression_flag
-            value = strategy.encode(value)
+            if isinstance(strategy, ZstdDictionaryCodec):
+                value = strategy.encode(value, platform=platform)
+            else:
+                value = strategy.encode(value)
 
         # Only need to write the column at all if any flags are enabled. And if
         # so, pack it into a single byte.
@@ -230,10 +269,78 @@ class BigtableKVStorage(KVStorage[str, bytes]):
 
         row.set_cell(self.column_family, self.data_column, value, timestamp=ts)
 
+        return row
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[timedelta] = None,
+        platform: Optional[str] = None,
+    ) -> None:
+        """
+        Set a value in the store by its key. The ``platform`` selects the
+        dictionary used by the "zstd-dictionary" compression.
+        """
+        row = self.__build_row(self._get_table(), key, value, ttl, platform)
+
         status = row.commit()
         if status.code != 0:
             raise BigtableError(status.code, status.message)
 
+    def __batch_rows(self, rows: Iterable[DirectRow]) -> Iterator[List[DirectRow]]:
+        batch: List[DirectRow] = []
+        batch_bytes = 0
+
+        for row in rows:
+            row_bytes = row.get_mutations_size()
+            if batch and (
+                len(batch) >= self.mutation_batch_size
+                or batch_bytes + row_bytes > self.mutation_batch_bytes
+            ):
+                yield batch
+                batch = []
+                batch_bytes = 0
+
+            batch.append(row)
+            batch_bytes += row_bytes
+
+        if batch:
+            yield batch
+
+    def __mutate_rows(self, table: Table, rows: Iterable[DirectRow]) -> None:
+        """
+        Send the row mutations to Bigtable in as few requests as the batch
+        limits allow. Every batch is attempted even if an earlier one failed,
+        the errors of all rows that could not be mutated are raised together
+        at the end.
+        """
+        errors = []
+        for batch in self.__batch_rows(rows):
+            for row, status in zip(batch, table.mutate_rows(batch)):
+                if status.code != 0:
+                    errors.append(BigtableError(row.row_key, status.code, status.message))
+
+        if errors:
+            raise BigtableError(errors)
+
+    def set_many(
+        self,
+        items: Sequence[Tuple[str, bytes]],
+        ttl: Optional[timedelta] = None,
+        platforms: Optional[Mapping[str, Optional[str]]] = None,
+    ) -> None:
+        """
+        Set multiple values in the store. ``platforms`` maps keys to the
+        platform that selects their compression dictionary, like in ``set``.
+        """
+        table = self._get_table()
+        platforms = platforms or {}
+        self.__mutate_rows(
+            table,
+            (self.__build_row(table, key, value, ttl, platforms.get(key)) for key, value in items),
+        )
+
     def delete(self, key: str) -> None:
         # XXX: There is a type mismatch here -- ``direct_row`` expects
         # ``bytes`` but we are providing it with ``str``.
@@ -247,21 +354,15 @@ class BigtableKVStorage(KVStorage[str, bytes]):
     def delete_many(self, keys: Sequence[str]) -> None:
         table = self._get_table()
 
-        rows = []
-        for key in keys:
-            # XXX: There is a type mismatch here -- ``direct_row`` expects
-            # ``bytes`` but we are providing it with ``str``.
-            row = table.direct_row(key)
-            row.delete()
-            rows.append(row)
-
-        errors = []
-        for status in table.mutate_rows(rows):
-            if status.code != 0:
-                errors.append(BigtableError(status.code, status.message))
+        def build_rows() -> Iterator[DirectRow]:
+            for key in keys:
+                # XXX: There is a type mismatch here -- ``direct_row`` expects
+                # ``bytes`` but we are providing it with ``str``.
+                row = table.direct_row(key)
+                row.delete()
+                yield row
 
-        if errors:
-            raise BigtableError(errors)
+        self.__mutate_rows(table, build_rows())
 
     def bootstrap(self, automatic_expiry: bool = True) -> None:
         table = self._get_table(admin=True)
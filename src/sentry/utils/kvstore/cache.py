@@ -91,6 +91,12 @@ class CacheKeyWrapper(KVStorage[str, V]):
             ttl,
         )
 
+    def set_many(self, items: Sequence[Tuple[str, V]], ttl: Optional[timedelta] = None) -> None:
+        return self.storage.set_many(
+            [(wrap_key(self.prefix, self.version, key), value) for key, value in items],
+            ttl,
+        )
+
     def delete(self, key: str) -> None:
         self.storage.delete(wrap_key(self.prefix, self.version, key))
 
@@ -73,3 +73,72 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    def test_process_batch_saves_data(self):
+        project = self.create_project()
+        group = Group.objects.create(project=project)
+        other = Group.objects.create(project=project)
+        the_date = timezone.now() + timedelta(days=5)
+        self.buf.process_batch(
+            [
+                (Group, {"times_seen": 1}, {"id": group.id}, {"last_seen": the_date}, None),
+                (Group, {"times_seen": 3}, {"id": other.id}, {"last_seen": the_date}, None),
+            ]
+        )
+        group_ = Group.objects.get(id=group.id)
+        assert group_.times_seen == group.times_seen + 1
+        assert group_.last_seen == the_date
+        other_ = Group.objects.get(id=other.id)
+        assert other_.times_seen == other.times_seen + 3
+        assert other_.last_seen == the_date
+
+    @mock.patch("sentry.buffer.base.buffer_incr_complete")
+    def test_process_batch_sends_signal(self, buffer_incr_complete):
+        project = self.create_project()
+        groups = [Group.objects.create(project=project) for _ in range(2)]
+        pending = [(Group, {"times_seen": 1}, {"id": group.id}, None, None) for group in groups]
+        self.buf.process_batch(pending)
+        assert buffer_incr_complete.send_robust.call_count == 2
+        for group in groups:
+            buffer_incr_complete.send_robust.assert_any_call(
+                model=Group,
+                columns={"times_seen": 1},
+                filters={"id": group.id},
+                extra=None,
+                created=False,
+                sender=Group,
+            )
+
+    def test_process_batch_without_existing_row(self):
+        project = self.create_project()
+        group = Group.objects.create(project=project, message="existing")
+        self.buf.process_batch(
+            [
+                (
+                    Group,
+                    {"times_seen": 1},
+                    {"message": "existing", "project_id": project.id},
+                    None,
+                    None,
+                ),
+                (
+                    Group,
+                    {"times_seen": 1},
+                    {"message": "foo bar", "project_id": project.id},
+                    None,
+                    None,
+                ),
+            ]
+        )
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen + 1
+        assert Group.objects.get(message="foo bar").times_seen == 2
+
+    @mock.patch("sentry.models.Group.objects.create_or_update")
+    def test_process_batch_signal_only(self, create_or_update):
+        group = Group.objects.create(project=Project(id=1))
+        prev_times_seen = group.times_seen
+        pending = [(Group, {"times_seen": 1}, {"id": group.id}, None, True)] * 2
+        self.buf.process_batch(pending)
+        group.refresh_from_db()
+        assert group.times_seen == prev_times_seen
+        assert not create_or_update.called
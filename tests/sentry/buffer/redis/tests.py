@@ -4,7 +4,7 @@ from datetime import datetime
 from django.utils import timezone
 from django.utils.encoding import force_text
 
-from sentry.buffer.redis import RedisBuffer
+from sentry.buffer.redis import PACKED_MARKER, RedisBuffer
 from sentry.models import Group, Project
 from sentry.testutils import TestCase
 from sentry.utils.compat import mock
@@ -121,6 +121,68 @@ class RedisBufferTest(TestCase):
         pending = client.zrange("b:p", 0, -1)
         assert pending == [b"foo"]
 
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    def test_incr_saves_to_redis_msgpack(self):
+        now = datetime(2017, 5, 3, 6, 6, 6, 123456, tzinfo=timezone.utc)
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        columns = {"times_seen": 1}
+        filters = {"pk": 1, "datetime": now}
+        extra = {"foo": "bar", "datetime": now, "data": {"type": "default", "n": [1, 2.5]}}
+        with self.options({"buffer.msgpack-codec": True}):
+            self.buf.incr(model, columns, filters, extra=extra)
+        result = client.hgetall("foo")
+        result = {force_text(k): v for k, v in result.items()}
+
+        for value in result["f"], result["e+foo"], result["e+datetime"], result["e+data"]:
+            assert value.startswith(PACKED_MARKER)
+        assert self.buf._load_packed(result.pop("f")) == {"pk": 1, "datetime": now}
+        assert self.buf._load_packed(result.pop("e+datetime")) == now
+        assert self.buf._load_packed(result.pop("e+foo")) == "bar"
+        assert self.buf._load_packed(result.pop("e+data")) == extra["data"]
+        assert result == {"i+times_seen": b"1", "m": b"mock.mock.Mock"}
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    def test_incr_msgpack_falls_back_to_pickle(self):
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        project = Project(id=1)
+        with self.options({"buffer.msgpack-codec": True}):
+            self.buf.incr(model, {"times_seen": 1}, {"project": project}, extra={"foo": "bar"})
+        result = client.hgetall("foo")
+        assert pickle.loads(result[b"f"]) == {"project": project}
+        assert self.buf._load_packed(result[b"e+foo"]) == "bar"
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_does_bubble_up_msgpack(self, process):
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        client = self.buf.cluster.get_routing_client()
+        client.hmset(
+            "foo",
+            {
+                "e+foo": self.buf._dump_packed("bar"),
+                "e+datetime": self.buf._dump_packed(now),
+                # mixed encodings can show up while the codec is rolled out
+                "e+legacy": pickle.dumps("baz"),
+                "f": self.buf._dump_packed({"pk": 1}),
+                "i+times_seen": "2",
+                "m": "sentry.models.Group",
+            },
+        )
+        self.buf.process("foo")
+        process.assert_called_once_with(
+            Group,
+            {"times_seen": 2},
+            {"pk": 1},
+            {"foo": "bar", "datetime": now, "legacy": "baz"},
+            None,
+        )
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.redis.process_incr")
     @mock.patch("sentry.buffer.redis.process_pending")
@@ -183,6 +245,46 @@ class RedisBufferTest(TestCase):
         self.buf.process("foo")
         process.assert_called_once_with(mock.Mock, {"times_seen": 1}, {"pk": 1}, {}, True)
 
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch(self, process_batch):
+        self.buf.batch_process = True
+        client = self.buf.cluster.get_routing_client()
+        for key, group_id in (("foo", 1), ("bar", 2)):
+            client.hmset(
+                key,
+                {
+                    "f": '{"pk": ["i","%d"]}' % group_id,
+                    "i+times_seen": "2",
+                    "m": "sentry.models.Group",
+                },
+            )
+            client.zadd("b:p", {key: 1})
+        self.buf.process(batch_keys=["foo", "bar", "baz"])
+        process_batch.assert_called_once_with(
+            [
+                (Group, {"times_seen": 2}, {"pk": 1}, {}, None),
+                (Group, {"times_seen": 2}, {"pk": 2}, {}, None),
+            ]
+        )
+        assert client.zrange("b:p", 0, -1) == []
+        assert not client.exists("foo")
+        assert not client.exists("bar")
+        assert not client.exists("l:foo")
+
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch_skips_locked(self, process_batch):
+        self.buf.batch_process = True
+        client = self.buf.cluster.get_routing_client()
+        for key in ("foo", "bar"):
+            client.hmset(
+                key, {"f": '{"pk": ["i","1"]}', "i+times_seen": "1", "m": "sentry.models.Group"}
+            )
+        client.set("l:bar", "1")
+        self.buf.process(batch_keys=["foo", "bar"])
+        process_batch.assert_called_once_with([(Group, {"times_seen": 1}, {"pk": 1}, {}, None)])
+        assert client.exists("bar")
+        assert client.exists("l:bar")
+
     """
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     def test_incr_uses_signal_only(self):
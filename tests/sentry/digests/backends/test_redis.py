@@ -6,6 +6,7 @@ from sentry.digests import Record
 from sentry.digests.backends.base import InvalidState
 from sentry.digests.backends.redis import RedisBackend
 from sentry.testutils import TestCase
+from sentry.utils.compat import mock
 
 
 class RedisBackendTestCase(TestCase):
@@ -39,6 +40,46 @@ class RedisBackendTestCase(TestCase):
         # longer exist at this point.
         assert set(backend.schedule(time.time())) == set()
 
+    def test_add_many(self):
+        backend = RedisBackend()
+
+        record_1 = Record("record:1", "value", time.time())
+        record_2 = Record("record:2", "value", time.time())
+        record_3 = Record("record:2", "new value", time.time())
+
+        # Timelines are ready for delivery after their first record was added.
+        with mock.patch.object(backend, "add") as add:
+            assert backend.add_many(
+                [("timeline:1", record_1), ("timeline:1", record_2), ("timeline:2", record_3)]
+            ) == {"timeline:1", "timeline:2"}
+            assert add.call_count == 0
+
+        # Records with the same key replace earlier ones.
+        assert backend.add_many([("timeline:1", record_3)]) == set()
+
+        with backend.digest("timeline:1", 0) as records:
+            assert set(records) == {record_1, record_3}
+
+        with backend.digest("timeline:2", 0) as records:
+            assert set(records) == {record_3}
+
+    def test_partitions(self):
+        backend = RedisBackend()
+
+        assert backend.partitions() == list(backend.cluster.hosts)
+
+        for timeline in ("timeline:1", "timeline:2"):
+            backend.add(timeline, Record("record:1", "value", time.time()))
+            with backend.digest(timeline, 0):
+                pass
+
+        keys = set()
+        for partition in backend.partitions():
+            backend.maintenance(time.time(), partition=partition)
+            keys.update(entry.key for entry in backend.schedule(time.time(), partition=partition))
+
+        assert keys == {"timeline:1", "timeline:2"}
+
     def test_truncation(self):
         backend = RedisBackend(capacity=2, truncation_chance=1.0)
 
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from time import time
 
 import pytest
+from django.db import connections
 from django.utils import timezone
 
 from sentry import nodestore
@@ -39,7 +40,8 @@ from sentry.models import (
     ReleaseProjectEnvironment,
     UserReport,
 )
-from sentry.testutils import TestCase, assert_mock_called_once_with_partial
+from sentry.testutils import TestCase, TransactionTestCase, assert_mock_called_once_with_partial
+from sentry.testutils.helpers import override_options
 from sentry.utils.cache import cache_key_for_event
 from sentry.utils.compat import mock
 from sentry.utils.outcomes import Outcome
@@ -1619,6 +1621,29 @@ class EventManagerTest(TestCase):
         assert event1.get_hashes().hashes == event2.get_hashes(grouping_config).hashes
 
 
+class NodestoreAsyncFlushTest(TransactionTestCase):
+    @mock.patch("sentry.event_manager.eventstream.insert")
+    def test_nodestore_async_flush(self, eventstream_insert):
+        node_id = Event.generate_node_id(self.project.id, "a" * 32)
+
+        def insert(*args, **kwargs):
+            # Post processing reads the event from nodestore.
+            assert nodestore.get(node_id)["logentry"]["formatted"] == "hello"
+
+        eventstream_insert.side_effect = insert
+
+        manager = EventManager(make_event(event_id="a" * 32, message="hello"))
+        manager.normalize()
+        with override_options({"store.nodestore-async-flush": True}), mock.patch.object(
+            connections, "close_all", wraps=connections.close_all
+        ) as close_all:
+            manager.save(self.project.id)
+
+        assert eventstream_insert.call_count == 1
+        # The connection of the background thread is closed after the write.
+        assert close_all.call_count == 1
+
+
 class ReleaseIssueTest(TestCase):
     def setUp(self):
         self.project = self.create_project()
@@ -3,9 +3,13 @@ import time
 from threading import Thread
 
 import pytest
+from django.db import router, transaction
 
 from sentry.event_manager import _save_aggregate
 from sentry.eventstore.models import CalculatedHashes, Event
+from sentry.models import GroupHash
+from sentry.testutils.helpers import override_options
+from sentry.utils.compat import mock
 
 
 @pytest.mark.django_db(transaction=True)
@@ -87,3 +91,85 @@ def test_group_creation_race(monkeypatch, default_project, is_race_free):
         # assert many groups are new
         assert 1 < len({rv[0].id for rv in return_values}) <= CONCURRENCY
         assert 1 < sum(rv[1] for rv in return_values) <= CONCURRENCY
+
+
+def _save_aggregate_for_hashes(project, hashes):
+    evt = Event(project.id, "89aeed6a472e4c5fb992d14df4d7e1b6", data={"timestamp": time.time()})
+
+    return _save_aggregate(
+        evt,
+        hashes=CalculatedHashes(hashes=hashes, hierarchical_hashes=[], tree_labels=[]),
+        release=None,
+        metadata={},
+        received_timestamp=None,
+        level=10,
+        culprit="",
+    )
+
+
+@pytest.mark.django_db
+def test_grouphash_cache(default_project):
+    hashes = ["a" * 32, "b" * 32]
+
+    with override_options({"store.grouphash-cache": True}):
+        group, is_new, _ = _save_aggregate_for_hashes(default_project, hashes)
+        assert is_new
+
+        # The first event for an existing group populates the cache ...
+        assert _save_aggregate_for_hashes(default_project, hashes)[0].id == group.id
+
+        # ... so that later events do not need to look up the hashes anymore.
+        with mock.patch.object(
+            GroupHash.objects, "get_or_create", side_effect=AssertionError("cache miss")
+        ):
+            cached_group, is_new, _ = _save_aggregate_for_hashes(default_project, hashes)
+
+        assert cached_group.id == group.id
+        assert not is_new
+
+        # Moving the hashes to another group has to invalidate the cache.
+        other_group = _save_aggregate_for_hashes(default_project, ["c" * 32])[0]
+        GroupHash.objects.filter(group=group).update(group=other_group)
+        GroupHash.objects.invalidate_hash_cache(default_project.id)
+
+        assert _save_aggregate_for_hashes(default_project, hashes)[0].id == other_group.id
+
+
+@pytest.mark.django_db
+def test_grouphash_cache_missing_group(default_project):
+    hashes = ["a" * 32]
+
+    with override_options({"store.grouphash-cache": True}):
+        group = _save_aggregate_for_hashes(default_project, hashes)[0]
+
+        # Plant an entry pointing to a group that does not exist (anymore).
+        generation, _ = GroupHash.objects.get_many_from_hash_cache(default_project.id, hashes)
+        grouphash = GroupHash.objects.get(project=default_project, hash=hashes[0])
+        grouphash.group_id = group.id + 1
+        GroupHash.objects.set_many_in_hash_cache(default_project.id, generation, [grouphash])
+
+        found_group, is_new, _ = _save_aggregate_for_hashes(default_project, hashes)
+
+    assert found_group.id == group.id
+    assert not is_new
+
+
+@pytest.mark.django_db(transaction=True)
+def test_grouphash_cache_invalidated_on_commit(default_project):
+    hashes = ["a" * 32]
+
+    with override_options({"store.grouphash-cache": True}):
+        _save_aggregate_for_hashes(default_project, hashes)
+        grouphash = GroupHash.objects.get(project=default_project, hash=hashes[0])
+
+        with transaction.atomic(router.db_for_write(GroupHash)):
+            GroupHash.objects.invalidate_hash_cache(default_project.id)
+
+            # A concurrent reader does not see uncommitted changes yet and caches
+            # the old row under the already bumped generation.
+            generation, _ = GroupHash.objects.get_many_from_hash_cache(default_project.id, hashes)
+            GroupHash.objects.set_many_in_hash_cache(default_project.id, generation, [grouphash])
+            assert GroupHash.objects.get_many_from_hash_cache(default_project.id, hashes)[1]
+
+        # The commit bumps the generation once more and discards that entry.
+        assert not GroupHash.objects.get_many_from_hash_cache(default_project.id, hashes)[1]
@@ -624,3 +624,76 @@ def test_consumer_rebalance_from_uncommitted_offset(requires_kafka):
         assert (
             message is None or message.error() is KafkaError._PARTITION_EOF
         ), "there should be no more messages to receive"
+
+
+def test_consumer_consume_batch(requires_kafka):
+    synchronize_commit_group = f"consumer-{uuid.uuid1().hex}"
+
+    messages_delivered = defaultdict(list)
+
+    def record_message_delivered(error, message):
+        assert error is None
+        messages_delivered[message.topic()].append(message)
+
+    producer = Producer(
+        {
+            "bootstrap.servers": os.environ["SENTRY_KAFKA_HOSTS"],
+            "on_delivery": record_message_delivered,
+        }
+    )
+
+    with create_topic() as topic, create_topic() as commit_log_topic:
+
+        # Produce some messages into the topic.
+        for i in range(3):
+            producer.produce(topic, f"{i}".encode("utf8"))
+
+        assert producer.flush(5) == 0, "producer did not successfully flush queue"
+
+        consumer = SynchronizedConsumer(
+            cluster_name="default",
+            consumer_group=f"consumer-{uuid.uuid1().hex}",
+            commit_log_topic=commit_log_topic,
+            synchronize_commit_group=synchronize_commit_group,
+            initial_offset_reset="earliest",
+        )
+
+        assignments_received = []
+
+        def on_assign(c, assignment):
+            assignments_received.append(assignment)
+
+        consumer.subscribe([topic], on_assign=on_assign)
+
+        # Wait until we have received our assignments.
+        for i in range(10):  # this takes a while
+            assert consumer.consume(10, 1) == []
+            if assignments_received:
+                break
+
+        assert len(assignments_received) == 1, "expected to receive partition assignment"
+
+        def commit_remote(message):
+            producer.produce(
+                commit_log_topic,
+                key=f"{message.topic()}:{message.partition()}:{synchronize_commit_group}".encode(
+                    "utf8"
+                ),
+                value=f"{message.offset() + 1}".encode("utf8"),
+            )
+            assert producer.flush(5) == 0, "producer did not successfully flush queue"
+
+        def consume_all():
+            messages = []
+            for i in range(5):
+                messages.extend(consumer.consume(10, 1))
+            return [message.offset() for message in messages]
+
+        # Only the messages committed by the synchronizing group are returned,
+        # even though more may have been fetched already.
+        commit_remote(messages_delivered[topic][1])
+        assert consume_all() == [0, 1]
+
+        # The remaining message is returned once it has been committed.
+        commit_remote(messages_delivered[topic][2])
+        assert consume_all() == [2]
@@ -1,6 +1,12 @@
 import pytest
 
-from sentry.grouping.enhancer import Enhancements, InvalidEnhancerConfig, create_match_frame
+from sentry.grouping.enhancer import (
+    Enhancements,
+    InvalidEnhancerConfig,
+    MatchFrameIndex,
+    create_match_frame,
+)
+from sentry.grouping.enhancer.matchers import get_literal_prefix
 
 
 def dump_obj(obj):
@@ -400,3 +406,84 @@ def test_range_matching_direct():
         ],
         "python",
     )
+
+
+@pytest.mark.parametrize(
+    "pattern,prefix",
+    [
+        (b"std::*", b"std::"),
+        (b"panic_handler", b"panic_handler"),
+        (b"*foo", b""),
+        (b"foo?bar", b"foo"),
+        (b"foo[ab]", b"foo"),
+        (b"foo\\*", b"foo"),
+    ],
+)
+def test_get_literal_prefix(pattern, prefix):
+    assert get_literal_prefix(pattern) == prefix
+
+
+def test_match_frame_index():
+    enhancement = Enhancements.from_config_string(
+        """
+        family:native function:std::*           -app
+        family:native function:main             -group
+        !family:native category:telemetry       -group
+        module:foo                              +app
+    """
+    )
+    prefix_rule, literal_rule, negated_rule, module_rule = enhancement.rules
+
+    frames = [
+        {"function": "main", "platform": "native"},
+        {"function": "std::panic", "platform": "native"},
+        {"function": "main", "platform": "javascript", "module": "foo"},
+        {"function": "std::panic", "platform": "javascript"},
+    ]
+    match_frames = [create_match_frame(frame, "native") for frame in frames]
+    index = MatchFrameIndex(match_frames)
+
+    assert list(index.get_candidates(prefix_rule)) == [0, 1]
+    assert list(index.get_candidates(literal_rule)) == [0]
+    assert list(index.get_candidates(negated_rule)) == [0, 1, 2, 3]
+    assert list(index.get_candidates(module_rule)) == [2]
+
+    cache = {}
+    for rule, expected in [
+        (prefix_rule, [1]),
+        (literal_rule, [0]),
+        (negated_rule, []),
+        (module_rule, [2]),
+    ]:
+        actions = rule.get_matching_frame_actions(match_frames, "native", None, cache, index)
+        assert [idx for idx, _ in actions] == expected
+        # the index is an optimization only, results must not change without it
+        assert rule.get_matching_frame_actions(match_frames, "native", None, {}) == actions
+
+
+def test_modifications_respect_updated_category():
+    enhancement = Enhancements.from_config_string(
+        """
+        function:alloc_*     category=malloc
+        category:malloc      -app
+    """
+    )
+    frames = [{"function": "alloc_foo", "in_app": True}, {"function": "main", "in_app": True}]
+    enhancement.apply_modifications_to_frame(frames, "native", None)
+    assert frames[0]["in_app"] is False
+    assert frames[1]["in_app"] is True
+
+
+def test_loads_cached():
+    enhancement = Enhancements.from_config_string(
+        """
+        function:panic_handler      ^-group -group
+    """,
+        bases=["common:v1"],
+    )
+    dumped = enhancement.dumps()
+
+    cached = Enhancements.loads_cached(dumped)
+    assert cached.dumps() == dumped
+    assert Enhancements.loads_cached(dumped) is cached
+    assert Enhancements.loads(dumped) is not cached
@@ -1,7 +1,11 @@
 import pytest
 
-from sentry.grouping.api import get_default_grouping_config_dict
+from sentry.grouping.api import (
+    get_default_grouping_config_dict,
+    get_fingerprinting_config_for_project,
+)
 from sentry.grouping.fingerprinting import FingerprintingRules, InvalidFingerprintingConfig
+from sentry.utils.compat import mock
 from tests.sentry.grouping import with_fingerprint_input
 
 GROUPING_CONFIG = get_default_grouping_config_dict()
@@ -184,3 +188,21 @@ def test_event_hash_variant(insta_snapshot, input):
             },
         }
     )
+
+
+@pytest.mark.django_db
+def test_fingerprinting_config_for_project_is_cached(default_project):
+    default_project.update_option("sentry:fingerprinting_rules", "type:DatabaseUnavailable -> foo")
+
+    rules = get_fingerprinting_config_for_project(default_project)
+    assert rules.to_json()["rules"][0]["fingerprint"] == ["foo"]
+
+    with mock.patch.object(FingerprintingRules, "from_config_string") as from_config_string:
+        with mock.patch.object(FingerprintingRules, "from_json") as from_json:
+            assert get_fingerprinting_config_for_project(default_project) is rules
+    assert not from_config_string.called
+    assert not from_json.called
+
+    default_project.update_option("sentry:fingerprinting_rules", "type:DatabaseUnavailable -> bar")
+    rules = get_fingerprinting_config_for_project(default_project)
+    assert rules.to_json()["rules"][0]["fingerprint"] == ["bar"]
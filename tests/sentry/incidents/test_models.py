@@ -116,6 +116,46 @@ class IncidentClearSubscriptionCacheTest(TestCase):
             AlertRule.objects.get_for_subscription(self.subscription)
 
 
+class AlertRuleGetForSubscriptionsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        other_alert_rule = self.create_alert_rule()
+        other_subscription = other_alert_rule.snuba_query.subscriptions.get()
+        AlertRule.objects.get_for_subscription(subscription)
+
+        assert AlertRule.objects.get_for_subscriptions([subscription, other_subscription]) == {
+            subscription.id: alert_rule,
+            other_subscription.id: other_alert_rule,
+        }
+        assert (
+            cache.get(AlertRule.objects.CACHE_SUBSCRIPTION_KEY % other_subscription.id)
+            == other_alert_rule
+        )
+
+    def test_no_alert_rule(self):
+        alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        alert_rule.delete()
+        assert AlertRule.objects.get_for_subscriptions([subscription]) == {}
+
+
+class AlertRuleTriggerGetForAlertRulesTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        trigger = self.create_alert_rule_trigger(alert_rule)
+        other_alert_rule = self.create_alert_rule()
+        AlertRuleTrigger.objects.get_for_alert_rule(alert_rule)
+
+        assert AlertRuleTrigger.objects.get_for_alert_rules([alert_rule, other_alert_rule]) == {
+            alert_rule.id: [trigger],
+            other_alert_rule.id: [],
+        }
+        assert (
+            cache.get(AlertRuleTrigger.objects._build_trigger_cache_key(other_alert_rule.id)) == []
+        )
+
+
 class AlertRuleTriggerClearCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
@@ -233,6 +273,39 @@ class ActiveIncidentClearCacheTest(TestCase):
         )
 
 
+class GetActiveIncidentsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        other_alert_rule = self.create_alert_rule()
+        self.create_incident(
+            alert_rule=alert_rule, projects=[self.project], status=IncidentStatus.CLOSED.value
+        )
+        active_incident = self.create_incident(alert_rule=alert_rule, projects=[self.project])
+
+        pairs = [(alert_rule, self.project), (other_alert_rule, self.project)]
+        assert Incident.objects.get_active_incidents(pairs) == {
+            (alert_rule.id, self.project.id): active_incident
+        }
+        assert (
+            cache.get(
+                Incident.objects._build_active_incident_cache_key(alert_rule.id, self.project.id)
+            )
+            == active_incident
+        )
+        assert (
+            cache.get(
+                Incident.objects._build_active_incident_cache_key(
+                    other_alert_rule.id, self.project.id
+                )
+            )
+            is False
+        )
+        # Now test fetching from cache
+        assert Incident.objects.get_active_incidents(pairs) == {
+            (alert_rule.id, self.project.id): active_incident
+        }
+
+
 class IncidentTriggerClearCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
@@ -26,14 +26,16 @@ from sentry.incidents.subscription_processor import (
     build_alert_rule_trigger_stat_key,
     build_trigger_stat_keys,
     get_alert_rule_stats,
+    get_alert_rule_stats_many,
     get_redis_client,
     partition,
+    process_updates,
     update_alert_rule_stats,
 )
 from sentry.snuba.models import QuerySubscription
 from sentry.testutils import TestCase
 from sentry.utils.compat import map
-from sentry.utils.compat.mock import Mock, call
+from sentry.utils.compat.mock import Mock, call, patch
 from sentry.utils.dates import to_timestamp
 
 EMPTY = object()
@@ -280,6 +282,54 @@ class ProcessUpdateTest(TestCase):
         self.assert_trigger_exists_with_status(incident, self.trigger, TriggerStatus.ACTIVE)
         self.assert_actions_fired_for_incident(incident, [self.action])
 
+    def test_no_transaction(self):
+        rule = self.rule
+        trigger = self.trigger
+        rule.update(threshold_period=2)
+        with patch("sentry.incidents.subscription_processor.transaction") as transaction:
+            processor = self.send_update(rule, trigger.alert_threshold + 1)
+        assert not transaction.atomic.called
+        self.assert_trigger_counts(processor, self.trigger, 1, 0)
+
+    def test_process_updates(self):
+        rule = self.rule
+        trigger = self.trigger
+        rule.update(threshold_period=2)
+        updates = [
+            (
+                self.build_subscription_update(
+                    self.sub, value=trigger.alert_threshold + 1, time_delta=timedelta(minutes=-2)
+                ),
+                self.sub,
+            ),
+            (
+                self.build_subscription_update(
+                    self.other_sub, value=trigger.alert_threshold, time_delta=timedelta(minutes=-1)
+                ),
+                self.other_sub,
+            ),
+            (
+                self.build_subscription_update(
+                    self.sub, value=trigger.alert_threshold + 1, time_delta=timedelta(minutes=-1)
+                ),
+                self.sub,
+            ),
+        ]
+        with self.feature(
+            ["organizations:incidents", "organizations:performance-view"]
+        ), self.capture_on_commit_callbacks(execute=True):
+            process_updates(updates)
+
+        incident = self.assert_active_incident(rule)
+        self.assert_trigger_exists_with_status(incident, self.trigger, TriggerStatus.ACTIVE)
+        self.assert_actions_fired_for_incident(incident, [self.action])
+        last_update, alert_counts, resolve_counts = get_alert_rule_stats(rule, self.sub, [trigger])
+        assert last_update == updates[2][0]["timestamp"]
+        assert alert_counts == {trigger.id: 0}
+        assert (
+            get_alert_rule_stats(rule, self.other_sub, [trigger])[0] == updates[1][0]["timestamp"]
+        )
+
     def test_alert_dedupe(self):
         # Verify that an alert rule that only expects a single update to be over the
         # alert threshold triggers correctly
@@ -900,3 +950,20 @@ class TestUpdateAlertRuleStats(TestCase):
         )
 
         assert results == [int(to_timestamp(date)), 20, 10, 3, 15]
+
+
+class TestGetAlertRuleStatsMany(TestCase):
+    def test(self):
+        alert_rule = AlertRule(id=1)
+        sub = QuerySubscription(project_id=2)
+        other_sub = QuerySubscription(project_id=3)
+        triggers = [AlertRuleTrigger(id=3), AlertRuleTrigger(id=4)]
+        timestamp = datetime.now().replace(tzinfo=pytz.utc, microsecond=0)
+        update_alert_rule_stats(alert_rule, sub, timestamp, {3: 1, 4: 3}, {3: 2, 4: 4})
+
+        assert get_alert_rule_stats_many(
+            [(alert_rule, sub, triggers), (alert_rule, other_sub, triggers[:1])]
+        ) == [
+            (timestamp, {3: 1, 4: 3}, {3: 2, 4: 4}),
+            (datetime.fromtimestamp(0, pytz.utc), {3: 0}, {3: 0}),
+        ]
@@ -1,17 +1,24 @@
 import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 
+import msgpack
 import pytest
+from django.core.cache import cache
 
 from sentry.event_manager import EventManager
+from sentry.eventstore.processing import event_processing_store
 from sentry.ingest.ingest_consumer import (
+    IngestConsumerWorker,
     process_attachment_chunk,
     process_event,
     process_individual_attachment,
     process_userreport,
 )
 from sentry.models import EventAttachment, EventUser, File, UserReport
+from sentry.testutils.helpers import override_options
 from sentry.utils import json
+from sentry.utils.compat import mock
 
 
 def get_normalized_event(data, project):
@@ -60,6 +67,104 @@ def test_deduplication_works(default_project, task_runner, preprocess_event):
     }
 
 
+class FakeKafkaMessage:
+    def __init__(self, value):
+        self._value = value
+
+    def value(self):
+        return self._value
+
+
+@pytest.mark.django_db
+def test_store_events(default_project, task_runner, preprocess_event, monkeypatch):
+    worker = IngestConsumerWorker()
+
+    payloads = [
+        get_normalized_event({"message": f"hello world {i}"}, default_project) for i in range(2)
+    ]
+    messages = [
+        {
+            "type": "event",
+            "payload": json.dumps(payload),
+            "start_time": time.time(),
+            "event_id": payload["event_id"],
+            "project_id": default_project.id,
+            "remote_addr": "127.0.0.1",
+        }
+        for payload in payloads
+    ]
+    user_report = {
+        "type": "user_report",
+        "event_id": payloads[0]["event_id"],
+        "project_id": default_project.id,
+    }
+    # The second event is contained twice.
+    batch = [
+        worker.process_message(FakeKafkaMessage(msgpack.packb(message)))
+        for message in [messages[0], user_report, messages[1], messages[1]]
+    ]
+
+    monkeypatch.setattr(
+        "sentry.ingest.ingest_consumer.process_userreport",
+        lambda message, projects: preprocess_event.append({"user_report": message["event_id"]}),
+    )
+
+    with override_options({"store.ingest-batch-store": True}), mock.patch.object(
+        event_processing_store, "store_many", wraps=event_processing_store.store_many
+    ) as store_many:
+        worker.flush_batch(batch)
+    worker.shutdown()
+
+    # All events are stored at once, and all messages are still processed in
+    # the order of the batch.
+    assert store_many.call_count == 1
+    assert [kwargs.get("cache_key") or kwargs for kwargs in preprocess_event] == [
+        f"e:{payloads[0]['event_id']}:{default_project.id}",
+        {"user_report": payloads[0]["event_id"]},
+        f"e:{payloads[1]['event_id']}:{default_project.id}",
+    ]
+
+
+@pytest.mark.django_db
+def test_process_pool(default_project, task_runner, preprocess_event):
+    pool = ProcessPoolExecutor(2)
+    worker = IngestConsumerWorker(process_pool=pool)
+
+    payloads = [
+        get_normalized_event({"message": f"hello world {i}"}, default_project) for i in range(10)
+    ]
+    batch = [
+        worker.process_message(
+            FakeKafkaMessage(
+                msgpack.packb(
+                    {
+                        "type": "event",
+                        "payload": json.dumps(payload),
+                        "start_time": time.time(),
+                        "event_id": payload["event_id"],
+                        "project_id": default_project.id,
+                        "remote_addr": "127.0.0.1",
+                    }
+                )
+            )
+        )
+        for payload in payloads
+    ]
+
+    # Duplicates are dropped before their payload is sent to the pool.
+    cache.set(f"ev:{default_project.id}:{payloads[0]['event_id']}", "", 3600)
+
+    with mock.patch.object(pool, "map", wraps=pool.map) as pool_map:
+        worker.flush_batch(batch)
+    worker.shutdown()
+
+    ((_, parsed_payloads), _) = pool_map.call_args
+    assert len(parsed_payloads) == len(payloads) - 1
+
+    # Events are dispatched in the order of the batch.
+    assert [kwargs["data"] for kwargs in preprocess_event] == payloads[1:]
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("missing_chunks", (True, False))
 def test_with_attachments(default_project, task_runner, missing_chunks, monkeypatch):
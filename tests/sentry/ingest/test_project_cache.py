@@ -0,0 +1,34 @@
+import pytest
+
+from sentry.ingest.project_cache import ProjectCache
+from sentry.models import Project
+
+
+@pytest.fixture
+def project_cache():
+    cache = ProjectCache()
+    yield cache
+    cache.close()
+
+
+@pytest.mark.django_db
+def test_get_many(default_project, project_cache, monkeypatch):
+    projects = project_cache.get_many([default_project.id, 9999999])
+    assert list(projects) == [default_project.id]
+    assert projects[default_project.id]._organization_cache.id == default_project.organization_id
+
+    monkeypatch.setattr(Project.objects, "get_many_from_cache", pytest.fail)
+    assert project_cache.get_many([default_project.id]) == projects
+
+
+@pytest.mark.django_db
+def test_invalidation(default_project, project_cache):
+    project_cache.get_many([default_project.id])
+
+    default_project.update(slug="new-slug")
+    assert project_cache.get_many([default_project.id])[default_project.id].slug == "new-slug"
+
+    organization = default_project.organization
+    organization.update(name="new name")
+    (project,) = project_cache.get_many([default_project.id]).values()
+    assert project.organization.name == "new name"
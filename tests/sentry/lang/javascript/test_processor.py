@@ -1,5 +1,6 @@
 import errno
 import re
+import threading
 import unittest
 import zipfile
 from copy import deepcopy
@@ -7,8 +8,9 @@ from io import BytesIO
 
 import pytest
 import responses
+from django.test.utils import override_settings
 from requests.exceptions import RequestException
-from symbolic import SourceMapTokenMatch
+from symbolic import SourceMapTokenMatch, SourceMapView
 
 from sentry import http, options
 from sentry.lang.javascript.errormapping import REACT_MAPPING_URL, rewrite_exception
@@ -550,6 +552,48 @@ class FetchFileTest(TestCase):
         result2 = fetch_file("/example.js", release=release)
         assert result2 == result
 
+    def test_non_url_with_mapped_release_archive(self):
+        compressed = BytesIO()
+        with zipfile.ZipFile(compressed, mode="w") as zip_file:
+            zip_file.writestr("example.js", b"foo" * 100, compress_type=zipfile.ZIP_DEFLATED)
+            zip_file.writestr("stored.js", b"bar", compress_type=zipfile.ZIP_STORED)
+            zip_file.writestr(
+                "manifest.json",
+                json.dumps(
+                    {
+                        "files": {
+                            "example.js": {
+                                "url": "/example.js",
+                                "headers": {"content-type": "application/json"},
+                            },
+                            "stored.js": {"url": "/stored.js"},
+                        }
+                    }
+                ),
+            )
+
+        release = Release.objects.create(version="1", organization_id=self.project.organization_id)
+        release.add_project(self.project)
+
+        compressed.seek(0)
+        file_ = File.objects.create(name="foo", type="release.bundle")
+        file_.putfile(compressed)
+        update_artifact_index(release, None, file_)
+
+        with self.options({"processing.mmap-release-archives": True}):
+            with pytest.raises(http.BadSource):
+                fetch_file("does-not-exist.js", release=release)
+
+            result = fetch_file("/example.js", release=release)
+            assert result.url == "/example.js"
+            assert result.body == b"foo" * 100
+            assert result.headers == {"content-type": "application/json"}
+            assert result.encoding == "utf-8"
+
+            result = fetch_file("/stored.js", release=release)
+            assert result.body == b"bar"
+            assert isinstance(result.body, bytes)
+
     @patch("sentry.lang.javascript.processor.cache.set", side_effect=cache.set)
     @patch("sentry.lang.javascript.processor.cache.get", side_effect=cache.get)
     def test_archive_caching(self, cache_get, cache_set):
@@ -1257,6 +1301,48 @@ class CacheSourceTest(TestCase):
         assert processor.cache.get(abs_path)
         assert len(processor.cache.get_errors(abs_path)) == 0
 
+    @patch("sentry.lang.javascript.processor.fetch_file")
+    def test_release_file_is_shared_across_processors(self, mock_fetch_file):
+        project = self.create_project()
+        release = self.create_release(project=project, version="12.31.12")
+
+        abs_path = "app:///index.js"
+        mock_fetch_file.return_value = http.UrlResult(abs_path, {}, b"console.log(1)", 200, None)
+
+        for _ in range(2):
+            processor = JavaScriptStacktraceProcessor(
+                data={"release": release.version}, stacktrace_infos=None, project=project
+            )
+            processor.release = release
+            processor.cache_source(abs_path)
+
+            assert processor.cache.get(abs_path)
+            assert len(processor.cache.get_errors(abs_path)) == 0
+
+        assert mock_fetch_file.call_count == 1
+
+    @patch("sentry.lang.javascript.processor.fetch_file")
+    def test_scraped_file_is_not_shared_across_projects(self, mock_fetch_file):
+        projects = [self.create_project(), self.create_project()]
+        release = self.create_release(project=projects[0], version="12.31.12")
+        release.add_project(projects[1])
+
+        abs_path = "http://example.com/index.js"
+        mock_fetch_file.return_value = http.UrlResult(abs_path, {}, b"console.log(1)", 200, None)
+
+        for project in projects + projects:
+            processor = JavaScriptStacktraceProcessor(
+                data={"release": release.version}, stacktrace_infos=None, project=project
+            )
+            processor.release = release
+            assert processor.allow_scraping
+            processor.cache_source(abs_path)
+
+            assert processor.cache.get(abs_path)
+
+        # Fetched once for each project, as their scraping settings may differ.
+        assert mock_fetch_file.call_count == 2
+
     @patch("sentry.lang.javascript.processor.discover_sourcemap")
     def test_node_modules_file_with_source_but_no_map_records_error(self, mock_discover_sourcemap):
         """
@@ -1289,3 +1375,108 @@ class CacheSourceTest(TestCase):
         # now we have an error
         assert len(processor.cache.get_errors(abs_path)) == 1
         assert processor.cache.get_errors(abs_path)[0] == {"url": map_url, "type": "js_no_source"}
+
+
+class PopulateSourceCacheTest(TestCase):
+    def get_processor(self):
+        project = self.create_project()
+        return JavaScriptStacktraceProcessor(data={}, stacktrace_infos=None, project=project)
+
+    @override_settings(SENTRY_SOURCE_FETCH_CONCURRENCY=4)
+    @patch("sentry.lang.javascript.processor._fetch_sourcemap")
+    @patch("sentry.lang.javascript.processor.fetch_file")
+    def test_concurrent_fetch(self, mock_fetch_file, mock_fetch_sourcemap):
+        def fetch_file(url, **kwargs):
+            if url == "http://example.com/missing.js":
+                raise http.BadSource({"type": EventError.JS_MISSING_SOURCE, "url": url})
+            headers = {"sourcemap": "http://example.com/shared.js.map"}
+            return http.UrlResult(url, headers, b"console.log(1)", 200, None)
+
+        mock_fetch_file.side_effect = fetch_file
+        sourcemap = b'{"version": 3, "sources": [], "names": [], "mappings": ""}'
+        mock_fetch_sourcemap.return_value = (
+            SourceMapView.from_json_bytes(sourcemap),
+            len(sourcemap),
+        )
+
+        processor = self.get_processor()
+        with patch("sentry.lang.javascript.processor.connections") as connections:
+            processor.populate_source_cache(
+                [
+                    {"abs_path": "http://example.com/a.js"},
+                    {"abs_path": "http://example.com/b.js"},
+                    {"abs_path": "http://example.com/missing.js"},
+                ]
+            )
+
+        # Worker threads close their connections after every fetch.
+        assert connections.close_all.call_count == 4
+
+        for abs_path in ("http://example.com/a.js", "http://example.com/b.js"):
+            assert processor.cache.get(abs_path)
+            assert processor.cache.get_errors(abs_path) == []
+            sourcemap_url, sourcemap_view = processor.sourcemaps.get_link(abs_path)
+            assert sourcemap_url == "http://example.com/shared.js.map"
+            assert sourcemap_view is not None
+
+        assert processor.cache.get_errors("http://example.com/missing.js") == [
+            {"type": EventError.JS_MISSING_SOURCE, "url": "http://example.com/missing.js"}
+        ]
+        # the shared source map is only fetched once
+        assert mock_fetch_sourcemap.call_count == 1
+
+    @override_settings(SENTRY_SOURCE_FETCH_CONCURRENCY=4, SENTRY_SOURCE_FETCH_EVENT_TIMEOUT=0)
+    @patch("sentry.lang.javascript.processor.fetch_file")
+    def test_concurrent_fetch_timeout(self, mock_fetch_file):
+        event = threading.Event()
+
+        def fetch_file(url, **kwargs):
+            event.wait(1)
+            return http.UrlResult(url, {}, b"console.log(1)", 200, None)
+
+        mock_fetch_file.side_effect = fetch_file
+
+        processor = self.get_processor()
+        processor.populate_source_cache(
+            [{"abs_path": "http://example.com/a.js"}, {"abs_path": "http://example.com/b.js"}]
+        )
+        event.set()
+
+        for abs_path in ("http://example.com/a.js", "http://example.com/b.js"):
+            assert processor.cache.get(abs_path) is None
+            assert processor.cache.get_errors(abs_path) == [
+                {"type": EventError.FETCH_TIMEOUT, "url": abs_path, "timeout": 0}
+            ]
+
+    @override_settings(SENTRY_SOURCE_FETCH_CONCURRENCY=2)
+    @patch("sentry.lang.javascript.processor.fetch_file")
+    def test_concurrent_fetch_abandoned(self, mock_fetch_file):
+        event = threading.Event()
+
+        def fetch_file(url, **kwargs):
+            if "slow" in url:
+                event.wait(5)
+            return http.UrlResult(url, {}, b"console.log(1)", 200, None)
+
+        mock_fetch_file.side_effect = fetch_file
+
+        with self.settings(SENTRY_SOURCE_FETCH_EVENT_TIMEOUT=0):
+            self.get_processor().populate_source_cache(
+                [
+                    {"abs_path": "http://example.com/slow-1.js"},
+                    {"abs_path": "http://example.com/slow-2.js"},
+                ]
+            )
+
+        # The timed out fetches of the previous event are still running, but
+        # do not hold up the fetches of this one.
+        processor = self.get_processor()
+        with self.settings(SENTRY_SOURCE_FETCH_EVENT_TIMEOUT=1):
+            processor.populate_source_cache(
+                [{"abs_path": "http://example.com/a.js"}, {"abs_path": "http://example.com/b.js"}]
+            )
+        event.set()
+
+        for abs_path in ("http://example.com/a.js", "http://example.com/b.js"):
+            assert processor.cache.get(abs_path)
+            assert processor.cache.get_errors(abs_path) == []
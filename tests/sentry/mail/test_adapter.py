@@ -1,5 +1,6 @@
 from datetime import datetime
 
+import pytest
 import pytz
 from django.contrib.auth.models import AnonymousUser
 from django.core import mail
@@ -12,7 +13,7 @@ from sentry.api.serializers.models.userreport import UserReportWithGroupSerializ
 from sentry.digests.notifications import build_digest, event_to_record
 from sentry.event_manager import EventManager, get_event_type
 from sentry.mail import mail_adapter, send_notification_as_email
-from sentry.mail.adapter import ActionTargetType
+from sentry.mail.adapter import ActionTargetType, batched_digests
 from sentry.models import (
     Activity,
     GroupRelease,
@@ -686,6 +687,61 @@ class MailAdapterRuleNotifyTest(BaseMailAdapterTest, TestCase):
         self.adapter.rule_notify(event, futures, ActionTargetType.ISSUE_OWNERS)
         assert digests.add.call_count == 1
 
+    @mock.patch("sentry.mail.adapter.deliver_digest")
+    @mock.patch("sentry.mail.adapter.digests")
+    def test_batched_digests(self, digests, deliver_digest):
+        digests.enabled.return_value = True
+        digests.add_many.return_value = {f"mail:p:{self.project.id}:IssueOwners:"}
+
+        event = self.store_event(data={}, project_id=self.project.id)
+        rule_1 = Rule.objects.create(project=self.project, label="my rule")
+        rule_2 = Rule.objects.create(project=self.project, label="my other rule")
+
+        with batched_digests():
+            self.adapter.rule_notify(event, [RuleFuture(rule_1, {})], ActionTargetType.ISSUE_OWNERS)
+            self.adapter.rule_notify(event, [RuleFuture(rule_2, {})], ActionTargetType.ISSUE_OWNERS)
+            self.adapter.rule_notify(event, [RuleFuture(rule_1, {})], ActionTargetType.MEMBER, 1)
+            assert digests.add_many.call_count == 0
+
+        assert digests.add.call_count == 0
+        assert digests.add_many.call_count == 1
+
+        # Records for the same digest are coalesced into a single record.
+        items = digests.add_many.call_args[0][0]
+        assert [(key, record.value.rules) for key, record in items] == [
+            (f"mail:p:{self.project.id}:IssueOwners:", [rule_1.id, rule_2.id]),
+            (f"mail:p:{self.project.id}:Member:1", [rule_1.id]),
+        ]
+
+        deliver_digest.delay.assert_called_once_with(f"mail:p:{self.project.id}:IssueOwners:")
+
+    @mock.patch("sentry.mail.adapter.deliver_digest")
+    @mock.patch("sentry.mail.adapter.digests")
+    def test_batched_digests_errors(self, digests, deliver_digest):
+        digests.enabled.return_value = True
+        digests.add_many.side_effect = Exception("boom")
+
+        event = self.store_event(data={}, project_id=self.project.id)
+        rule = Rule.objects.create(project=self.project, label="my rule")
+
+        # Failing to write the records does not escape the block.
+        with batched_digests():
+            self.adapter.rule_notify(event, [RuleFuture(rule, {})], ActionTargetType.ISSUE_OWNERS)
+
+        assert digests.add_many.call_count == 1
+        assert deliver_digest.delay.call_count == 0
+
+        # Records are not written if the block itself fails.
+        digests.add_many.reset_mock()
+        with pytest.raises(ValueError):
+            with batched_digests():
+                self.adapter.rule_notify(
+                    event, [RuleFuture(rule, {})], ActionTargetType.ISSUE_OWNERS
+                )
+                raise ValueError
+
+        assert digests.add_many.call_count == 0
+
 
 class MailAdapterShouldNotifyTest(BaseMailAdapterTest, TestCase):
     def test_should_notify(self):
@@ -4,7 +4,7 @@ from datetime import datetime, timezone
 from io import BytesIO
 from threading import Thread
 from time import sleep
-from zipfile import ZipFile
+from zipfile import ZIP_DEFLATED, ZipFile
 
 import pytest
 
@@ -14,6 +14,7 @@ from sentry.models.distribution import Distribution
 from sentry.models.file import File
 from sentry.models.releasefile import (
     ARTIFACT_INDEX_FILENAME,
+    MappedReleaseArchive,
     _ArtifactIndexGuard,
     delete_from_artifact_index,
     read_artifact_index,
@@ -113,6 +114,58 @@ class ReleaseFileCacheTest(TestCase):
         else:
             assert False, "file should not exist"
 
+    def test_getarchive(self):
+        buffer = BytesIO()
+        with ZipFile(buffer, mode="w") as zf:
+            zf.writestr(
+                "manifest.json",
+                json.dumps(
+                    {
+                        "files": {
+                            "foo.js": {"url": "~/foo.js", "headers": {"X-Foo": "bar"}},
+                            "bar.js": {"url": "~/bar.js"},
+                        }
+                    }
+                ),
+            )
+            zf.writestr("foo.js", b"foo" * 100, compress_type=ZIP_DEFLATED)
+            zf.writestr("bar.js", b"bar")
+
+        buffer.seek(0)
+        file = self.create_file(name="archive.zip")
+        file.putfile(buffer)
+        release_file = self.create_release_file(file=file)
+
+        expected_path = os.path.join(
+            options.get("releasefile.cache-path"),
+            str(self.organization.id),
+            str(file.id),
+        )
+
+        # Archives are cached on the file system regardless of their size
+        options.set("releasefile.cache-limit", 1024 * 1024)
+        archive = ReleaseFile.cache.getarchive(release_file)
+        os.stat(expected_path)
+        os.stat(expected_path + ".index")
+
+        contents, headers = archive.read_file_by_url("~/foo.js")
+        assert contents == b"foo" * 100
+        assert headers == {"X-Foo": "bar"}
+
+        # Opened archives are shared
+        assert ReleaseFile.cache.getarchive(release_file) is archive
+
+        # A fresh archive reads the index written by the first one. Stored
+        # files are returned without copying them out of the mapping.
+        archive = MappedReleaseArchive(expected_path)
+        contents, headers = archive.read_file_by_url("~/bar.js")
+        assert isinstance(contents, memoryview)
+        assert contents == b"bar"
+        assert headers == {}
+
+        with pytest.raises(KeyError):
+            archive.read_file_by_url("~/baz.js")
+
 
 class ReleaseArchiveTestCase(TestCase):
     def create_archive(self, fields, files, dist=None):
@@ -7,6 +7,7 @@ from google.rpc.status_pb2 import Status
 
 from sentry.nodestore.bigtable.backend import BigtableKVStorage, BigtableNodeStorage
 from sentry.utils.compat import mock
+from sentry.utils.kvstore.bigtable import BigtableError
 
 
 class MockedBigtableKVStorage(BigtableKVStorage):
@@ -33,6 +34,11 @@ class MockedBigtableKVStorage(BigtableKVStorage):
             # commits not implemented, changes are applied immediately
             return Status(code=0)
 
+        def get_mutations_size(self):
+            return sum(
+                len(cell.value) for [cell] in (self.table._rows.get(self.row_key) or {}).values()
+            )
+
         @property
         def cells(self):
             return {"x": dict(self.table._rows.get(self.row_key) or ())}
@@ -161,3 +167,42 @@ def test_cache(ns):
         ns.get("node_4")
         ns.get("node_4")
         assert mock_read_row.call_count == 2
+
+
+def test_mutation_batches():
+    ns = MockedBigtableNodeStorage(project="test")
+    ns.store.mutation_batch_size = 2
+    table = ns.store._get_table()
+    items = {f"node_{i}": {"foo": i} for i in range(5)}
+
+    with mock.patch.object(table, "mutate_rows", wraps=table.mutate_rows) as mock_mutate_rows:
+        ns.set_many(items)
+        assert [len(call[0][0]) for call in mock_mutate_rows.call_args_list] == [2, 2, 1]
+
+    assert ns.get_multi(list(items)) == items
+
+    ns.store.mutation_batch_size = 1000
+    ns.store.mutation_batch_bytes = 1
+    with mock.patch.object(table, "mutate_rows", wraps=table.mutate_rows) as mock_mutate_rows:
+        ns.set_many(items)
+        # Rows that exceed the byte limit on their own are sent alone.
+        assert mock_mutate_rows.call_count == 5
+
+
+def test_mutation_errors():
+    ns = MockedBigtableNodeStorage(project="test")
+    ns.store.mutation_batch_size = 2
+    table = ns.store._get_table()
+
+    def mutate_rows(rows):
+        return [Status(code=0 if row.row_key != b"node_1" else 4) for row in rows]
+
+    with mock.patch.object(table, "mutate_rows", side_effect=mutate_rows) as mock_mutate_rows:
+        with pytest.raises(BigtableError) as excinfo:
+            ns.set_many({f"node_{i}": {"foo": i} for i in range(3)})
+
+        # Batches after the failing one are still sent.
+        assert mock_mutate_rows.call_count == 2
+
+    [error] = excinfo.value.args[0]
+    assert error.args[:2] == (b"node_1", 4)
@@ -1,12 +1,16 @@
+import base64
 import pickle
 from datetime import timedelta
 
 import pytest
+import zstandard
 from django.utils import timezone
 
 from sentry.nodestore.base import json_dumps
 from sentry.nodestore.django.backend import DjangoNodeStorage
 from sentry.nodestore.django.models import Node
+from sentry.testutils.helpers import override_options
+from sentry.testutils.helpers.compression import write_compression_dictionary
 from sentry.utils.compat import mock
 from sentry.utils.strings import compress
 
@@ -33,6 +37,15 @@ class TestDjangoNodeStorage:
         result = self.ns.get(node.id)
         assert result == {"foo": "bar"}
 
+    def test_get_framed(self):
+        with override_options({"nodestore.framed-encoding": True}):
+            self.ns.set_subkeys(
+                "d2502ebbd7df41ceba8d3275595cac33", {None: {"foo": "bar"}, "other": {"foo": "baz"}}
+            )
+
+        assert self.ns.get("d2502ebbd7df41ceba8d3275595cac33") == {"foo": "bar"}
+        assert self.ns.get("d2502ebbd7df41ceba8d3275595cac33", subkey="other") == {"foo": "baz"}
+
     def test_get_multi(self):
         Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=compress(b'{"foo": "bar"}'))
         Node.objects.create(id="5394aa025b8e401ca6bc3ddee3130edc", data=compress(b'{"foo": "baz"}'))
@@ -51,6 +64,48 @@ class TestDjangoNodeStorage:
             b'{"foo":"bar"}'
         )
 
+    def test_compression_dictionary(self, tmp_path):
+        path = write_compression_dictionary(tmp_path / "dictionary")
+
+        ns = DjangoNodeStorage(compression_dictionaries={"default": path})
+        ns.set("d2502ebbd7df41ceba8d3275595cac33", {"foo": "bar"})
+        Node.objects.create(id="5394aa025b8e401ca6bc3ddee3130edc", data=compress(b'{"foo": "baz"}'))
+
+        data = Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data
+        assert base64.b64decode(data).startswith(zstandard.FRAME_HEADER)
+
+        ns._delete_cache_item("d2502ebbd7df41ceba8d3275595cac33")
+        assert ns.get_multi(
+            ["d2502ebbd7df41ceba8d3275595cac33", "5394aa025b8e401ca6bc3ddee3130edc"]
+        ) == {
+            "d2502ebbd7df41ceba8d3275595cac33": {"foo": "bar"},
+            "5394aa025b8e401ca6bc3ddee3130edc": {"foo": "baz"},
+        }
+
+    def test_compression_dictionary_platform(self, tmp_path):
+        python, javascript = (
+            write_compression_dictionary(tmp_path / platform, platform)
+            for platform in ("python", "javascript")
+        )
+
+        ns = DjangoNodeStorage(compression_dictionaries={"python": python, "default": javascript})
+        nodes = {
+            "d2502ebbd7df41ceba8d3275595cac33": ({"platform": "python"}, python),
+            "5394aa025b8e401ca6bc3ddee3130edc": ({"platform": "javascript"}, javascript),
+            "c9a8ba17eff34a4a8a3a2f0d1e5c8f27": ({"platform": "ruby"}, javascript),
+        }
+        ns.set("d2502ebbd7df41ceba8d3275595cac33", {"platform": "python"})
+        ns.set_many({id: data for id, (data, _) in nodes.items() if data["platform"] != "python"})
+
+        for id, (node_data, path) in nodes.items():
+            data = base64.b64decode(Node.objects.get(id=id).data)
+            with open(path, "rb") as f:
+                dict_id = zstandard.ZstdCompressionDict(f.read()).dict_id()
+            assert zstandard.get_frame_parameters(data).dict_id == dict_id
+
+            ns._delete_cache_item(id)
+            assert ns.get(id) == node_data
+
     def test_delete(self):
         node = Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=b'{"foo": "bar"}')
 
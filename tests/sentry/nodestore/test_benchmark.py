@@ -0,0 +1,35 @@
+import pytest
+
+from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.testutils.helpers import override_options
+
+DATA = {
+    None: {
+        "exception": {
+            "values": [{"value": "x" * 100, "frames": [{"lineno": i}]} for i in range(500)]
+        }
+    },
+    "unprocessed": {"exception": {"values": [{"value": "y" * 100} for _ in range(500)]}},
+    "small": {"foo": "bar"},
+}
+
+
+def benchmark_available():
+    try:
+        import pytest_benchmark  # NOQA
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("framed", [False, True], ids=["lines", "framed"])
+@pytest.mark.parametrize("subkey", [None, "small"])
+def test_benchmark_decode_subkey(framed, subkey, benchmark):
+    ns = DjangoNodeStorage()
+    with override_options({"nodestore.framed-encoding": framed}):
+        value = ns._encode(dict(DATA))
+
+    result = benchmark(ns._decode, value, subkey)
+    assert result == DATA[subkey]
@@ -7,6 +7,7 @@ from contextlib import contextmanager
 import pytest
 
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.testutils.helpers import override_options
 from tests.sentry.nodestore.bigtable.backend.tests import (
     MockedBigtableNodeStorage,
     get_temporary_bigtable_nodestorage,
@@ -53,6 +54,21 @@ def test_set(ns):
     assert ns.get(node_id) == data
 
 
+def test_set_many(ns):
+    ns.set_many({"node_1": {"foo": "a"}, "node_2": {"foo": "b"}})
+    assert ns.get_multi(["node_1", "node_2"]) == {"node_1": {"foo": "a"}, "node_2": {"foo": "b"}}
+
+    ns.set_subkeys_many(
+        {
+            "node_1": {None: {"foo": "c"}, "other": {"foo": "d"}},
+            "node_2": {None: {"foo": "e"}},
+        }
+    )
+    assert ns.get("node_1") == {"foo": "c"}
+    assert ns.get("node_1", subkey="other") == {"foo": "d"}
+    assert ns.get("node_2") == {"foo": "e"}
+
+
 def test_delete(ns):
     node_id = "d2502ebbd7df41ceba8d3275595cac33"
     data = {"foo": "bar"}
@@ -97,3 +113,18 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+@pytest.mark.parametrize("framed", [False, True], ids=["lines", "framed"])
+def test_set_subkeys_encoding(ns, framed):
+    data = {None: {"foo": "a"}, "other": {"foo": "b"}, "more": ["c\nd"]}
+    with override_options({"nodestore.framed-encoding": framed}):
+        ns.set_subkeys("node_1", dict(data))
+
+    # Reading does not depend on the option, both formats are always readable.
+    with override_options({"nodestore.framed-encoding": not framed}):
+        assert ns.get("node_1") == {"foo": "a"}
+        assert ns.get("node_1", subkey="other") == {"foo": "b"}
+        assert ns.get("node_1", subkey="more") == ["c\nd"]
+        assert ns.get("node_1", subkey="missing") is None
+        assert ns.get_multi(["node_1"], subkey="other") == {"node_1": {"foo": "b"}}
@@ -69,6 +69,30 @@ class OptionsStoreTest(TestCase):
                 store.flush_local_cache()
                 assert store.get(key) is None
 
+    @patch("sentry.options.store.time")
+    def test_missing_key(self, mocked_time):
+        store, key = self.store, self.make_key(10, 0)
+
+        mocked_time.return_value = 0
+        assert store.get(key) is None
+
+        # The miss is cached locally until the TTL expires.
+        with patch.object(Option.objects, "get_queryset", side_effect=Exception()):
+            with patch.object(store.cache, "get", side_effect=Exception()):
+                assert store.get(key) is None
+
+        Option.objects.create(key=key.name, value="bar")
+        assert store.get(key) is None
+
+        mocked_time.return_value = 15
+        assert store.get(key) == "bar"
+
+        # Setting the option replaces the cached miss right away.
+        other_key = self.make_key(10, 0)
+        assert store.get(other_key) is None
+        store.set(other_key, "baz")
+        assert store.get(other_key) == "baz"
+
     @patch("sentry.options.store.time")
     def test_key_with_grace(self, mocked_time):
         store, key = self.store, self.make_key(10, 10)
@@ -84,6 +84,129 @@ class RuleProcessorTest(TestCase):
         results = list(rp.apply())
         assert len(results) == 0
 
+    def test_many_rules(self):
+        rules = [self.rule] + [
+            Rule.objects.create(
+                project=self.event.project,
+                data={"conditions": [EVERY_EVENT_COND_DATA], "actions": [EMAIL_ACTION_DATA]},
+            )
+            for _ in range(2)
+        ]
+        # One of the statuses already exists, the others are created in bulk.
+        GroupRuleStatus.objects.create(rule=rules[1], group=self.event.group, project=self.project)
+
+        rp = RuleProcessor(
+            self.event,
+            is_new=True,
+            is_regression=True,
+            is_new_group_environment=True,
+            has_reappeared=True,
+        )
+        results = list(rp.apply())
+        assert len(results) == 1
+        callback, futures = results[0]
+        assert {f.rule for f in futures} == set(rules)
+
+        statuses = GroupRuleStatus.objects.filter(group=self.event.group)
+        assert {s.rule_id for s in statuses} == {r.id for r in rules}
+        assert all(s.last_active is not None for s in statuses)
+
+        # Statuses are served from the cache from now on.
+        with patch("sentry.rules.processor.GroupRuleStatus.objects.filter") as mock_filter:
+            rule_statuses = rp.bulk_get_rule_status(rules)
+        assert not mock_filter.called
+        assert set(rule_statuses) == {r.id for r in rules}
+
+    def test_frequency_conditions_are_queried_once(self):
+        Rule.objects.filter(project=self.event.project).delete()
+        for value in (0, 1):
+            Rule.objects.create(
+                project=self.event.project,
+                data={
+                    "conditions": [
+                        {
+                            "id": "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+                            "interval": "1h",
+                            "value": value,
+                        }
+                    ],
+                    "actions": [EMAIL_ACTION_DATA],
+                },
+            )
+
+        rp = RuleProcessor(
+            self.event,
+            is_new=True,
+            is_regression=True,
+            is_new_group_environment=True,
+            has_reappeared=True,
+        )
+        with patch("sentry.tsdb.get_sums", return_value={self.event.group_id: 1}) as mock_get_sums:
+            results = list(rp.apply())
+
+        assert mock_get_sums.call_count == 1
+        assert len(results) == 1
+        callback, futures = results[0]
+        assert len(futures) == 1
+
+    def test_rule_plans_are_cached(self):
+        def get_rule_plans():
+            return RuleProcessor(
+                self.event,
+                is_new=True,
+                is_regression=True,
+                is_new_group_environment=True,
+                has_reappeared=True,
+            ).get_rule_plans()
+
+        plans = get_rule_plans()
+        assert [plan.rule.id for plan in plans] == [self.rule.id]
+        assert plans[0].frequency == Rule.DEFAULT_FREQUENCY
+        assert get_rule_plans() is plans
+
+        self.rule.data["frequency"] = 60
+        self.rule.save()
+
+        new_plans = get_rule_plans()
+        assert new_plans is not plans
+        assert new_plans[0].frequency == 60
+
+    def test_expensive_conditions_are_deferred(self):
+        Rule.objects.filter(project=self.event.project).delete()
+        Rule.objects.create(
+            project=self.event.project,
+            data={
+                "conditions": [
+                    {
+                        "id": "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+                        "interval": "1h",
+                        "value": 0,
+                    },
+                    {"id": "sentry.rules.conditions.first_seen_event.FirstSeenEventCondition"},
+                ],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+
+        rp = RuleProcessor(
+            self.event,
+            is_new=False,
+            is_regression=True,
+            is_new_group_environment=True,
+            has_reappeared=True,
+        )
+        (plan,) = rp.get_rule_plans()
+        assert [type(c).__name__ for c in plan.conditions] == [
+            "FirstSeenEventCondition",
+            "EventFrequencyCondition",
+        ]
+
+        with patch("sentry.tsdb.get_sums") as mock_get_sums:
+            results = list(rp.apply())
+
+        assert not mock_get_sums.called
+        assert len(results) == 0
+
 
 # mock filter which always passes
 class MockFilterTrue(EventFilter):
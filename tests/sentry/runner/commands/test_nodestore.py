@@ -0,0 +1,60 @@
+import os
+
+import zstandard
+
+from sentry.runner.commands.nodestore import nodestore
+from sentry.testutils import CliTestCase, SnubaTestCase
+from sentry.testutils.helpers.datetime import before_now, iso_format
+from sentry.utils.compat import mock
+
+
+class TrainDictionaryTest(CliTestCase, SnubaTestCase):
+    command = nodestore
+
+    def test_platform(self):
+        for i, platform in enumerate(["python", "python", "javascript"]):
+            self.store_event(
+                data={
+                    "event_id": str(i) * 32,
+                    "platform": platform,
+                    "timestamp": iso_format(before_now(minutes=1)),
+                },
+                project_id=self.project.id,
+            )
+
+        dictionary = zstandard.train_dictionary(
+            1024 * 4, [b"python-%d" % i * 50 for i in range(1000)]
+        )
+
+        with self.runner.isolated_filesystem():
+            with mock.patch(
+                "zstandard.train_dictionary", return_value=dictionary
+            ) as mock_train_dictionary:
+                rv = self.invoke(
+                    "train-dictionary",
+                    "dictionaries",
+                    "--project",
+                    str(self.project.id),
+                    "--platform",
+                    "python",
+                    "--platform",
+                    "default",
+                    "--size",
+                    "4096",
+                )
+
+            assert rv.exit_code == 0, rv.output
+            assert [call[0][0] for call in mock_train_dictionary.call_args_list] == [4096, 4096]
+            assert [len(call[0][1]) for call in mock_train_dictionary.call_args_list] == [2, 3]
+
+            for platform in ("python", "default"):
+                with open(os.path.join("dictionaries", f"{platform}.zdict"), "rb") as f:
+                    assert f.read() == dictionary.as_bytes()
+
+                assert os.path.join("dictionaries", f"{platform}.zdict") in rv.output
+
+    def test_no_events(self):
+        with self.runner.isolated_filesystem():
+            rv = self.invoke("train-dictionary", "dictionaries", "--project", str(self.project.id))
+        assert rv.exit_code != 0
+        assert "No default payloads found" in rv.output
@@ -12,6 +12,8 @@ from sentry.snuba.query_subscription_consumer import (
     InvalidMessageError,
     InvalidSchemaError,
     QuerySubscriptionConsumer,
+    batch_subscriber_registry,
+    register_batch_subscriber,
     register_subscriber,
     subscriber_registry,
 )
@@ -114,6 +116,83 @@ class HandleMessageTest(BaseQuerySubscriptionTest, TestCase):
         mock_callback.assert_called_once_with(data["payload"], sub)
 
 
+class HandleMessagesTest(BaseQuerySubscriptionTest, TestCase):
+    metrics = patcher("sentry.snuba.query_subscription_consumer.metrics")
+
+    def setUp(self):
+        super().setUp()
+        self.orig_registry = deepcopy(subscriber_registry)
+        self.orig_batch_registry = deepcopy(batch_subscriber_registry)
+
+    def tearDown(self):
+        super().tearDown()
+        subscriber_registry.clear()
+        subscriber_registry.update(self.orig_registry)
+        batch_subscriber_registry.clear()
+        batch_subscriber_registry.update(self.orig_batch_registry)
+
+    def create_subscription(self, registration_key):
+        with self.tasks():
+            snuba_query = create_snuba_query(
+                QueryDatasets.EVENTS,
+                "hello",
+                "count()",
+                timedelta(minutes=10),
+                timedelta(minutes=1),
+                None,
+            )
+            sub = create_snuba_subscription(self.project, registration_key, snuba_query)
+        sub.refresh_from_db()
+        return sub
+
+    def build_messages(self, *subscription_ids):
+        messages = []
+        for subscription_id in subscription_ids:
+            data = deepcopy(self.valid_wrapper)
+            data["payload"]["subscription_id"] = subscription_id
+            messages.append(
+                self.build_mock_message(data, topic=settings.KAFKA_EVENTS_SUBSCRIPTIONS_RESULTS)
+            )
+        return messages
+
+    def test_batch_subscriber(self):
+        mock_callback = mock.Mock()
+        mock_batch_callback = mock.Mock()
+        register_subscriber("registered_test")(mock_callback)
+        register_batch_subscriber("registered_test")(mock_batch_callback)
+        sub = self.create_subscription("registered_test")
+        other_sub = self.create_subscription("registered_test")
+
+        with mock.patch("sentry.snuba.tasks._snuba_pool") as pool:
+            pool.urlopen.return_value.status = 202
+            self.consumer.handle_messages(
+                self.build_messages(
+                    sub.subscription_id, "1234", other_sub.subscription_id, sub.subscription_id
+                )
+            )
+
+        assert not mock_callback.called
+        mock_batch_callback.assert_called_once()
+        (updates,) = mock_batch_callback.call_args[0]
+        assert [(update["subscription_id"], subscription) for update, subscription in updates] == [
+            (sub.subscription_id, sub),
+            (other_sub.subscription_id, other_sub),
+            (sub.subscription_id, sub),
+        ]
+        self.metrics.incr.assert_any_call("snuba_query_subscriber.subscription_doesnt_exist")
+
+    def test_subscriber(self):
+        mock_callback = mock.Mock()
+        register_subscriber("registered_test")(mock_callback)
+        sub = self.create_subscription("registered_test")
+
+        self.consumer.handle_messages(self.build_messages(sub.subscription_id, sub.subscription_id))
+        assert mock_callback.call_count == 2
+        for (update, subscription), _ in mock_callback.call_args_list:
+            assert update["subscription_id"] == sub.subscription_id
+            assert subscription == sub
+
+
 class ParseMessageValueTest(BaseQuerySubscriptionTest, unittest.TestCase):
     def run_test(self, message):
         self.consumer.parse_message_value(json.dumps(message))
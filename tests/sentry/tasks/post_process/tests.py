@@ -16,7 +16,11 @@ from sentry.models import (
 )
 from sentry.ownership.grammar import Matcher, Owner, Rule, dump_schema
 from sentry.tasks.merge import merge_groups
-from sentry.tasks.post_process import post_process_group
+from sentry.tasks.post_process import (
+    get_post_process_envelope,
+    get_processing_store_marker,
+    post_process_group,
+)
 from sentry.testutils import TestCase
 from sentry.testutils.helpers import with_feature
 from sentry.testutils.helpers.datetime import before_now, iso_format
@@ -144,6 +148,33 @@ class PostProcessGroupTest(TestCase):
 
         mock_callback.assert_called_once_with(EventMatcher(event), mock_futures)
 
+    @patch("sentry.rules.processor.RuleProcessor")
+    def test_rule_processor_with_envelope(self, mock_processor):
+        event = self.store_event(
+            data={"message": "testing", "tags": {"foo": "bar"}}, project_id=self.project.id
+        )
+        cache_key = event_processing_store.store(
+            get_processing_store_marker({"project": self.project.id, "event_id": event.event_id})
+        )
+
+        post_process_group(
+            is_new=True,
+            is_regression=False,
+            is_new_group_environment=True,
+            cache_key=cache_key,
+            group_id=event.group_id,
+            envelope=get_post_process_envelope(event),
+        )
+
+        mock_processor.assert_called_once_with(EventMatcher(event), True, False, True, False)
+        processed_event = mock_processor.call_args[0][0]
+        assert processed_event.get_tag("foo") == "bar"
+        assert processed_event.title == event.title
+        # Anything beyond the envelope is loaded from nodestore.
+        assert processed_event.data["logentry"] == event.data["logentry"]
+
+        assert event_processing_store.get(cache_key) is None
+
     @patch("sentry.rules.processor.RuleProcessor")
     def test_rule_processor(self, mock_processor):
         event = self.store_event(data={"message": "testing"}, project_id=self.project.id)
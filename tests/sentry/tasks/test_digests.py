@@ -2,10 +2,11 @@ from django.core import mail
 
 import sentry
 from sentry.digests.backends.redis import RedisBackend
-from sentry.digests.notifications import event_to_record
+from sentry.digests.notifications import build_digest, event_to_record, fetch_states
 from sentry.models.rule import Rule
-from sentry.tasks.digests import deliver_digest
+from sentry.tasks.digests import deliver_digest, deliver_digests, schedule_digests
 from sentry.testutils import TestCase
+from sentry.testutils.helpers import override_options
 from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.utils.compat.mock import patch
 
@@ -44,3 +45,74 @@ class DeliverDigestTest(TestCase):
     @patch.object(sentry, "digests")
     def test_member_key(self, digests):
         self.run_test(f"mail:p:{self.project.id}:Member:{self.user.id}", digests)
+
+    @patch.object(sentry, "digests")
+    def test_batch(self, digests):
+        backend = RedisBackend()
+        rule = Rule.objects.create(project=self.project, label="Test Rule", data={})
+        events = [
+            self.store_event(
+                data={"timestamp": iso_format(before_now(days=1)), "fingerprint": [fingerprint]},
+                project_id=self.project.id,
+            )
+            for fingerprint in ("group-1", "group-2")
+        ]
+        keys = [
+            f"mail:p:{self.project.id}:IssueOwners:",
+            f"mail:p:{self.project.id}:Member:{self.user.id}",
+        ]
+        for key in keys:
+            for event in events:
+                backend.add(key, event_to_record(event, [rule]), increment_delay=0, maximum_delay=0)
+        digests.digest = backend.digest
+        with self.tasks(), patch("sentry.tasks.digests.fetch_states", wraps=fetch_states) as fetch:
+            deliver_digests(keys)
+        assert fetch.call_count == 1
+        assert len(mail.outbox) == 2
+        assert all("2 new alerts since" in message.subject for message in mail.outbox)
+
+    @patch.object(sentry, "digests")
+    def test_batch_errors(self, digests):
+        backend = RedisBackend()
+        rule = Rule.objects.create(project=self.project, label="Test Rule", data={})
+        event = self.store_event(
+            data={"timestamp": iso_format(before_now(days=1))}, project_id=self.project.id
+        )
+        keys = [
+            f"mail:p:{self.project.id}:IssueOwners:",
+            f"mail:p:{self.project.id}:Member:{self.user.id}",
+        ]
+        for key in keys:
+            backend.add(key, event_to_record(event, [rule]), increment_delay=0, maximum_delay=0)
+        digests.digest = backend.digest
+
+        failures = [Exception("boom")]
+
+        def fail_once(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return build_digest(*args, **kwargs)
+
+        # A digest that fails to build does not prevent the others from being
+        # delivered.
+        with self.tasks(), patch("sentry.tasks.digests.build_digest", side_effect=fail_once):
+            deliver_digests(keys)
+        assert len(mail.outbox) == 1
+
+
+class ScheduleDigestsTest(TestCase):
+    def test_partitioned(self):
+        backend = RedisBackend()
+        rule = Rule.objects.create(project=self.project, label="Test Rule", data={})
+        event = self.store_event(
+            data={"timestamp": iso_format(before_now(days=1))}, project_id=self.project.id
+        )
+        key = f"mail:p:{self.project.id}:IssueOwners:"
+        backend.add(key, event_to_record(event, [rule]), increment_delay=0, maximum_delay=0)
+
+        with patch.object(sentry, "digests", backend), override_options(
+            {"digests.partitioned-scheduling": True}
+        ), patch("sentry.tasks.digests.deliver_digests") as deliver, self.tasks():
+            schedule_digests()
+
+        deliver.delay.assert_called_once_with([key])
@@ -16,7 +16,9 @@ from sentry.tasks.reports import (
     Report,
     Skipped,
     build_message,
+    build_organization_reports,
     build_project_issue_summaries,
+    build_project_report,
     build_project_series,
     change,
     clean_series,
@@ -36,9 +38,11 @@ from sentry.tasks.reports import (
 )
 from sentry.testutils.cases import OutcomesSnubaTest, SnubaTestCase, TestCase
 from sentry.testutils.factories import DEFAULT_EVENT_DATA
+from sentry.testutils.helpers import override_options
 from sentry.testutils.helpers.datetime import iso_format
 from sentry.utils.compat import map, mock
 from sentry.utils.dates import floor_to_utc_day, to_datetime, to_timestamp
+from sentry.utils.email import send_messages
 from sentry.utils.outcomes import Outcome
 
 
@@ -243,6 +247,78 @@ class ReportTestCase(TestCase, SnubaTestCase):
             message = mail.outbox[0]
             assert self.organization.name in message.subject
 
+    def test_organization_delivery(self):
+        Project.objects.all().delete()
+
+        now = datetime(2016, 9, 12, tzinfo=pytz.utc)
+
+        project = self.create_project(
+            organization=self.organization, teams=[self.team], date_added=now - timedelta(days=90)
+        )
+        self.create_project(organization=self.organization, teams=[self.create_team()])
+
+        tsdb.incr(tsdb.models.project, project.id, now - timedelta(days=1))
+
+        other_user = self.create_user()
+        self.create_member(user=other_user, organization=self.organization, teams=[self.team])
+        unsubscribed_user = self.create_user()
+        self.create_member(
+            user=unsubscribed_user, organization=self.organization, teams=[self.team]
+        )
+        UserOption.objects.set_value(
+            unsubscribed_user, DISABLED_ORGANIZATIONS_USER_OPTION_KEY, [self.organization.id]
+        )
+        self.create_member(
+            user=self.create_user(), organization=self.organization, teams=[self.create_team()]
+        )
+
+        with self.tasks(), mock.patch.object(
+            tsdb, "get_earliest_timestamp"
+        ) as get_earliest_timestamp, override_options({"reports.organization-delivery": True}):
+            get_earliest_timestamp.return_value = to_timestamp(now - timedelta(days=60))
+
+            prepare_reports(timestamp=to_timestamp(now))
+
+        assert sorted(message.to[0] for message in mail.outbox) == sorted(
+            [self.user.email, other_user.email]
+        )
+        assert all(self.organization.name in message.subject for message in mail.outbox)
+
+    @mock.patch("sentry.tasks.reports.DELIVERY_BATCH_SIZE", 1)
+    def test_organization_delivery_errors(self):
+        Project.objects.all().delete()
+
+        now = datetime(2016, 9, 12, tzinfo=pytz.utc)
+
+        project = self.create_project(
+            organization=self.organization, teams=[self.team], date_added=now - timedelta(days=90)
+        )
+        tsdb.incr(tsdb.models.project, project.id, now - timedelta(days=1))
+
+        other_user = self.create_user()
+        self.create_member(user=other_user, organization=self.organization, teams=[self.team])
+
+        failures = [Exception("boom")]
+
+        def fail_once(messages):
+            if failures:
+                raise failures.pop()
+            send_messages(messages)
+
+        # A failing batch does not prevent the other batches from being sent.
+        with self.tasks(), mock.patch.object(
+            tsdb, "get_earliest_timestamp"
+        ) as get_earliest_timestamp, mock.patch(
+            "sentry.tasks.reports.send_messages", side_effect=fail_once
+        ), override_options(
+            {"reports.organization-delivery": True}
+        ):
+            get_earliest_timestamp.return_value = to_timestamp(now - timedelta(days=60))
+
+            prepare_reports(timestamp=to_timestamp(now))
+
+        assert len(mail.outbox) == 1
+
     def test_deliver_organization_user_report_respects_settings(self):
         user = self.user
         organization = self.organization
@@ -360,6 +436,36 @@ class ReportTestCase(TestCase, SnubaTestCase):
             map(lambda x: x[1] == (2, 0), response)
         ), "must show two issues resolved in one rollup window"
 
+    @mock.patch("sentry.tasks.reports.BATCH_SIZE", 1)
+    @mock.patch("sentry.tasks.reports.ORGANIZATION_OUTCOMES_MAX_ROWS", 1)
+    def test_build_organization_reports(self):
+        now = timezone.now()
+        interval = (floor_to_utc_day(now) - timedelta(days=7), floor_to_utc_day(now))
+        three_days_ago = iso_format(now - timedelta(days=3))
+
+        projects = [self.project, self.create_project(organization=self.organization)]
+        for i, project in enumerate(projects):
+            for fingerprint in ["group-1", "group-2"][: i + 1]:
+                event = self.store_event(
+                    data={
+                        "message": "message",
+                        "timestamp": three_days_ago,
+                        "fingerprint": [fingerprint],
+                    },
+                    project_id=project.id,
+                )
+            tsdb.incr(tsdb.models.project, project.id, now - timedelta(days=3), count=i + 2)
+
+        group = event.group
+        group.status = GroupStatus.RESOLVED
+        group.resolved_at = now - timedelta(days=2)
+        group.save()
+
+        assert build_organization_reports(interval, projects) == {
+            project.id: build_project_report(interval, project) for project in projects
+        }
+        assert build_organization_reports(interval, []) == {}
+
 
 class ReportAcceptanceTest(OutcomesSnubaTest, SnubaTestCase):
     @mock.patch("sentry.tasks.reports.backend", DummyReportBackend())
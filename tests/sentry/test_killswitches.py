@@ -1,4 +1,6 @@
-from sentry.killswitches import _value_matches, normalize_value
+from sentry.killswitches import _value_matches, killswitch_matches_context, normalize_value
+from sentry.testutils.helpers import override_options
+from sentry.utils.compat import mock
 
 
 def test_normalize_value():
@@ -67,3 +69,29 @@ def test_value_matches():
         [{"event_type": "transaction"}],
         {"project_id": 3, "event_type": "transaction"},
     )
+
+
+def test_killswitch_matches_context():
+    name = "store.load-shed-group-creation-projects"
+    value = [{"project_id": 1, "platform": None}, {"project_id": 2, "platform": "python"}]
+
+    with override_options({name: value}):
+        assert killswitch_matches_context(name, {"project_id": 1, "platform": "javascript"})
+        assert killswitch_matches_context(name, {"project_id": 2, "platform": "python"})
+        assert not killswitch_matches_context(name, {"project_id": 2, "platform": "javascript"})
+        assert not killswitch_matches_context(name, {"project_id": 3, "platform": None})
+
+        # The option value is compiled once and left untouched.
+        with mock.patch("sentry.killswitches.normalize_value") as mock_normalize_value:
+            assert killswitch_matches_context(name, {"project_id": 1, "platform": None})
+            assert mock_normalize_value.call_count == 0
+
+        assert value == [
+            {"project_id": 1, "platform": None},
+            {"project_id": 2, "platform": "python"},
+        ]
+
+    # Changing the option value recompiles the matcher.
+    with override_options({name: [3]}):
+        assert not killswitch_matches_context(name, {"project_id": 1, "platform": None})
+        assert killswitch_matches_context(name, {"project_id": 3, "platform": None})
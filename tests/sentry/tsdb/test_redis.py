@@ -317,6 +317,60 @@ class RedisTSDBTest(TestCase):
         )
         assert results == {1: 0, 2: 0}
 
+    def test_write_batch(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=2)
+        dts = [now + timedelta(hours=i) for i in range(2)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.write_batch(
+            incrs=[
+                (TSDBModel.project, 1, {"timestamp": dts[0], "environment_id": 1}),
+                (TSDBModel.project, 1, {"timestamp": dts[0], "environment_id": 1, "count": 2}),
+                (TSDBModel.project, 1, {"timestamp": dts[1], "environment_id": 2}),
+                (TSDBModel.group, 5, {"timestamp": dts[1]}),
+            ],
+            records=[
+                (TSDBModel.users_affected_by_group, 5, ("foo", "bar"), {"timestamp": dts[0]}),
+                (
+                    TSDBModel.users_affected_by_group,
+                    5,
+                    ("baz",),
+                    {"timestamp": dts[1], "environment_id": 1},
+                ),
+            ],
+            frequencies=[
+                (
+                    TSDBModel.frequent_environments_by_group,
+                    {5: {1: 1, 2: 2}},
+                    {"timestamp": dts[1]},
+                ),
+            ],
+        )
+
+        assert self.db.get_range(TSDBModel.project, [1], dts[0], dts[-1]) == {
+            1: [(timestamp(dts[0]), 3), (timestamp(dts[1]), 1)]
+        }
+        assert self.db.get_range(TSDBModel.project, [1], dts[0], dts[-1], environment_ids=[1]) == {
+            1: [(timestamp(dts[0]), 3), (timestamp(dts[1]), 0)]
+        }
+        assert self.db.get_range(TSDBModel.group, [5], dts[0], dts[-1]) == {
+            5: [(timestamp(dts[0]), 0), (timestamp(dts[1]), 1)]
+        }
+
+        assert self.db.get_distinct_counts_series(
+            TSDBModel.users_affected_by_group, [5], dts[0], dts[-1], rollup=3600
+        ) == {5: [(timestamp(dts[0]), 2), (timestamp(dts[1]), 1)]}
+        assert self.db.get_distinct_counts_totals(
+            TSDBModel.users_affected_by_group, [5], dts[0], dts[-1], environment_id=1
+        ) == {5: 1}
+
+        assert self.db.get_most_frequent(
+            TSDBModel.frequent_environments_by_group, [5], dts[0], dts[-1]
+        ) == {5: [("2", 2.0), ("1", 1.0)]}
+
     def test_frequency_tables(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC)
         model = TSDBModel.frequent_issues_by_project
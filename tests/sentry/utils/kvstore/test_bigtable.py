@@ -1,10 +1,12 @@
 import functools
 import os
-from typing import Optional
+from typing import Mapping, Optional
 
 import pytest
+import zstandard
 from google.oauth2.credentials import Credentials
 
+from sentry.testutils.helpers.compression import write_compression_dictionary
 from sentry.utils.kvstore.bigtable import BigtableKVStorage
 
 
@@ -24,14 +26,23 @@ def get_credentials() -> Credentials:
 credentials = pytest.fixture(get_credentials)
 
 
+@pytest.fixture
+def compression_dictionary(tmp_path) -> str:
+    return write_compression_dictionary(tmp_path / "dictionary")
+
+
 def create_store(
-    request, credentials: Credentials, compression: Optional[str] = None
+    request,
+    credentials: Credentials,
+    compression: Optional[str] = None,
+    compression_dictionaries: Optional[Mapping[str, str]] = None,
 ) -> BigtableKVStorage:
     store = BigtableKVStorage(
         project="test",
         instance="test",
         table_name="test",
         compression=compression,
+        compression_dictionaries=compression_dictionaries,
         client_options={"credentials": credentials},
     )
     store.bootstrap()
@@ -50,8 +61,13 @@ def store_factory(request, credentials: Credentials):
         (None, None, b"{"),
         ("zlib", BigtableKVStorage.Flags.COMPRESSED_ZLIB, (b"\x78\x01", b"\x78\x9c", b"\x78\xda")),
         ("zstd", BigtableKVStorage.Flags.COMPRESSED_ZSTD, b"\x28\xb5\x2f\xfd"),
+        (
+            "zstd-dictionary",
+            BigtableKVStorage.Flags.COMPRESSED_ZSTD_DICTIONARY,
+            b"\x28\xb5\x2f\xfd",
+        ),
     ],
-    ids=["zlib", "ident", "zstd"],
+    ids=["zlib", "ident", "zstd", "zstd-dictionary"],
 )
 def test_compression_raw_values(
     compression: Optional[str],
@@ -59,8 +75,9 @@ def test_compression_raw_values(
     expected_prefix: bytes,
     request,
     store_factory,
+    compression_dictionary,
 ) -> None:
-    store = store_factory(compression)
+    store = store_factory(compression, {"default": compression_dictionary})
 
     key = "key"
     value = b'{"foo":"bar"}'
@@ -81,9 +98,9 @@ def test_compression_raw_values(
         assert store.flags_column not in columns
 
 
-def test_compression_compatibility(request, store_factory) -> None:
+def test_compression_compatibility(request, store_factory, compression_dictionary) -> None:
     stores = {
-        compression: store_factory(compression)
+        compression: store_factory(compression, {"default": compression_dictionary})
         for compression in BigtableKVStorage.compression_strategies.keys() | {None}
     }
 
@@ -95,3 +112,27 @@ def test_compression_compatibility(request, store_factory) -> None:
 
         for reader in stores.values():
             assert reader.get(key) == value
+
+
+def test_compression_dictionary_platform(store_factory, tmp_path) -> None:
+    python, javascript = (
+        write_compression_dictionary(tmp_path / platform, platform)
+        for platform in ("python", "javascript")
+    )
+    store = store_factory("zstd-dictionary", {"python": python, "default": javascript})
+
+    value = b'{"platform":"python"}'
+    store.set("python", value, platform="python")
+    store.set_many(
+        [("javascript", value), ("other", value)], platforms={"javascript": "javascript"}
+    )
+
+    for key, path in (("python", python), ("javascript", javascript), ("other", javascript)):
+        assert store.get(key) == value
+
+        columns = store._get_table().read_row(key).cells[store.column_family]
+        with open(path, "rb") as f:
+            dict_id = zstandard.ZstdCompressionDict(f.read()).dict_id()
+        assert (
+            zstandard.get_frame_parameters(columns[store.data_column][0].value).dict_id == dict_id
+        )
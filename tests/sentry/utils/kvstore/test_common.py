@@ -125,3 +125,8 @@ def test_multiple_key_operations(properties: Properties) -> None:
     store.delete_many(all_keys)
 
     assert dict(store.get_many(all_keys)) == {}
+
+    # Test setting multiple keys at once.
+    store.set_many(list(items.items()))
+
+    assert dict(store.get_many(all_keys)) == items
@@ -0,0 +1,68 @@
+from sentry.utils.cache import LRUCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+
+def test_lru_cache_ttl():
+    clock = Clock()
+    cache = LRUCache(maxsize=10, ttl=5, timer=clock)
+    cache.set("a", 1)
+    clock.now = 4
+    assert cache.get("a") == 1
+    clock.now = 5
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert len(cache) == 0
+
+
+def test_lru_cache_delete_and_clear():
+    cache = LRUCache(maxsize=10)
+    cache.set("a", None)
+    assert "a" in cache
+    cache.delete("a")
+    cache.delete("missing")
+    assert "a" not in cache
+    cache.set("b", 2)
+    cache.clear()
+    assert cache.get_many(["b"]) == {}
+
+
+def test_lru_cache_maxweight():
+    cache = LRUCache(maxsize=10, maxweight=10)
+    cache.set("a", 1, weight=4)
+    cache.set("b", 2, weight=4)
+    assert cache.weight == 8
+    cache.get("a")
+    cache.set("c", 3, weight=4)
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert cache.weight == 8
+
+    cache.set("a", 1, weight=2)
+    assert cache.weight == 6
+
+    # too large to ever fit
+    cache.set("d", 4, weight=11)
+    assert "d" not in cache
+    assert cache.weight == 6
+
+    cache.delete("a")
+    assert cache.weight == 4
+    cache.clear()
+    assert cache.weight == 0
@@ -1,6 +1,9 @@
 import pytest
+import zstandard
 
-from sentry.utils.codecs import BytesCodec, JSONCodec, ZlibCodec, ZstdCodec
+from sentry.testutils.helpers.compression import train_compression_dictionary
+from sentry.utils import json
+from sentry.utils.codecs import BytesCodec, JSONCodec, ZlibCodec, ZstdCodec, ZstdDictionaryCodec
 
 
 @pytest.mark.parametrize(
@@ -22,3 +25,38 @@ def test_codec_chaining() -> None:
 
     assert codec.encode([1, 2, 3]) == b"[1,2,3]"
     assert codec.decode(b"[1,2,3]") == [1, 2, 3]
+
+
+def test_zstd_dictionary_codec() -> None:
+    python, javascript = (
+        train_compression_dictionary("python"),
+        train_compression_dictionary("javascript"),
+    )
+    value = json.dumps(
+        {"platform": "python", "modules": {f"python-module-{i}": f"1.{i}" for i in range(50)}}
+    ).encode("utf8")
+
+    codec = ZstdDictionaryCodec({"python": [python], "default": [javascript]})
+    encoded = codec.encode(value, platform="python")
+    assert zstandard.get_frame_parameters(encoded).dict_id == python.dict_id()
+    assert len(encoded) < len(ZstdCodec().encode(value))
+    assert codec.decode(encoded) == value
+
+    # Platforms without their own dictionary fall back to the default one.
+    for platform in ("ruby", None):
+        fallback = codec.encode(value, platform=platform)
+        assert zstandard.get_frame_parameters(fallback).dict_id == javascript.dict_id()
+        assert codec.decode(fallback) == value
+
+    # Values compressed with older dictionaries or without any dictionary
+    # remain readable.
+    assert ZstdDictionaryCodec({"python": [javascript, python]}).decode(encoded) == value
+    assert codec.decode(ZstdCodec().encode(value)) == value
+
+    with pytest.raises(ValueError):
+        ZstdDictionaryCodec({"python": [javascript]}).decode(encoded)
+
+    # Without any dictionary, values are compressed without one.
+    encoded = ZstdDictionaryCodec({"python": [python]}).encode(value, platform="javascript")
+    assert zstandard.get_frame_parameters(encoded).dict_id == 0
+    assert codec.decode(encoded) == value